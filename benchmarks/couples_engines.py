@@ -0,0 +1,67 @@
+"""
+Compare the engines forming the couples: the CP-SAT model and the maximum weight matching, on random
+rosters of volunteers.
+    ```
+    $ python -m benchmarks.couples_engines --sizes 100 500 1000 2000
+    ```
+"""
+import argparse
+import json
+import random
+
+from src.domain.model_couple import solve_couples_with_statistics
+from src.domain.utils import COUPLE_ENGINES
+
+SLOTS = 14  # A week of mornings and afternoons
+SECTORS = 20  # The arrondissements of Paris
+
+
+def random_employees(count, seed=0):
+    """Volunteers available on a few half-days, in up to four sectors, as in the people files"""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": "volunteer {}".format(i),
+            "availabilities": sorted(rng.sample(range(SLOTS), rng.randint(1, 6))),
+            "sector": sum(1 << sector for sector in rng.sample(range(SECTORS), rng.randint(1, 4))),
+        }
+        for i in range(count)
+    ]
+
+
+def benchmark(size, engine, time_limit, seed=0):
+    # The exploration is the part both engines share: a single best configuration is asked
+    result = solve_couples_with_statistics(
+        random_employees(size, seed), solution_limit=1, time_limit=time_limit, engine=engine
+    )
+    return {
+        "size": size,
+        "engine": engine,
+        "wall_time": result["wall_time"],
+        "objective": result["objective"],
+        "couples": len(result["solutions"][0]) if result["solutions"] else 0,
+        "status": result["status"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the engines forming the couples")
+    parser.add_argument("--sizes", help="numbers of volunteers", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--engines", help="engines to compare", type=str, nargs="+", default=list(COUPLE_ENGINES))
+    parser.add_argument("--time_limit", help="time limit of the enumeration, in seconds", type=float, default=60)
+    parser.add_argument("--output", help="path of a json file to write the results to", type=str)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for engine in args.engines:
+            result = benchmark(size, engine, args.time_limit)
+            results.append(result)
+            print(
+                "{size:>5} volunteers {engine:<9} {wall_time:8.2f}s  objective {objective:>7}  "
+                "couples {couples:>5}  {status}".format(**result)
+            )
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(results, outfile, indent=2)
@@ -0,0 +1,125 @@
+"""
+Compare the solve time of the routing model when the distances and demands are evaluated by Python
+callbacks, as the solver used to do, or registered as native transit matrix and vector.
+    ```
+    $ python -m benchmarks.routing_transit --sizes 100 500 1000
+    ```
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+from ortools.constraint_solver import pywrapcp
+
+from src.domain.solver import (
+    MAX_VISIT_PER_DAY,
+    add_capacity_constraints,
+    create_data_model,
+    create_routing_model,
+    create_search_parameters,
+)
+
+PARIS_LATITUDES = (48.815, 48.902)
+PARIS_LONGITUDES = (2.255, 2.415)
+
+
+def random_points(count, rng):
+    return [
+        {
+            "address": "{} rue de Paris".format(i),
+            "postcode": 75000,
+            "point": {
+                "latitude": rng.uniform(*PARIS_LATITUDES),
+                "longitude": rng.uniform(*PARIS_LONGITUDES),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def random_data_model(size, seed=0):
+    """A feasible instance of `size` hotels, with just enough workers to visit them all"""
+    rng = random.Random(seed)
+    number_workers = int(math.ceil(size / (MAX_VISIT_PER_DAY - 1)))
+    return create_data_model(random_points(size, rng), random_points(number_workers, rng), from_raw_data=False)
+
+
+def create_routing_model_with_callbacks(data):
+    manager = pywrapcp.RoutingIndexManager(
+        data["num_locations"],
+        data["num_vehicles"],
+        data["start_locations"],
+        data["end_locations"],
+    )
+    routing = pywrapcp.RoutingModel(manager)
+    distances, demands = data["distances"], data["demands"]
+
+    def distance_callback(from_index, to_index):
+        return distances[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+    def demand_callback(from_index):
+        return demands[manager.IndexToNode(from_index)]
+
+    routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitCallback(distance_callback))
+    add_capacity_constraints(routing, data, routing.RegisterUnaryTransitCallback(demand_callback))
+    # The callbacks must outlive the search
+    return manager, routing, (distance_callback, demand_callback)
+
+
+def create_routing_model_with_matrices(data):
+    manager, routing = create_routing_model(data)
+    return manager, routing, ()
+
+
+ENGINES = {
+    "python_callbacks": create_routing_model_with_callbacks,
+    "transit_matrix": create_routing_model_with_matrices,
+}
+
+
+def benchmark(size, engine, time_limit, seed=0):
+    data = random_data_model(size, seed)
+
+    start = time.perf_counter()
+    manager, routing, _callbacks = ENGINES[engine](data)
+    build_time = time.perf_counter() - start
+
+    search_parameters = create_search_parameters(
+        "fast", time_limit=time_limit, local_search_metaheuristic="GREEDY_DESCENT"
+    )
+    start = time.perf_counter()
+    assignment = routing.SolveWithParameters(search_parameters)
+    solve_time = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "nodes": data["num_locations"],
+        "engine": engine,
+        "build_time": build_time,
+        "solve_time": solve_time,
+        "objective": assignment.ObjectiveValue() if assignment else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation of the routing transits")
+    parser.add_argument("--sizes", help="numbers of hotels", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--time_limit", help="time limit of each solve, in seconds", type=float, default=120)
+    parser.add_argument("--output", help="path of a json file to write the results to", type=str)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for engine in ENGINES:
+            result = benchmark(size, engine, args.time_limit)
+            results.append(result)
+            print(
+                "{size:>5} hotels ({nodes:>5} nodes) {engine:<16} "
+                "build {build_time:6.2f}s  solve {solve_time:7.2f}s  objective {objective}".format(**result)
+            )
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(results, outfile, indent=2)
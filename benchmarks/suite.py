@@ -0,0 +1,289 @@
+"""
+Benchmark the hot paths: building the distance matrix, forming the couples and solving the routes, on
+synthetic hotels and volunteers of the Paris area, at several scales.
+    ```
+    $ python -m benchmarks.suite --scale small --output before.json
+    $ python -m benchmarks.suite --scale small --output after.json --compare before.json
+    ```
+
+Each case runs in a fresh process, after its inputs are generated: the wall time only covers the measured
+call, and the peak memory is the peak resident size of that process, which also counts the memory of
+OR-Tools. The results are written as json, and compared to the ones of a previous commit with `--compare`:
+the command fails when a case got slower, heavier or worse than the tolerance allows.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from benchmarks.couples_engines import random_employees
+from benchmarks.routing_transit import random_points
+from src.domain.availability_model import AvailabilityIndex
+from src.domain.model_couple import create_couples, create_model, create_objective, exploration, match_couples, \
+    satisfaction
+from src.domain.solver import MAX_VISIT_PER_DAY, get_distances_matrix, solve_routes_with_statistics
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_TIME_LIMIT = 10  # seconds of each routing search and couples enumeration
+DEFAULT_TOLERANCE = 0.2  # relative increase of the wall time or memory reported as a regression
+# Increases below these floors are timer and allocator noise, whatever their relative size
+NOISE_FLOORS = {
+    "wall_time": 0.05,  # seconds
+    "peak_memory": 5,  # megabytes
+}
+
+Case = namedtuple("Case", ["generate", "run", "sense"])  # sense: whether the objective is minimised or maximised
+
+
+def random_instance(size, seed=0):
+    """`size` hotels, with just enough workers to visit them all"""
+    rng = random.Random(seed)
+    number_workers = int(math.ceil(size / (MAX_VISIT_PER_DAY - 1)))
+    return random_points(size, rng), random_points(number_workers, rng)
+
+
+def run_matrix(inputs, options):
+    hotels, workers = inputs
+    start = time.perf_counter()
+    distances, registry = get_distances_matrix(hotels, workers)
+    return {
+        "stages": {"distances": time.perf_counter() - start},
+        # Row by row, so that the total of a numpy matrix does not overflow its integer type
+        "quality": {"nodes": len(registry), "total_distance": sum(int(sum(row)) for row in distances)},
+    }
+
+
+def _couples_inputs(employees):
+    persons = [employee["name"] for employee in employees]
+    dispos_per_person = {employee["name"]: employee["availabilities"] for employee in employees}
+    sector_per_person = {employee["name"]: employee["sector"] for employee in employees}
+    return persons, dispos_per_person, sector_per_person
+
+
+def run_couples_cp_sat(employees, options):
+    persons, dispos_per_person, sector_per_person = _couples_inputs(employees)
+    stages = {}
+
+    start = time.perf_counter()
+    availabilities = AvailabilityIndex(persons, dispos_per_person)
+    list_of_couples = create_couples(persons, dispos_per_person, sector_per_person)
+    stages["create_couples"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model, couples, _, _ = create_model(persons, list_of_couples, dispos_per_person, sector_per_person,
+                                        availabilities)
+    objective = create_objective(list_of_couples, couples, availabilities)
+    stages["create_model"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, maximisation, hint = exploration(model, couples, objective)
+    stages["exploration"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, solutions = satisfaction(model, couples, objective, maximisation, hint, time_limit=options["time_limit"])
+    stages["satisfaction"] = time.perf_counter() - start
+
+    return {
+        "stages": stages,
+        "quality": {
+            "candidates": len(list_of_couples),
+            "objective": maximisation,
+            "couples": len(solutions[0]) if solutions else 0,
+            "configurations": len(solutions),
+            "status": status,
+        },
+    }
+
+
+def run_couples_matching(employees, options):
+    persons, dispos_per_person, sector_per_person = _couples_inputs(employees)
+    stages = {}
+
+    start = time.perf_counter()
+    availabilities = AvailabilityIndex(persons, dispos_per_person)
+    list_of_couples = create_couples(persons, dispos_per_person, sector_per_person)
+    stages["create_couples"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    maximisation, solution = match_couples(persons, list_of_couples, availabilities)
+    stages["matching"] = time.perf_counter() - start
+
+    return {
+        "stages": stages,
+        "quality": {"candidates": len(list_of_couples), "objective": maximisation, "couples": len(solution)},
+    }
+
+
+def run_routes(inputs, options):
+    hotels, workers = inputs
+    search = {"preset": "fast", "time_limit": options["time_limit"]}
+    result = solve_routes_with_statistics(hotels, workers, search=search)
+    return {
+        "stages": {"search": result["wall_time"]},
+        "quality": {"objective": result["objective"], "dropped": len(result["dropped"] or []),
+                    "status": result["status"]},
+    }
+
+
+CASES = {
+    "matrix": Case(random_instance, run_matrix, None),
+    "couples_cp_sat": Case(random_employees, run_couples_cp_sat, "max"),
+    "couples_matching": Case(random_employees, run_couples_matching, "max"),
+    "routes": Case(random_instance, run_routes, "min"),
+}
+# Sizes of each case, in hotels or volunteers
+SCALES = {
+    "small": {"matrix": [100, 500], "couples_cp_sat": [50, 100], "couples_matching": [100, 500], "routes": [50, 100]},
+    "medium": {"matrix": [1000, 2000], "couples_cp_sat": [200, 300], "couples_matching": [1000], "routes": [200, 500]},
+    "large": {"matrix": [5000], "couples_cp_sat": [500], "couples_matching": [2000], "routes": [1000]},
+}
+
+
+def _peak_memory():
+    """Peak resident size of the current process, in megabytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _measure(task):
+    case, size, seed, options = task
+    inputs = CASES[case].generate(size, seed)
+    baseline = _peak_memory()
+    start = time.perf_counter()
+    metrics = CASES[case].run(inputs, options)
+    wall_time = time.perf_counter() - start
+    peak = _peak_memory()
+    return dict(
+        metrics,
+        wall_time=wall_time,
+        peak_memory=peak,
+        memory_increase=peak - baseline if peak is not None else None,
+    )
+
+
+def benchmark(case, size, seed=0, time_limit=DEFAULT_TIME_LIMIT, repeat=1):
+    """
+    Args:
+        case (str): one of CASES
+        size (int): number of hotels or volunteers
+        seed (int): seed of the generated inputs
+        time_limit (float): seconds of the routing search and of the couples enumeration
+        repeat (int): number of runs, the fastest one is kept
+
+    Returns:
+        result (dict): {"case", "size", "seed", "wall_time": seconds, "peak_memory": megabytes,
+                        "memory_increase": megabytes over the inputs, "stages": seconds of each step,
+                        "quality": size and objective of the solution}
+    """
+    task = (case, size, seed, {"time_limit": time_limit})
+    runs = []
+    for _ in range(repeat):
+        # A fresh process for each run, so that the peak memory is the one of the run
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            runs.append(pool.apply(_measure, (task,)))
+    return dict(min(runs, key=lambda run: run["wall_time"]), case=case, size=size, seed=seed)
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from ortools import __version__ as ortools_version
+    except ImportError:
+        ortools_version = None
+    return {
+        "commit": commit,
+        "date": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "ortools": ortools_version,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def compare(results, previous_results, tolerance=DEFAULT_TOLERANCE):
+    """
+    Args:
+        results (list[dict]): as returned by `benchmark`
+        previous_results (list[dict]): the results of a previous run, e.g. of another commit
+        tolerance (float): relative increase of the wall time and of the peak memory that is accepted, the
+            increases below NOISE_FLOORS being always accepted
+
+    Returns:
+        regressions (list[str]): description of the cases that got slower, heavier or worse
+    """
+    previous_per_case = {(result["case"], result["size"], result["seed"]): result for result in previous_results}
+    regressions = []
+    for result in results:
+        previous = previous_per_case.get((result["case"], result["size"], result["seed"]))
+        if previous is None:
+            continue
+        name = "{case} {size}".format(**result)
+        for metric, floor in sorted(NOISE_FLOORS.items()):
+            if not result[metric] or not previous[metric] or result[metric] - previous[metric] < floor:
+                continue
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append("{}: {} {:.2f} -> {:.2f}".format(name, metric, previous[metric], result[metric]))
+
+        sense = CASES[result["case"]].sense
+        objective, previous_objective = result["quality"].get("objective"), previous["quality"].get("objective")
+        if sense and objective is not None and previous_objective is not None:
+            if (objective > previous_objective) if sense == "min" else (objective < previous_objective):
+                regressions.append("{}: objective {} -> {}".format(name, previous_objective, objective))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the distance matrix, the couples and the routes")
+    parser.add_argument("--scale", help="sizes of the cases", type=str, choices=sorted(SCALES), default="small")
+    parser.add_argument("--cases", help="cases to run", type=str, nargs="+", choices=sorted(CASES),
+                        default=sorted(CASES))
+    parser.add_argument("--sizes", help="sizes of all the cases, instead of the ones of the scale", type=int,
+                        nargs="+")
+    parser.add_argument("--seed", help="seed of the generated inputs", type=int, default=0)
+    parser.add_argument("--time_limit", help="time limit of the searches, in seconds", type=float,
+                        default=DEFAULT_TIME_LIMIT)
+    parser.add_argument("--repeat", help="runs of each case, the fastest one is kept", type=int, default=1)
+    parser.add_argument("--output", help="path of a json file to write the results to", type=str)
+    parser.add_argument("--compare", help="path of the json file of a previous run", type=str)
+    parser.add_argument("--tolerance", help="relative increase reported as a regression", type=float,
+                        default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = []
+    for case in args.cases:
+        for size in args.sizes or SCALES[args.scale][case]:
+            result = benchmark(case, size, args.seed, args.time_limit, args.repeat)
+            results.append(result)
+            print(
+                "{case:<16} {size:>5}  {wall_time:8.2f}s  {peak_memory:8.1f} MB (+{memory_increase:.1f})  "
+                "{quality}".format(**dict(result, peak_memory=result["peak_memory"] or 0,
+                                          memory_increase=result["memory_increase"] or 0))
+            )
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({"environment": environment(), "results": results}, outfile, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as infile:
+            regressions = compare(results, json.load(infile)["results"], args.tolerance)
+        for regression in regressions:
+            print("Regression of {}".format(regression))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,27 @@
+"""add listing indexes
+
+Revision ID: 3f1c9a2b7d45
+Revises: d26e47664481
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a2b7d45'
+down_revision = 'd26e47664481'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_person_name'), 'person', ['name'], unique=False)
+    op.create_index(op.f('ix_person_has_driving_license'), 'person', ['has_driving_license'], unique=False)
+    op.create_index(op.f('ix_visit_type'), 'visit', ['type'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_visit_type'), table_name='visit')
+    op.drop_index(op.f('ix_person_has_driving_license'), table_name='person')
+    op.drop_index(op.f('ix_person_name'), table_name='person')
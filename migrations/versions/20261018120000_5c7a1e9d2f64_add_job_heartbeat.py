@@ -0,0 +1,24 @@
+"""add job heartbeat
+
+Revision ID: 5c7a1e9d2f64
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c7a1e9d2f64'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('job', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('job', 'heartbeat_at')
@@ -0,0 +1,105 @@
+import collections.abc
+import csv
+import io
+import json
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+from flask import Response, jsonify, make_response, request, stream_with_context
+
+from src.repository.pagination import DEFAULT_PAGE_SIZE
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+CSV_MIMETYPE = 'text/csv'
+PAGE_PARAMETERS = ('after', 'limit', 'fields')
+
+
+def get_records() -> Union[dict, list, Iterator]:
+    """
+    Read the records sent in the body of the request: a JSON object, a JSON array,
+    or newline delimited JSON which is parsed lazily, line by line.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        return _parse_ndjson(request.stream)
+    return request.get_json()
+
+
+def is_batch(records) -> bool:
+    return isinstance(records, (list, collections.abc.Iterator))
+
+
+def get_page_parameters() -> Tuple[dict, dict]:
+    """
+    Read the listing parameters of the query string: `after` (cursor), `limit`, `fields` (comma separated),
+    every other parameter being a filter on the field of the same name.
+    """
+    arguments = request.args.to_dict()
+    errors = {}
+    parameters = {
+        'after': None,
+        'limit': DEFAULT_PAGE_SIZE,
+        'fields': arguments['fields'].split(',') if arguments.get('fields') else None,
+        'filters': {field: value for field, value in arguments.items() if field not in PAGE_PARAMETERS},
+    }
+    for name in ('after', 'limit'):
+        if arguments.get(name):
+            try:
+                parameters[name] = int(arguments[name])
+            except ValueError:
+                errors[name] = ['Not a valid integer.']
+    return parameters, errors
+
+
+def page_response(page: dict, status: int) -> Response:
+    """Respond with the items of the page, and a `Link` header to the next page if any"""
+    if status != 200:
+        return make_response(jsonify(page), status)
+
+    response = make_response(jsonify(page['items']), status)
+    if page['next_cursor'] is not None:
+        arguments = request.args.to_dict()
+        arguments['after'] = page['next_cursor']
+        response.headers['Link'] = '<{}?{}>; rel="next"'.format(request.base_url, urlencode(arguments))
+        response.headers['X-Next-Cursor'] = str(page['next_cursor'])
+    return response
+
+
+def export_mimetype() -> Optional[str]:
+    """The streaming format asked by the `Accept` header of the request, None for a plain JSON listing"""
+    mimetype = request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE, CSV_MIMETYPE])
+    return mimetype if mimetype in (NDJSON_MIMETYPE, CSV_MIMETYPE) else None
+
+
+def export_response(rows: Iterator, fields: List[str], mimetype: str) -> Response:
+    """Stream the rows as they are read from the database, one line per row"""
+    lines = _csv_lines(rows, fields) if mimetype == CSV_MIMETYPE else _ndjson_lines(rows)
+    return Response(stream_with_context(lines), mimetype=mimetype)
+
+
+def _ndjson_lines(rows: Iterator) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def _csv_lines(rows: Iterator, fields: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _parse_ndjson(stream) -> Iterator:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line.decode('utf-8'))
+        except ValueError:
+            yield line
@@ -1,8 +1,10 @@
 from typing import Optional
 
-from flask import make_response, jsonify, Blueprint, request
+from flask import make_response, jsonify, Blueprint
 from flask_cors import CORS
 
+from src.api.utils import get_records, is_batch, get_page_parameters, page_response, export_mimetype, \
+    export_response
 from src.database.schemas.hotel_schema import HotelSchema
 from src.logging.mixin import LoggingMixin
 from src.repository.hotel_repository import HotelRepository
@@ -18,17 +20,35 @@ hotels_repository = HotelRepository(hotel_schema)
 
 @hotel_blueprint.route('/', methods=['POST'])
 def create_hotel():
-    hotel_to_add = request.get_json()
+    hotel_to_add = get_records()
 
-    logger.debug('Inserting hotel: {}'.format(hotel_to_add))
-
-    message, status = hotels_repository.insert(hotel_to_add)
+    if is_batch(hotel_to_add):
+        message, status = hotels_repository.insert_many(hotel_to_add)
+    else:
+        logger.debug('Inserting hotel: {}'.format(hotel_to_add))
+        message, status = hotels_repository.insert(hotel_to_add)
     return make_response(jsonify(message), status)
 
 
 @hotel_blueprint.route('/', methods=['GET'], defaults={'hotel_id': None})
 @hotel_blueprint.route('/<int:hotel_id>', methods=['GET'])
 def hotels(hotel_id: Optional[int] = None):
+    if hotel_id is None:
+        parameters, errors = get_page_parameters()
+        if errors:
+            return make_response(jsonify(errors), 400)
+
+        mimetype = export_mimetype()
+        if mimetype:
+            rows, errors = hotels_repository.stream(parameters['after'], parameters['fields'], parameters['filters'])
+            if errors:
+                return make_response(jsonify(errors), 400)
+            assert rows is not None  # The rows are only missing along with errors
+            return export_response(rows, parameters['fields'] or list(hotel_schema.fields), mimetype)
+
+        page, status = hotels_repository.get_page(**parameters)
+        return page_response(page, status)
+
     queried_hotels, status = hotels_repository.get(hotel_id)
     return make_response(jsonify(queried_hotels), status)
 
@@ -0,0 +1,45 @@
+from flask import make_response, jsonify, Blueprint, request
+from flask_cors import CORS
+
+from src.database.schemas.job_schema import JobSchema, RoutesJobSchema, PlanningJobSchema, CouplesJobSchema
+from src.logging.mixin import LoggingMixin
+from src.repository.job_repository import JobRepository
+from src.services.job_runner import job_runner
+
+logger = LoggingMixin().logger
+
+job_blueprint = Blueprint('job_blueprint', __name__, url_prefix='/v1')
+CORS(job_blueprint)
+
+job_schema = JobSchema()
+jobs_repository = JobRepository(job_schema, job_runner)
+
+
+@job_blueprint.route('/routes', methods=['POST'])
+def create_routes_job():
+    job, status = jobs_repository.insert('routes', RoutesJobSchema(), request.get_json())
+    return make_response(jsonify(job), status)
+
+
+@job_blueprint.route('/planning', methods=['POST'])
+def create_planning_job():
+    job, status = jobs_repository.insert('planning', PlanningJobSchema(), request.get_json())
+    return make_response(jsonify(job), status)
+
+
+@job_blueprint.route('/couples', methods=['POST'])
+def create_couples_job():
+    job, status = jobs_repository.insert('couples', CouplesJobSchema(), request.get_json())
+    return make_response(jsonify(job), status)
+
+
+@job_blueprint.route('/jobs/<int:job_id>', methods=['GET'])
+def jobs(job_id: int):
+    job, status = jobs_repository.get(job_id)
+    return make_response(jsonify(job), status)
+
+
+@job_blueprint.route('/jobs/<int:job_id>', methods=['DELETE'])
+def cancel_job(job_id: int):
+    job, status = jobs_repository.cancel(job_id)
+    return make_response(jsonify(job), status)
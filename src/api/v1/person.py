@@ -1,8 +1,10 @@
 from typing import Optional
 
-from flask import make_response, jsonify, Blueprint, request
+from flask import make_response, jsonify, Blueprint
 from flask_cors import CORS
 
+from src.api.utils import get_records, is_batch, get_page_parameters, page_response, export_mimetype, \
+    export_response
 from src.database.schemas.person_schema import PersonSchema
 from src.logging.mixin import LoggingMixin
 from src.repository.person_repository import PersonRepository
@@ -19,14 +21,32 @@ persons_repository = PersonRepository(person_schema)
 @person_blueprint.route('/', methods=['GET'], defaults={'person_id': None})
 @person_blueprint.route('/<int:person_id>', methods=['GET'])
 def persons(person_id: Optional[str] = None):
+    if person_id is None:
+        parameters, errors = get_page_parameters()
+        if errors:
+            return make_response(jsonify(errors), 400)
+
+        mimetype = export_mimetype()
+        if mimetype:
+            rows, errors = persons_repository.stream(parameters['after'], parameters['fields'], parameters['filters'])
+            if errors:
+                return make_response(jsonify(errors), 400)
+            assert rows is not None  # The rows are only missing along with errors
+            return export_response(rows, parameters['fields'] or list(person_schema.fields), mimetype)
+
+        page, status = persons_repository.get_page(**parameters)
+        return page_response(page, status)
+
     queried_persons, status = persons_repository.get(person_id)
     return make_response(jsonify(queried_persons), status)
 
 
 @person_blueprint.route('/', methods=['POST'])
 def create_persons():
-    persons_to_add = request.get_json()
-    logger.debug('Received {} records to insert'.format(len(persons_to_add)))
+    persons_to_add = get_records()
 
-    message, status = persons_repository.insert(persons_to_add)
+    if is_batch(persons_to_add):
+        message, status = persons_repository.insert_many(persons_to_add)
+    else:
+        message, status = persons_repository.insert(persons_to_add)
     return make_response(jsonify(message), status)
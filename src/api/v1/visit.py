@@ -1,8 +1,10 @@
 from typing import Optional
 
-from flask import make_response, jsonify, Blueprint, request
+from flask import make_response, jsonify, Blueprint
 from flask_cors import CORS
 
+from src.api.utils import get_records, is_batch, get_page_parameters, page_response, export_mimetype, \
+    export_response
 from src.database.schemas.visit_schema import VisitSchema
 from src.logging.mixin import LoggingMixin
 from src.repository.visit_repository import VisitRepository
@@ -19,14 +21,32 @@ visits_repository = VisitRepository(visit_schema)
 @visit_blueprint.route('/', methods=['GET'], defaults={'visit_id': None})
 @visit_blueprint.route('/<int:visit_id>', methods=['GET'])
 def visits(visit_id: Optional[str] = None):
+    if visit_id is None:
+        parameters, errors = get_page_parameters()
+        if errors:
+            return make_response(jsonify(errors), 400)
+
+        mimetype = export_mimetype()
+        if mimetype:
+            rows, errors = visits_repository.stream(parameters['after'], parameters['fields'], parameters['filters'])
+            if errors:
+                return make_response(jsonify(errors), 400)
+            assert rows is not None  # The rows are only missing along with errors
+            return export_response(rows, parameters['fields'] or list(visit_schema.fields), mimetype)
+
+        page, status = visits_repository.get_page(**parameters)
+        return page_response(page, status)
+
     queried_visits, status = visits_repository.get(visit_id)
     return make_response(jsonify(queried_visits), status)
 
 
 @visit_blueprint.route('/', methods=['POST'])
 def create_visits():
-    visits_to_add = request.get_json()
-    logger.debug('Received {} records to insert'.format(len(visits_to_add)))
+    visits_to_add = get_records()
 
-    message, status = visits_repository.insert(visits_to_add)
+    if is_batch(visits_to_add):
+        message, status = visits_repository.insert_many(visits_to_add)
+    else:
+        message, status = visits_repository.insert(visits_to_add)
     return make_response(jsonify(message), status)
@@ -13,4 +13,6 @@ class Configuration(LoggingMixin):
             os.environ.get('POSTGRES_PORT'),
             os.environ.get('POSTGRES_DB'),
         )
+        self.job_workers = int(os.environ.get('JOB_WORKERS', 2))
+        self.job_timeout = int(os.environ.get('JOB_TIMEOUT', 600))
         self.logger.info('[DONE] Configuration')
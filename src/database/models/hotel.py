@@ -7,7 +7,7 @@ class Hotel(db.Model):
     __tablename__ = 'hotel'
 
     id = db.Column(Integer, primary_key=True, autoincrement=True)
-    nom = db.Column(String)
+    nom = db.Column(String, index=True)
     addresse = db.Column(String)
     ascenceur = db.Column(Boolean, default=False)
     capacite = db.Column(Integer)
@@ -0,0 +1,20 @@
+from sqlalchemy import Integer, String, Float, Text, DateTime
+
+from src.database.models import db
+
+
+class Job(db.Model):
+    __tablename__ = 'job'
+
+    id = db.Column(Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(String, nullable=False)
+    status = db.Column(String, nullable=False, default='pending', index=True)
+    progress = db.Column(Float, default=0.)
+    parameters = db.Column(Text)  # JSON
+    result = db.Column(Text)  # JSON
+    error = db.Column(String)
+    timeout = db.Column(Integer)  # seconds
+    created_at = db.Column(DateTime)
+    started_at = db.Column(DateTime)
+    finished_at = db.Column(DateTime)
+    heartbeat_at = db.Column(DateTime)  # last time the supervisor of the running job was seen alive
@@ -7,6 +7,6 @@ class Person(db.Model):
     __tablename__ = 'person'
 
     id = db.Column(Integer, primary_key=True, autoincrement=True)
-    name = db.Column(String)
+    name = db.Column(String, index=True)
     address = db.Column(String)
-    has_driving_license = db.Column(Boolean, default=False)
+    has_driving_license = db.Column(Boolean, default=False, index=True)
@@ -5,8 +5,8 @@ from src.database.models.hotel import Hotel
 
 class HotelSchema(Schema):
     id = fields.Integer(required=False, allow_none=False)
-    name = fields.String(required=True, allow_none=False)
-    address = fields.String(required=False, allow_none=True)
+    name = fields.String(attribute='nom', required=True, allow_none=False)
+    address = fields.String(attribute='addresse', required=False, allow_none=True)
 
     @post_load
     def make_hotel(self, hotel_data: dict) -> Hotel:
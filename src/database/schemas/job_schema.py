@@ -0,0 +1,80 @@
+import json
+
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+
+from src.domain.utils import COUPLE_ENGINES, FIRST_SOLUTION_STRATEGIES, LOCAL_SEARCH_METAHEURISTICS, SEARCH_PRESETS
+from src.services.distance_provider import HaversineProvider, PROVIDERS
+
+
+class JobSchema(Schema):
+    id = fields.Integer(dump_only=True)
+    kind = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
+    progress = fields.Float(dump_only=True)
+    result = fields.Method('load_result', dump_only=True)
+    error = fields.String(dump_only=True)
+    timeout = fields.Integer(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    started_at = fields.DateTime(dump_only=True)
+    finished_at = fields.DateTime(dump_only=True)
+
+    def load_result(self, job) -> object:
+        return json.loads(job.result) if job.result else None
+
+
+def validate_time_limit(time_limit: float) -> None:
+    # A time limit of 0 would remove the limit of the search
+    if not time_limit > 0:
+        raise ValidationError('Must be greater than 0.')
+
+
+class SearchSchema(Schema):
+    preset = fields.String(required=False, validate=validate.OneOf(sorted(SEARCH_PRESETS)))
+    time_limit = fields.Float(required=False, allow_none=True, validate=validate_time_limit)
+    solution_limit = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=1))
+    first_solution_strategy = fields.String(required=False, allow_none=True,
+                                            validate=validate.OneOf(FIRST_SOLUTION_STRATEGIES))
+    local_search_metaheuristic = fields.String(required=False, allow_none=True,
+                                               validate=validate.OneOf(LOCAL_SEARCH_METAHEURISTICS))
+
+
+class ConstraintsSchema(Schema):
+    max_distance = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=0))
+    drop_penalty = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=0))
+    speed = fields.Float(required=False, allow_none=True, validate=validate.Range(min=1))
+
+
+class RoutesJobSchema(Schema):
+    hotels = fields.List(fields.Dict(), required=True)
+    workers = fields.List(fields.Dict(), required=True)
+    search = fields.Nested(SearchSchema, required=False)
+    constraints = fields.Nested(ConstraintsSchema, required=False)
+    previous_routes = fields.List(fields.List(fields.String()), required=False)
+    workers_per_cluster = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=1))
+    neighbours = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=1))
+    distance_provider = fields.String(required=False, allow_none=True, validate=validate.OneOf(sorted(PROVIDERS)))
+    timeout = fields.Integer(required=False, allow_none=True)
+
+    @validates_schema
+    def validate_neighbours(self, data: dict) -> None:
+        if data.get('neighbours') and data.get('distance_provider') not in (None, HaversineProvider.name):
+            raise ValidationError('The nearest neighbours only support great-circle distances.', 'neighbours')
+
+
+class PlanningJobSchema(Schema):
+    hotels = fields.List(fields.Dict(), required=True)
+    workers = fields.List(fields.Dict(), required=True)
+    revisit_interval = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=1))
+    search = fields.Nested(SearchSchema, required=False)
+    constraints = fields.Nested(ConstraintsSchema, required=False)
+    distance_provider = fields.String(required=False, allow_none=True, validate=validate.OneOf(sorted(PROVIDERS)))
+    timeout = fields.Integer(required=False, allow_none=True)
+
+
+class CouplesJobSchema(Schema):
+    employees = fields.List(fields.Dict(), required=True)
+    solution_limit = fields.Integer(required=False, allow_none=True, validate=validate.Range(min=1))
+    time_limit = fields.Float(required=False, allow_none=True, validate=validate_time_limit)
+    engine = fields.String(required=False, validate=validate.OneOf(COUPLE_ENGINES))
+    require_driver = fields.Boolean(required=False)
+    timeout = fields.Integer(required=False, allow_none=True)
@@ -1,35 +1,153 @@
-from datetime import datetime
+"""
+Availabilities of the employees, as slots of half-days.
 
+A slot is the dense index of a half-day: `2 * day ordinal + half-day`, so that consecutive half-days
+have consecutive slots, in chronological order, whatever the sheet they come from.
+"""
+from datetime import date, datetime
+
+from src.domain.distance_matrix import np
 from src.services.csv_reader import parse_csv
 
+DATE_FORMAT = '%d/%m/%Y'
+MORNING = 0
+AFTERNOON = 1
+HALF_DAYS = {
+    'matin': (MORNING,),
+    'apres-midi': (AFTERNOON,),
+    'jour': (MORNING, AFTERNOON),
+}
+
+
+def slot_id(day, half_day):
+    return day.toordinal() * 2 + half_day
+
+
+def slot_half_day(slot):
+    """The date and half-day of a slot, the reverse of `slot_id`"""
+    return date.fromordinal(slot // 2), slot % 2
+
 
 def read_employees_file(filepath):
-    employees = parse_csv(filepath, 'people')
+    return read_employees_files([filepath])
+
 
-    grouped_employees = {}
-    for employee in employees:
+def read_employees_files(filepaths):
+    """
+    Read availability sheets in a single pass, see `group_employees`
+
+    Args:
+        filepaths (list[str]): the people csv files, e.g. the sheets of a season
+
+    Returns:
+        employees (list[dict])
+    """
+    return group_employees(
+        employee for filepath in filepaths for employee in parse_csv(filepath, 'people', stream=True)
+    )
+
+
+def group_employees(records):
+    """
+    Group the rows of each person into one employee holding all their availabilities
+
+    Args:
+        records (iterable[dict]): people records, with their 'availability' date and 'time_of_day'
+
+    Returns:
+        employees (list[dict]): the first record of each person, with the sorted slots of their 'availabilities'
+    """
+    employees = {}
+    names, dates, times_of_day = [], [], []
+    for employee in records:
         name_and_surname = '{} {}'.format(employee['name'].strip(), employee['surname'].strip())
-        new_availability = process_employee_availability(employee)
-        if name_and_surname not in grouped_employees:
-            grouped_employees[name_and_surname] = employee
-            grouped_employees[name_and_surname]['availabilities'] = new_availability
-        else:
-            new_availability = process_employee_availability(employee)
-            grouped_employees[name_and_surname]['availabilities'] += new_availability
+        employees.setdefault(name_and_surname, employee)
+        names.append(name_and_surname)
+        dates.append(employee['availability'])
+        times_of_day.append(employee['time_of_day'])
 
-    return grouped_employees.values()
+    slots_per_employee = {name_and_surname: set() for name_and_surname in employees}
+    for name_and_surname, slots in zip(names, encode_slots(dates, times_of_day)):
+        slots_per_employee[name_and_surname].update(slots)
+    for name_and_surname, employee in employees.items():
+        employee['availabilities'] = sorted(slots_per_employee[name_and_surname])
+    return list(employees.values())
 
 
 def process_employee_availability(employee):
-    availability = datetime.strptime(employee['availability'], '%d/%m/%Y')
-    time_of_day = employee['time_of_day']
-    if time_of_day.strip().lower() == 'jour':
-        morning, afternoon = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0), \
-                             '{}{}{}{}'.format(availability.year, availability.month, availability.day, 1)
-        return [int(morning), int(afternoon)]
-    elif time_of_day.strip().lower() == 'matin':
-        morning = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0)
-        return [int(morning)]
-    else:
-        afternoon = '{}{}{}{}'.format(availability.year, availability.month, availability.day, 0)
-        return [int(afternoon)]
+    return list(encode_slots([employee['availability']], [employee['time_of_day']])[0])
+
+
+def encode_slots(dates, times_of_day):
+    """
+    Encode columns of availabilities: each distinct date and time of day is only parsed once, the sheets of a
+    season repeating the same few hundred values over all their rows
+
+    Args:
+        dates (list[str]): dd/mm/yyyy
+        times_of_day (list[str]): 'matin', 'apres-midi' or 'jour'
+
+    Returns:
+        slots (list[tuple(int)]): the slots of each row
+    """
+    ordinals = {value: datetime.strptime(value.strip(), DATE_FORMAT).toordinal() for value in set(dates)}
+    half_days = {value: _half_days(value) for value in set(times_of_day)}
+    return [
+        tuple(2 * ordinals[day] + half_day for half_day in half_days[time_of_day])
+        for day, time_of_day in zip(dates, times_of_day)
+    ]
+
+
+def _half_days(time_of_day):
+    key = '-'.join(time_of_day.strip().lower().replace('\u00e8', 'e').split())
+    if key not in HALF_DAYS:
+        raise ValueError('Unknown time of day: {}'.format(time_of_day))
+    return HALF_DAYS[key]
+
+
+class AvailabilityIndex(object):
+    """
+    Availabilities of a group of persons, encoded as bitsets over the slots of the planning horizon.
+
+    The number of slots shared by every pair of persons is computed once, as a single product of the
+    person x slot matrix with its transpose when NumPy is available, from the bitsets otherwise.
+    """
+
+    def __init__(self, persons, dispos_per_person):
+        """
+        Args:
+            persons (list[str]):
+            dispos_per_person (dict[str: list[int]): slots in which each person is available
+        """
+        self.persons = list(persons)
+        self.slots = sorted({slot for person in self.persons for slot in dispos_per_person[person]})
+        self.slot_position = {slot: i for i, slot in enumerate(self.slots)}
+        self.person_position = {person: i for i, person in enumerate(self.persons)}
+        self.bitsets = [
+            sum(1 << self.slot_position[slot] for slot in set(dispos_per_person[person]))
+            for person in self.persons
+        ]
+        self.overlaps = self._overlap_matrix(dispos_per_person)
+
+    def _overlap_matrix(self, dispos_per_person):
+        if np is None:
+            return None
+        availabilities = np.zeros((len(self.persons), len(self.slots)), dtype=np.float32)
+        for i, person in enumerate(self.persons):
+            availabilities[i, [self.slot_position[slot] for slot in dispos_per_person[person]]] = 1
+        # Exact as long as the horizon has less than 2**24 slots
+        return (availabilities @ availabilities.T).astype(np.int32)
+
+    def bitset(self, person):
+        return self.bitsets[self.person_position[person]]
+
+    def overlap(self, p1, p2):
+        """Number of slots in which both persons are available"""
+        if self.overlaps is not None:
+            return int(self.overlaps[self.person_position[p1], self.person_position[p2]])
+        return bin(self.bitset(p1) & self.bitset(p2)).count('1')
+
+    def shared_slots(self, p1, p2):
+        """Slots in which both persons are available, in chronological order"""
+        shared = self.bitset(p1) & self.bitset(p2)
+        return [slot for position, slot in enumerate(self.slots) if shared >> position & 1]
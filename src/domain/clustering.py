@@ -0,0 +1,62 @@
+"""
+Decompose a large routing instance into independent geographic subproblems.
+
+Hotels and workers are swept by their bearing around the center of the hotels: the workers are
+split into groups of neighbours, and each group is given the angular sector of hotels facing it,
+sized by the number of visits the group can make in a day.
+"""
+import math
+
+from src.domain.node_registry import is_located
+
+
+def bearing(point, center):
+    """Angle of the point seen from the center, in radians, longitudes being scaled to the latitude of the center"""
+    return math.atan2(
+        point['latitude'] - center['latitude'],
+        (point['longitude'] - center['longitude']) * math.cos(math.radians(center['latitude'])),
+    )
+
+
+def sweep_clusters(hotels, workers, workers_per_cluster, visits_per_worker):
+    """
+    Args:
+        hotels (list[dict]): each dict has a 'point' {'latitude': float, 'longitude': float}
+        workers (list[dict]): same structure as the hotels, the point being the start of the worker
+        workers_per_cluster (int): number of workers of each cluster, the last ones may have less
+        visits_per_worker (int): number of hotels a worker can visit in a day
+
+    Returns:
+        clusters (list[tuple(list[int], list[int])]): the positions of the hotels and of the workers of each cluster.
+            Hotels and workers without point are left out.
+    """
+    located_hotels = [i for i, hotel in enumerate(hotels) if is_located(hotel)]
+    located_workers = [i for i, worker in enumerate(workers) if is_located(worker)]
+    if not located_workers or not located_hotels:
+        return [(located_hotels, located_workers)]
+
+    center = {
+        'latitude': sum(hotels[i]['point']['latitude'] for i in located_hotels) / len(located_hotels),
+        'longitude': sum(hotels[i]['point']['longitude'] for i in located_hotels) / len(located_hotels),
+    }
+    worker_bearings = {i: bearing(workers[i]['point'], center) for i in located_workers}
+    sorted_workers = sorted(located_workers, key=lambda i: worker_bearings[i])
+    # Start the sweep of the hotels halfway between the last and the first workers of the sweep
+    first, last = worker_bearings[sorted_workers[0]], worker_bearings[sorted_workers[-1]]
+    origin = last + ((first - last) % (2 * math.pi) or 2 * math.pi) / 2
+    sorted_hotels = sorted(located_hotels, key=lambda i: (bearing(hotels[i]['point'], center) - origin) % (2 * math.pi))
+
+    worker_groups = [
+        sorted_workers[start:start + workers_per_cluster]
+        for start in range(0, len(sorted_workers), max(1, workers_per_cluster))
+    ]
+    # Share the hotels in proportion of the capacity of each group
+    capacity = len(sorted_workers) * visits_per_worker
+    clusters = []
+    cumulated_capacity, start = 0, 0
+    for group in worker_groups:
+        cumulated_capacity += len(group) * visits_per_worker
+        stop = int(round(len(sorted_hotels) * cumulated_capacity / capacity))
+        clusters.append((sorted(sorted_hotels[start:stop]), sorted(group)))
+        start = stop
+    return clusters
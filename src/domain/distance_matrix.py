@@ -0,0 +1,160 @@
+"""
+Build the matrix of distances (in meters) between geographic points.
+
+The whole matrix is computed in one broadcasted NumPy expression, by blocks of rows so
+that the temporary arrays stay bounded. When NumPy is not available, a pure Python
+implementation computing the very same haversine formula is used instead.
+
+When the points barely change from one computation to the next, `update_haversine_matrix`
+reuses the distances already computed between the points that were kept.
+
+With NumPy, the matrices can be kept as contiguous int32 arrays (4 bytes per distance instead of a
+Python int in a list): 2,147 km at most, far beyond the size of a city.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+EARTH_RADIUS = 6371  # km
+ROWS_PER_CHUNK = 256  # Number of matrix rows computed at once by the NumPy engine
+DISTANCE_DTYPE = 'int32'  # Type of the distances stored in arrays
+
+
+def haversine_matrix(latitudes, longitudes, chunk_size=ROWS_PER_CHUNK, to_latitudes=None, to_longitudes=None,
+                     as_array=False):
+    """Compute the distance matrix between all the given points.
+
+    Args:
+        latitudes (list[float]): latitude of each point, in degrees
+        longitudes (list[float]): longitude of each point, in degrees
+        chunk_size (int): number of rows computed at once, bounds the memory used by the NumPy engine
+        to_latitudes (list[float]): latitude of the arrival points, the given points by default
+        to_longitudes (list[float]): longitude of the arrival points, the given points by default
+        as_array (bool): return an int32 array instead of lists, when NumPy is available
+
+    Returns:
+        distances (list[list[int]]): distances[i][j] is the distance in meters between point i and point j
+    """
+    if len(latitudes) != len(longitudes):
+        raise ValueError('Latitudes and longitudes must have the same length')
+    if (to_latitudes is None) != (to_longitudes is None) or \
+            (to_latitudes is not None and len(to_latitudes) != len(to_longitudes)):
+        raise ValueError('Latitudes and longitudes must have the same length')
+    if np is None:
+        return _python_haversine_matrix(latitudes, longitudes, to_latitudes, to_longitudes)
+    distances = _numpy_haversine_matrix(latitudes, longitudes, chunk_size, to_latitudes, to_longitudes)
+    return distances if as_array else distances.tolist()
+
+
+def update_haversine_matrix(latitudes, longitudes, previous_points, previous_distances, chunk_size=ROWS_PER_CHUNK,
+                            as_array=False):
+    """Compute the distance matrix between all the given points, reusing a matrix computed for other points.
+
+    Only the rows of the points missing from the previous matrix are computed, the other distances are copied.
+
+    Args:
+        latitudes (list[float]): latitude of each point, in degrees
+        longitudes (list[float]): longitude of each point, in degrees
+        previous_points (list[tuple(float, float)]): (latitude, longitude) of the points of the previous matrix
+        previous_distances (list[list[int]]|numpy.ndarray): the previous matrix
+        chunk_size (int): number of rows computed at once, bounds the memory used by the NumPy engine
+        as_array (bool): return an int32 array instead of lists, when NumPy is available
+
+    Returns:
+        distances (list[list[int]]): distances[i][j] is the distance in meters between point i and point j
+    """
+    if len(latitudes) != len(longitudes):
+        raise ValueError('Latitudes and longitudes must have the same length')
+    previous_positions = {tuple(point): i for i, point in enumerate(previous_points)}
+    kept, kept_previous, added = [], [], []
+    for i, point in enumerate(zip(latitudes, longitudes)):
+        if point in previous_positions:
+            kept.append(i)
+            kept_previous.append(previous_positions[point])
+        else:
+            added.append(i)
+
+    if np is None:
+        return _python_update_haversine_matrix(latitudes, longitudes, previous_distances, kept, kept_previous, added)
+
+    size = len(latitudes)
+    distances = np.empty((size, size), dtype=DISTANCE_DTYPE)
+    if kept:
+        previous_distances = np.asarray(previous_distances)
+        distances[np.ix_(kept, kept)] = previous_distances[np.ix_(kept_previous, kept_previous)]
+    if added:
+        # The matrix is symmetric: the columns of the added points are their rows
+        rows = _numpy_haversine_matrix([latitudes[i] for i in added], [longitudes[i] for i in added], chunk_size,
+                                       latitudes, longitudes)
+        distances[added, :] = rows
+        distances[:, added] = rows.T
+    return distances if as_array else distances.tolist()
+
+
+def _numpy_haversine_matrix(latitudes, longitudes, chunk_size, to_latitudes=None, to_longitudes=None):
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_latitudes = np.cos(latitudes)
+    if to_latitudes is None:
+        to_latitudes, to_longitudes, to_cos_latitudes = latitudes, longitudes, cos_latitudes
+    else:
+        to_latitudes = np.radians(np.asarray(to_latitudes, dtype=np.float64))
+        to_longitudes = np.radians(np.asarray(to_longitudes, dtype=np.float64))
+        to_cos_latitudes = np.cos(to_latitudes)
+    size = latitudes.shape[0]
+    chunk_size = max(1, int(chunk_size))
+
+    distances = np.empty((size, to_latitudes.shape[0]), dtype=DISTANCE_DTYPE)
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        half_latitude_distance = (to_latitudes[None, :] - latitudes[start:stop, None]) / 2
+        half_longitude_distance = (to_longitudes[None, :] - longitudes[start:stop, None]) / 2
+        a = (np.sin(half_latitude_distance) ** 2 +
+             cos_latitudes[start:stop, None] * to_cos_latitudes[None, :] * np.sin(half_longitude_distance) ** 2)
+        np.clip(a, 0, 1, out=a)
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        distances[start:stop] = np.rint(EARTH_RADIUS * c * 1000)
+    return distances
+
+
+def _python_haversine_matrix(latitudes, longitudes, to_latitudes=None, to_longitudes=None):
+    points = _python_points(latitudes, longitudes)
+    to_points = points if to_latitudes is None else _python_points(to_latitudes, to_longitudes)
+
+    distances = []
+    for departure_latitude, departure_longitude, departure_cos in points:
+        row = []
+        for arrival_latitude, arrival_longitude, arrival_cos in to_points:
+            a = (math.sin((arrival_latitude - departure_latitude) / 2) ** 2 +
+                 departure_cos * arrival_cos * math.sin((arrival_longitude - departure_longitude) / 2) ** 2)
+            a = min(max(a, 0), 1)
+            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+            row.append(int(round(EARTH_RADIUS * c * 1000)))
+        distances.append(row)
+    return distances
+
+
+def _python_points(latitudes, longitudes):
+    latitudes = [math.radians(float(latitude)) for latitude in latitudes]
+    longitudes = [math.radians(float(longitude)) for longitude in longitudes]
+    return list(zip(latitudes, longitudes, [math.cos(latitude) for latitude in latitudes]))
+
+
+def _python_update_haversine_matrix(latitudes, longitudes, previous_distances, kept, kept_previous, added):
+    size = len(latitudes)
+    distances = [[0] * size for _ in range(size)]
+    for i, previous_i in zip(kept, kept_previous):
+        previous_row = previous_distances[previous_i]
+        row = distances[i]
+        for j, previous_j in zip(kept, kept_previous):
+            row[j] = previous_row[previous_j]
+    rows = _python_haversine_matrix([latitudes[i] for i in added], [longitudes[i] for i in added],
+                                    latitudes, longitudes)
+    for i, row in zip(added, rows):
+        distances[i] = row
+        for j, distance in enumerate(row):
+            distances[j][i] = distance
+    return distances
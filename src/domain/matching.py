@@ -0,0 +1,412 @@
+"""
+Maximum weight matching in a general graph, with Edmonds' blossom algorithm.
+
+Each stage grows alternating trees from the unmatched vertices, shrinking the odd cycles (blossoms)
+it finds, until an augmenting path is found or the dual variables prove that the matching is optimal.
+The primal-dual method follows Galil, "Efficient algorithms for finding maximum matching in graphs"
+(1986), and runs in O(n³). With integer weights, all the computations are exact.
+"""
+
+
+def max_weight_matching(edges, max_cardinality=False):
+    """
+    Args:
+        edges (list[tuple(int, int, int)]): (i, j, weight) of each edge, vertices being numbered from 0
+        max_cardinality (bool): only consider the matchings of maximum cardinality
+
+    Returns:
+        mates (list[int]): the vertex matched with each vertex, -1 for the unmatched ones
+    """
+    if not edges:
+        return []
+    return _Matching(edges, max_cardinality).solve()
+
+
+class _Matching(object):
+    """State of the blossom algorithm.
+
+    Vertices are numbered from 0 to n - 1 and blossoms from n to 2n - 1. Each edge k has two endpoints:
+    2k is vertex i, 2k + 1 is vertex j. The labels are 0 (free), 1 (S, outer) and 2 (T, inner).
+    """
+
+    def __init__(self, edges, max_cardinality):
+        self.edges = edges
+        self.max_cardinality = max_cardinality
+        n = 1 + max(max(i, j) for i, j, _ in edges)
+        self.n = n
+        max_weight = max(0, max(weight for _, _, weight in edges))
+
+        self.endpoint = [edges[p // 2][p % 2] for p in range(2 * len(edges))]
+        # Endpoints at the other end of the edges of each vertex
+        self.neighbour_ends = [[] for _ in range(n)]
+        for k, (i, j, _) in enumerate(edges):
+            self.neighbour_ends[i].append(2 * k + 1)
+            self.neighbour_ends[j].append(2 * k)
+        # (remote endpoint, edge, remote vertex) of the edges of each vertex, as scanned by `grow_trees`
+        self.neighbours = [[(p, p // 2, self.endpoint[p]) for p in ends] for ends in self.neighbour_ends]
+
+        self.mate = [-1] * n  # Remote endpoint of the matched edge of each vertex
+        self.label = [0] * (2 * n)
+        self.label_end = [-1] * (2 * n)  # Endpoint through which each vertex or blossom got its label
+        self.in_blossom = list(range(n))  # Top level blossom of each vertex
+        self.blossom_parent = [-1] * (2 * n)
+        self.blossom_children = [None] * (2 * n)
+        self.blossom_base = list(range(n)) + [-1] * n
+        self.blossom_endpoints = [None] * (2 * n)  # Endpoints linking the children of each blossom
+        self.best_edge = [-1] * (2 * n)  # Least slack edge to a different S blossom
+        self.blossom_best_edges = [None] * (2 * n)
+        self.unused_blossoms = list(range(n, 2 * n))
+        self.dual = [max_weight] * n + [0] * n
+        self.allowed = [False] * len(edges)  # Edges of zero slack
+        self.queue = []
+
+    def slack(self, k):
+        i, j, weight = self.edges[k]
+        return self.dual[i] + self.dual[j] - 2 * weight
+
+    def leaves(self, b):
+        if b < self.n:
+            yield b
+            return
+        for child in self.blossom_children[b]:
+            if child < self.n:
+                yield child
+            else:
+                for v in self.leaves(child):
+                    yield v
+
+    def assign_label(self, w, label, p):
+        b = self.in_blossom[w]
+        self.label[w] = self.label[b] = label
+        self.label_end[w] = self.label_end[b] = p
+        self.best_edge[w] = self.best_edge[b] = -1
+        if label == 1:
+            self.queue.extend(self.leaves(b))
+        elif label == 2:
+            # The mate of the base of a T blossom is an S vertex
+            base = self.blossom_base[b]
+            self.assign_label(self.endpoint[self.mate[base]], 1, self.mate[base] ^ 1)
+
+    def scan_blossom(self, v, w):
+        """Trace back from v and w: the base of the new blossom if they meet, -1 for an augmenting path"""
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = self.in_blossom[v]
+            if self.label[b] & 4:
+                base = self.blossom_base[b]
+                break
+            path.append(b)
+            self.label[b] = 5
+            if self.label_end[b] == -1:
+                v = -1  # Root of the tree
+            else:
+                v = self.endpoint[self.label_end[b]]
+                b = self.in_blossom[v]
+                v = self.endpoint[self.label_end[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            self.label[b] = 1
+        return base
+
+    def add_blossom(self, base, k):
+        v, w, _ = self.edges[k]
+        bb = self.in_blossom[base]
+        bv = self.in_blossom[v]
+        bw = self.in_blossom[w]
+        b = self.unused_blossoms.pop()
+        self.blossom_base[b] = base
+        self.blossom_parent[b] = -1
+        self.blossom_parent[bb] = b
+        self.blossom_children[b] = path = []
+        self.blossom_endpoints[b] = endpoints = []
+        while bv != bb:
+            self.blossom_parent[bv] = b
+            path.append(bv)
+            endpoints.append(self.label_end[bv])
+            v = self.endpoint[self.label_end[bv]]
+            bv = self.in_blossom[v]
+        path.append(bb)
+        path.reverse()
+        endpoints.reverse()
+        endpoints.append(2 * k)
+        while bw != bb:
+            self.blossom_parent[bw] = b
+            path.append(bw)
+            endpoints.append(self.label_end[bw] ^ 1)
+            w = self.endpoint[self.label_end[bw]]
+            bw = self.in_blossom[w]
+
+        self.label[b] = 1
+        self.label_end[b] = self.label_end[bb]
+        self.dual[b] = 0
+        for v in self.leaves(b):
+            if self.label[self.in_blossom[v]] == 2:
+                # The former T vertices become S vertices
+                self.queue.append(v)
+            self.in_blossom[v] = b
+
+        # Least slack edges from the new blossom to each other S blossom
+        best_edge_to = [-1] * (2 * self.n)
+        for bv in path:
+            if self.blossom_best_edges[bv] is None:
+                edge_lists = [[p // 2 for p in self.neighbour_ends[v]] for v in self.leaves(bv)]
+            else:
+                edge_lists = [self.blossom_best_edges[bv]]
+            for edge_list in edge_lists:
+                for k in edge_list:
+                    i, j, _ = self.edges[k]
+                    if self.in_blossom[j] == b:
+                        i, j = j, i
+                    bj = self.in_blossom[j]
+                    if (bj != b and self.label[bj] == 1 and
+                            (best_edge_to[bj] == -1 or self.slack(k) < self.slack(best_edge_to[bj]))):
+                        best_edge_to[bj] = k
+            self.blossom_best_edges[bv] = None
+            self.best_edge[bv] = -1
+        self.blossom_best_edges[b] = [k for k in best_edge_to if k != -1]
+        self.best_edge[b] = -1
+        for k in self.blossom_best_edges[b]:
+            if self.best_edge[b] == -1 or self.slack(k) < self.slack(self.best_edge[b]):
+                self.best_edge[b] = k
+
+    def expand_blossom(self, b, end_stage):
+        for child in self.blossom_children[b]:
+            self.blossom_parent[child] = -1
+            if child < self.n:
+                self.in_blossom[child] = child
+            elif end_stage and self.dual[child] == 0:
+                self.expand_blossom(child, end_stage)
+            else:
+                for v in self.leaves(child):
+                    self.in_blossom[v] = child
+
+        if not end_stage and self.label[b] == 2:
+            # Relabel the children on the even length path from the entry child to the base
+            children = self.blossom_children[b]
+            entry_child = self.in_blossom[self.endpoint[self.label_end[b] ^ 1]]
+            j = children.index(entry_child)
+            if j & 1:
+                j -= len(children)
+                step, trick = 1, 0
+            else:
+                step, trick = -1, 1
+            p = self.label_end[b]
+            while j != 0:
+                self.label[self.endpoint[p ^ 1]] = 0
+                self.label[self.endpoint[self.blossom_endpoints[b][j - trick] ^ trick ^ 1]] = 0
+                self.assign_label(self.endpoint[p ^ 1], 2, p)
+                self.allowed[self.blossom_endpoints[b][j - trick] // 2] = True
+                j += step
+                p = self.blossom_endpoints[b][j - trick] ^ trick
+                self.allowed[p // 2] = True
+                j += step
+            bv = children[j]
+            self.label[self.endpoint[p ^ 1]] = self.label[bv] = 2
+            self.label_end[self.endpoint[p ^ 1]] = self.label_end[bv] = p
+            self.best_edge[bv] = -1
+            j += step
+            # The other children keep a T label only if one of their vertices was reached
+            while children[j] != entry_child:
+                bv = children[j]
+                if self.label[bv] == 1:
+                    j += step
+                    continue
+                reached = next((v for v in self.leaves(bv) if self.label[v] != 0), None)
+                if reached is not None:
+                    self.label[reached] = 0
+                    self.label[self.endpoint[self.mate[self.blossom_base[bv]]]] = 0
+                    self.assign_label(reached, 2, self.label_end[reached])
+                j += step
+
+        self.label[b] = self.label_end[b] = -1
+        self.blossom_children[b] = self.blossom_endpoints[b] = None
+        self.blossom_base[b] = -1
+        self.blossom_best_edges[b] = None
+        self.best_edge[b] = -1
+        self.unused_blossoms.append(b)
+
+    def augment_blossom(self, b, v):
+        """Swap the matched and unmatched edges of the path from v to the base of the blossom b"""
+        t = v
+        while self.blossom_parent[t] != b:
+            t = self.blossom_parent[t]
+        if t >= self.n:
+            self.augment_blossom(t, v)
+        i = j = self.blossom_children[b].index(t)
+        if i & 1:
+            j -= len(self.blossom_children[b])
+            step, trick = 1, 0
+        else:
+            step, trick = -1, 1
+        while j != 0:
+            j += step
+            t = self.blossom_children[b][j]
+            p = self.blossom_endpoints[b][j - trick] ^ trick
+            if t >= self.n:
+                self.augment_blossom(t, self.endpoint[p])
+            j += step
+            t = self.blossom_children[b][j]
+            if t >= self.n:
+                self.augment_blossom(t, self.endpoint[p ^ 1])
+            self.mate[self.endpoint[p]] = p ^ 1
+            self.mate[self.endpoint[p ^ 1]] = p
+        # v is the new base of the blossom
+        self.blossom_children[b] = self.blossom_children[b][i:] + self.blossom_children[b][:i]
+        self.blossom_endpoints[b] = self.blossom_endpoints[b][i:] + self.blossom_endpoints[b][:i]
+        self.blossom_base[b] = self.blossom_base[self.blossom_children[b][0]]
+
+    def augment_matching(self, k):
+        """Swap the matched and unmatched edges of the augmenting path through the edge k"""
+        v, w, _ = self.edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = self.in_blossom[s]
+                if bs >= self.n:
+                    self.augment_blossom(bs, s)
+                self.mate[s] = p
+                if self.label_end[bs] == -1:
+                    break  # Root of the tree
+                t = self.endpoint[self.label_end[bs]]
+                bt = self.in_blossom[t]
+                s = self.endpoint[self.label_end[bt]]
+                j = self.endpoint[self.label_end[bt] ^ 1]
+                if bt >= self.n:
+                    self.augment_blossom(bt, j)
+                self.mate[j] = self.label_end[bt]
+                p = self.label_end[bt] ^ 1
+
+    def solve(self):
+        n = self.n
+        for _ in range(n):
+            # Each stage augments the matching by one edge, or proves that it is optimal
+            self.label[:] = [0] * (2 * n)
+            self.best_edge[:] = [-1] * (2 * n)
+            self.blossom_best_edges[n:] = [None] * n
+            self.allowed[:] = [False] * len(self.edges)
+            self.queue[:] = []
+            for v in range(n):
+                if self.mate[v] == -1 and self.label[self.in_blossom[v]] == 0:
+                    self.assign_label(v, 1, -1)
+
+            augmented = False
+            while True:
+                augmented = self.grow_trees()
+                if augmented or self.update_duals():
+                    break
+            if not augmented:
+                break
+
+            # Expand the S blossoms of zero dual at the end of the stage
+            for b in range(n, 2 * n):
+                if (self.blossom_parent[b] == -1 and self.blossom_base[b] >= 0 and self.label[b] == 1 and
+                        self.dual[b] == 0):
+                    self.expand_blossom(b, True)
+
+        return [self.endpoint[p] if p >= 0 else -1 for p in self.mate]
+
+    def grow_trees(self):
+        """Scan the S vertices of the queue along the edges of zero slack
+
+        Returns:
+            augmented (bool): whether an augmenting path was found
+        """
+        # The lists are only modified in place: local names save the attribute lookups of this hot loop
+        queue, edges, dual, allowed = self.queue, self.edges, self.dual, self.allowed
+        label, in_blossom, best_edge = self.label, self.in_blossom, self.best_edge
+        while queue:
+            v = queue.pop()
+            bv = in_blossom[v]
+            dual_v = dual[v]
+            for p, k, w in self.neighbours[v]:
+                bw = in_blossom[w]
+                if bv == bw:
+                    continue
+                if not allowed[k]:
+                    k_slack = dual_v + dual[w] - 2 * edges[k][2]
+                    if k_slack <= 0:
+                        allowed[k] = True
+                if allowed[k]:
+                    if label[bw] == 0:
+                        self.assign_label(w, 2, p ^ 1)
+                    elif label[bw] == 1:
+                        base = self.scan_blossom(v, w)
+                        if base >= 0:
+                            self.add_blossom(base, k)
+                            # v may now be in the new blossom
+                            bv = in_blossom[v]
+                        else:
+                            self.augment_matching(k)
+                            return True
+                    elif label[w] == 0:
+                        # w is in a T blossom but was not reached yet
+                        label[w] = 2
+                        self.label_end[w] = p ^ 1
+                elif label[bw] == 1:
+                    if best_edge[bv] == -1 or k_slack < self.slack(best_edge[bv]):
+                        best_edge[bv] = k
+                elif label[w] == 0:
+                    if best_edge[w] == -1 or k_slack < self.slack(best_edge[w]):
+                        best_edge[w] = k
+        return False
+
+    def update_duals(self):
+        """Change the dual variables by the largest amount keeping them feasible
+
+        Returns:
+            optimal (bool): whether the matching is optimal, which ends the search
+        """
+        n = self.n
+        delta_type, delta, delta_edge, delta_blossom = -1, None, None, None
+        if not self.max_cardinality:
+            # The duals of the S vertices reach zero
+            delta_type, delta = 1, min(self.dual[:n])
+        for v in range(n):
+            # An edge from a free vertex to an S vertex gets a zero slack
+            if self.label[self.in_blossom[v]] == 0 and self.best_edge[v] != -1:
+                d = self.slack(self.best_edge[v])
+                if delta_type == -1 or d < delta:
+                    delta_type, delta, delta_edge = 2, d, self.best_edge[v]
+        for b in range(2 * n):
+            # An edge between two S blossoms gets a zero slack
+            if self.blossom_parent[b] == -1 and self.label[b] == 1 and self.best_edge[b] != -1:
+                d = self.slack(self.best_edge[b]) // 2
+                if delta_type == -1 or d < delta:
+                    delta_type, delta, delta_edge = 3, d, self.best_edge[b]
+        for b in range(n, 2 * n):
+            # The dual of a T blossom reaches zero
+            if (self.blossom_base[b] >= 0 and self.blossom_parent[b] == -1 and self.label[b] == 2 and
+                    (delta_type == -1 or self.dual[b] < delta)):
+                delta_type, delta, delta_blossom = 4, self.dual[b], b
+        if delta_type == -1:
+            # Maximum cardinality reached: a last update makes the duals optimal
+            delta_type, delta = 1, max(0, min(self.dual[:n]))
+
+        for v in range(n):
+            if self.label[self.in_blossom[v]] == 1:
+                self.dual[v] -= delta
+            elif self.label[self.in_blossom[v]] == 2:
+                self.dual[v] += delta
+        for b in range(n, 2 * n):
+            if self.blossom_base[b] >= 0 and self.blossom_parent[b] == -1:
+                if self.label[b] == 1:
+                    self.dual[b] += delta
+                elif self.label[b] == 2:
+                    self.dual[b] -= delta
+
+        if delta_type == 1:
+            return True
+        if delta_type == 2:
+            self.allowed[delta_edge] = True
+            i, j, _ = self.edges[delta_edge]
+            if self.label[self.in_blossom[i]] == 0:
+                i, j = j, i
+            self.queue.append(i)
+        elif delta_type == 3:
+            self.allowed[delta_edge] = True
+            i, j, _ = self.edges[delta_edge]
+            self.queue.append(i)
+        else:
+            self.expand_blossom(delta_blossom, False)
+        return False
@@ -0,0 +1,111 @@
+"""
+Persist the distance matrices as .npy files, to load them again without computing nor copying them.
+
+Each matrix is keyed by a hash of its points, in order. The daily solves over the same hotels and
+workers find their matrix and memory-map it. When points were added or removed, the cached matrix
+sharing the most points is updated: only the rows of the new points are computed.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from src.domain.distance_matrix import DISTANCE_DTYPE, haversine_matrix, update_haversine_matrix
+
+DEFAULT_MAX_ENTRIES = 16  # Number of matrices kept on disk
+COORDINATES_DECIMALS = 7  # About one centimeter
+
+
+class MatrixCache(object):
+    """Directory of int32 distance matrices, the least recently used ones being removed beyond `max_entries`"""
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(points):
+        points = np.round(np.asarray(points, dtype=np.float64).reshape(-1, 2), COORDINATES_DECIMALS)
+        return hashlib.sha1(points.tobytes()).hexdigest()
+
+    def get(self, latitudes, longitudes):
+        """
+        Args:
+            latitudes (list[float]): latitude of each point, in degrees
+            longitudes (list[float]): longitude of each point, in degrees
+
+        Returns:
+            distances (numpy.memmap): read only int32 matrix, distances[i][j] is the distance in meters
+                between point i and point j
+        """
+        points = list(zip(latitudes, longitudes))
+        distances = self.load(points)
+        if distances is not None:
+            return distances
+
+        base = self.nearest(points)
+        if base is None:
+            distances = haversine_matrix(latitudes, longitudes, as_array=True)
+        else:
+            base_points, base_distances = base
+            distances = update_haversine_matrix(latitudes, longitudes, base_points, base_distances, as_array=True)
+        self.store(points, distances)
+        return self.load(points)
+
+    def load(self, points):
+        path = self._path(self.key(points))
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # Most recently used
+        return np.load(path, mmap_mode='r')
+
+    def store(self, points, distances):
+        key = self.key(points)
+        self._save(self._path(key, 'points'), np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        self._save(self._path(key), np.asarray(distances, dtype=DISTANCE_DTYPE))
+        self._evict()
+
+    def nearest(self, points):
+        """The cached matrix sharing the most points with the given ones, if any
+
+        Returns:
+            points (list[tuple(float, float)]), distances (numpy.memmap)
+        """
+        wanted = {tuple(point) for point in points}
+        best, best_shared = None, 0
+        for key in self._keys():
+            cached_points = [tuple(point) for point in np.load(self._path(key, 'points')).tolist()]
+            shared = len(wanted.intersection(cached_points))
+            if shared > best_shared:
+                best, best_shared = (cached_points, key), shared
+        if best is None:
+            return None
+        cached_points, key = best
+        return cached_points, np.load(self._path(key), mmap_mode='r')
+
+    def _keys(self):
+        return [
+            name[:-len('.npy')] for name in os.listdir(self.directory)
+            if name.endswith('.npy') and not name.endswith('.points.npy')
+            and os.path.exists(self._path(name[:-len('.npy')], 'points'))
+        ]
+
+    def _path(self, key, suffix=None):
+        name = '{}.{}.npy'.format(key, suffix) if suffix else '{}.npy'.format(key)
+        return os.path.join(self.directory, name)
+
+    def _save(self, path, array):
+        # Write aside then rename, so that a concurrent solve never maps a partial file
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as f:
+            np.save(f, array)
+        os.replace(temporary_path, path)
+
+    def _evict(self):
+        keys = sorted(self._keys(), key=lambda key: os.path.getmtime(self._path(key)), reverse=True)
+        for key in keys[self.max_entries:]:
+            for path in (self._path(key), self._path(key, 'points')):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -1,223 +1,335 @@
+import time
+
 from ortools.sat.python import cp_model
 
-from src.domain.utils import SolverStatus
+from src.domain.availability_model import AvailabilityIndex
+from src.domain.matching import max_weight_matching
+from src.domain.utils import COUPLE_ENGINES, DEFAULT_COUPLE_ENGINE, SolverStatus
 
-RESULTS_COUNT_LIMIT = 10
+RESULTS_COUNT_LIMIT = 10  # Number of optimal configurations enumerated at most
+ENUMERATION_TIME_LIMIT = 30  # seconds spent enumerating the optimal configurations
+SEARCH_WORKERS = 8  # Number of CP-SAT workers searching the best configuration in parallel
+EXPLORATION_PROGRESS = 0.5  # Progress of the search once the best configuration is found, before the enumeration
 
 
-def create_couples(persons):
+def create_couples(persons, dispos_per_person, sector_per_person):
     """
-    Create a list of couples without duplicate
+    Create the list of compatible couples, without duplicate: two persons are compatible if they share at least
+    one sector and one disponibility.
+
+    Persons are bucketed by (disponibility, sector) so that only the pairs sharing a bucket are considered.
 
     Args:
         persons (list[str]):
+        dispos_per_person (dict[str: list[int]):
+        sector_per_person (dict[str: int]): bitmask of the sectors of each person
 
     Returns:
-        list[set(str)]
+        list[tuple(str, str)]
     """
-    list_of_couples = []
-    for p1 in persons:
-        for p2 in persons:
-            couple = {p1, p2}
-            if couple not in list_of_couples:
-                list_of_couples += [couple]
-    return list_of_couples
-
-
-def create_model(persons, list_of_couples, dispos_per_person, sector_per_person):
+    position = {person: i for i, person in enumerate(persons)}
+    buckets = {}
+    for person in persons:
+        sectors = sector_per_person[person]
+        sector_bits = [bit for bit in range(sectors.bit_length()) if sectors >> bit & 1]
+        for dispo in set(dispos_per_person[person]):
+            for bit in sector_bits:
+                buckets.setdefault((dispo, bit), []).append(person)
+
+    list_of_couples = set()
+    for bucket in buckets.values():
+        for i, p1 in enumerate(bucket):
+            for p2 in bucket[i + 1:]:
+                list_of_couples.add((p1, p2) if position[p1] < position[p2] else (p2, p1))
+    return sorted(list_of_couples, key=lambda couple: (position[couple[0]], position[couple[1]]))
+
+
+def create_model(persons, list_of_couples, dispos_per_person, sector_per_person, availabilities=None):
     """
-    Build the model
+    Build the model, with one variable per compatible couple
 
     Args:
         persons (list[str]):
-        list_of_couples (list[set(str)]):
+        list_of_couples (list[tuple(str, str)]): compatible couples, as returned by `create_couples`
         dispos_per_person (dict[str: list[int]):
         sector_per_person (dict[str: int]):
+        availabilities (AvailabilityIndex): encoded disponibilities, built from `dispos_per_person` when not given
 
     Returns:
         model (CpModel),
         couples (dict[int: NewBoolVar]),
         dispos_per_couple (dict[int: list[int]]):
+        sector_per_couple (dict[int: int]):
     """
 
+    if availabilities is None:
+        availabilities = AvailabilityIndex(persons, dispos_per_person)
     model = cp_model.CpModel()
 
     couples = {}
     dispos_per_couple = {}
     sector_per_couple = {}
-    for i, couple in enumerate(list_of_couples):
-        if len(couple) == 2:
-            p1, p2 = couple
-            couples[i] = model.NewBoolVar('{}_coupled_with_{}'.format(p1, p2))
-            dispos_p1 = dispos_per_person[p1]
-            dispos_p2 = dispos_per_person[p2]
-            dispos_per_couple[i] = [d_p1 for d_p1 in dispos_p1 for d_p2 in dispos_p2 if d_p1 == d_p2]
-            sector_per_couple[i] = ((sector_per_person[p1] & sector_per_person[p2]) != 0)
-
-        # A person cannot be coupled with itself
-        if len(couple) == 1:
-            couples[i] = model.NewBoolVar('{}_coupled_alone'.format(couple))
-            dispos_per_couple[i] = []
-            model.Add(couples[i] == False)
-            sector_per_couple[i] = False
-
-    # Define couples: 1 person linked to one other exactly
+    couples_per_person = {person: [] for person in persons}
+    for i, (p1, p2) in enumerate(list_of_couples):
+        couples[i] = model.NewBoolVar('{}_coupled_with_{}'.format(p1, p2))
+        dispos_per_couple[i] = availabilities.shared_slots(p1, p2)
+        sector_per_couple[i] = sector_per_person[p1] & sector_per_person[p2]
+        couples_per_person[p1].append(couples[i])
+        couples_per_person[p2].append(couples[i])
+
+    # Define couples: 1 person linked to one other at most
     for p1 in persons:
-        model.Add(sum(couples[i] for i, couple in enumerate(list_of_couples) if p1 in couple) <= 1)
-
-    for i in range(len(list_of_couples)):
-        # If no sector in common or no disponibility in common, the couple cannot happen
-        if sector_per_couple[i] is False or len(dispos_per_couple[i]) == 0:
-            model.Add(couples[i] == False)
+        if len(couples_per_person[p1]) > 1:
+            model.Add(sum(couples_per_person[p1]) <= 1)
 
     return model, couples, dispos_per_couple, sector_per_couple
 
 
-def exploration(persons, dispos_per_person, sector_per_person):
+def couple_weights(list_of_couples, availabilities):
     """
-    First iteration of the solver, that find the cost of the best configuration possible
+    Value of each couple: forming a couple is worth more than any number of shared disponibilities, then couples
+    sharing more disponibilities are preferred
 
     Args:
-        persons (list[str]):
-        dispos_per_person (dict[str: list[int]):
-        sector_per_person (dict[str: int]):
+        list_of_couples (list[tuple(str, str)]):
+        availabilities (AvailabilityIndex):
 
     Returns:
-        status (str),
-        assignments(dict[tuple(str,str): list[int]),
-        maximisation (int):
+        weights (list[int]): the value of each couple
     """
-    list_of_couples = create_couples(persons)
-    model, couples, dispos_per_couples, sector_per_couples = create_model(persons,
-                                                                          list_of_couples,
-                                                                          dispos_per_person,
-                                                                          sector_per_person)
+    overlaps = [availabilities.overlap(p1, p2) for p1, p2 in list_of_couples]
+    max_dispo = max(overlaps, default=0)
+    return [max_dispo + overlap for overlap in overlaps]
 
-    # model.Maximize(sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)))
 
-    max_dispo = max(len(dispos_per_couples[i]) for i in range(len(list_of_couples)))
-    model.Maximize(sum(max_dispo*couples[i] for i, couple in enumerate(list_of_couples))
-                   + sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)))
-
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
-    status = solver.StatusName(status)
-
-    if SolverStatus.success(status):
-        satisfaction_assignment = save_solutions(solver, list_of_couples, couples, dispos_per_couples, sector_per_person)
-        return status, satisfaction_assignment, solver.ObjectiveValue()
+def create_objective(list_of_couples, couples, availabilities):
+    """
+    Value of a configuration, the sum of the values of its couples
 
-    else:
-        print('Cannot find couples :\'(')
-        return status, {}, 0
+    Args:
+        list_of_couples (list[tuple(str, str)]):
+        couples (dict[int: NewBoolVar]):
+        availabilities (AvailabilityIndex):
 
+    Returns:
+        objective (LinearExpr):
+    """
+    weights = couple_weights(list_of_couples, availabilities)
+    return sum(weights[i] * couples[i] for i in range(len(list_of_couples)))
 
-class VarArrayAndObjectiveSolutionPrinter(cp_model.CpSolverSolutionCallback):
-    """Print and save solutions."""
 
-    def __init__(self, variables, list_of_couples, dispos_per_couples, sector_per_person):
-        cp_model.CpSolverSolutionCallback.__init__(self)
-        self.__variables = variables
-        self.__solution_count = 0
-        self.__solution_limit = int(RESULTS_COUNT_LIMIT)
-        self.solutions = []
-        self.list_of_couples = list_of_couples
-        self.dispos_per_couples = dispos_per_couples
-        self.sector_per_person = sector_per_person
-
-    def save_solutions(self, solution):
-        print('Solution {}'.format(self.__solution_count))
-        assignments = save_solutions(self, self.list_of_couples, solution, self.dispos_per_couples, self.sector_per_person)
-        self.solutions.append(assignments)
+def match_couples(persons, list_of_couples, availabilities):
+    """
+    Find a best configuration as a maximum weight matching of the graph of compatible persons, with the blossom
+    algorithm
 
-    def NewSolution(self):
-        self.__solution_count += 1
-        self.save_solutions(self.__variables)
-        # if self.__solution_count >= self.__solution_limit:
-        #     self.StopSearch() # TODO implemetn
+    Args:
+        persons (list[str]):
+        list_of_couples (list[tuple(str, str)]):
+        availabilities (AvailabilityIndex):
 
-    def solution_count(self):
-        return self.__solution_count
+    Returns:
+        maximisation (int): value of the best configuration,
+        solution (list[int]): indices of the couples formed
+    """
+    position = {person: i for i, person in enumerate(persons)}
+    weights = couple_weights(list_of_couples, availabilities)
+    edges = [(position[p1], position[p2], weight) for (p1, p2), weight in zip(list_of_couples, weights)]
+    mates = max_weight_matching(edges)
+    solution = [k for k, (i, j, _) in enumerate(edges) if mates[i] == j]
+    # Two compatible persons have a single couple, so that each matched pair gives one index
+    return sum(weights[k] for k in solution), solution
 
 
-def satisfaction(persons, dispos_per_person, sector_per_person, maximisation):
+def exploration(model, couples, objective, search_workers=SEARCH_WORKERS):
     """
-    Second iteration of the solver, that finds all configurations of couple, respecting the given maximisation cost
+    First iteration of the solver, that find the cost of the best configuration possible
 
     Args:
-        persons (list[str]):
-        dispos_per_person (dict[str: list[int]):
-        sector_per_person (dict[str: int]):
-        maximisation (int):
+        model (CpModel):
+        couples (dict[int: NewBoolVar]):
+        objective (LinearExpr): as returned by `create_objective`
+        search_workers (int): number of workers searching in parallel
 
     Returns:
         status (str),
-        assignments (list[dict[tuple(str,str): list[int]]]])
+        maximisation (int),
+        hint (dict[int: int]): value of each couple variable in the best configuration found
     """
-    list_of_couples = create_couples(persons)
-    model, couples, dispos_per_couples, sector_per_couples = create_model(persons, list_of_couples, dispos_per_person, sector_per_person)
+    if not couples:  # Nobody can be coupled, the empty configuration is the best one
+        return SolverStatus.OPTIMAL, 0, {}
+    model.Maximize(objective)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = search_workers
+    status = solver.StatusName(solver.Solve(model))
+
+    if not SolverStatus.success(status):
+        return status, 0, {}
+    return status, int(solver.ObjectiveValue()), {i: solver.Value(variable) for i, variable in couples.items()}
+
 
-    # model.Add(sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)) == int(maximisation))
+class SolutionCollector(cp_model.CpSolverSolutionCallback):
+    """Record the couples formed in each solution, and stop the search once enough solutions are found"""
+
+    def __init__(self, couples, solution_limit, progress=None):
+        cp_model.CpSolverSolutionCallback.__init__(self)
+        self.__couples = couples
+        self.__solution_limit = solution_limit
+        self.__progress = progress
+        self.solutions = []
+
+    def on_solution_callback(self):
+        self.solutions.append([i for i, variable in self.__couples.items() if self.Value(variable)])
+        if self.__progress and self.__solution_limit:
+            self.__progress(min(1., len(self.solutions) / self.__solution_limit))
+        if self.__solution_limit and len(self.solutions) >= self.__solution_limit:
+            self.StopSearch()
+
+
+def satisfaction(model, couples, objective, maximisation, hint=None, solution_limit=RESULTS_COUNT_LIMIT,
+                 time_limit=ENUMERATION_TIME_LIMIT, progress=None):
+    """
+    Second iteration of the solver, that enumerates the configurations of couple respecting the given maximisation
+    cost. The model of the exploration is reused: its objective is turned into a constraint.
 
-    max_dispo = max(len(dispos_per_couples[i]) for i in range(len(list_of_couples)))
-    model.Add(sum(max_dispo*couples[i] for i, couple in enumerate(list_of_couples))
-             + sum(len(dispos_per_couples[i])*couples[i] for i, couple in enumerate(list_of_couples)) == int(maximisation))
+    Args:
+        model (CpModel): the model of the exploration
+        couples (dict[int: NewBoolVar]):
+        objective (LinearExpr):
+        maximisation (int): as returned by `exploration`
+        hint (dict[int: int]): a configuration reaching the maximisation, the search starts from it
+        solution_limit (int): number of configurations enumerated at most, None for all of them
+        time_limit (float): seconds spent enumerating at most, None for no limit
+        progress (callable): called with the fraction of `solution_limit` enumerated, after each configuration
 
-    solution_printer = VarArrayAndObjectiveSolutionPrinter(couples,
-                                                           list_of_couples,
-                                                           dispos_per_couples,
-                                                           sector_per_person)
+    Returns:
+        status (str): OPTIMAL when all the configurations were enumerated,
+        solutions (list[list[int]]): indices of the couples formed in each configuration
+    """
+    if not couples:
+        return SolverStatus.OPTIMAL, [[]]
+    _clear_objective(model)
+    model.Add(objective == int(maximisation))
+    for i, value in (hint or {}).items():
+        model.AddHint(couples[i], value)
+
+    solution_collector = SolutionCollector(couples, solution_limit, progress)
     solver = cp_model.CpSolver()
+    solver.parameters.enumerate_all_solutions = True
+    solver.parameters.num_search_workers = 1  # Enumeration is sequential
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+
+    status = solver.StatusName(solver.Solve(model, solution_collector))
+    return status, solution_collector.solutions
 
-    status = solver.SearchForAllSolutions(model, solution_printer)
-    status = solver.StatusName(status)
 
-    assignements = []
-    if status not in ['INFEASIBLE', 'MODEL_INVALID', 'UNKNOWN']:
-        assignements = solution_printer.solutions
-    return status, assignements
+def _clear_objective(model):
+    if hasattr(model, 'ClearObjective'):
+        model.ClearObjective()
+    else:
+        model.Proto().ClearField('objective')
 
 
-def save_solutions(solver, list_of_couples, couples, dispos_per_couples, sector_per_person):
+def save_solutions(solution, list_of_couples, dispos_per_couples, sector_per_couples):
     """
-    Print and Save solutions
+    Format a configuration of couples
 
     Args:
-        solver (CpModel):
-        list_of_couples (list[set(str)]):
-        couples (couples (dict[int: NewBoolVar])):
-        dispos_per_person (dict[str: list[int]):
-        sector_per_person
+        solution (list[int]): indices of the couples formed
+        list_of_couples (list[tuple(str, str)]):
+        dispos_per_couples (dict[int: list[int]]):
+        sector_per_couples (dict[int: int]):
 
     Returns:
-        assignments (list[dict[tuple(str,str): list[int]]]])
+        assignments (dict[tuple(str,str): tuple(list[int], int)])
     """
+    return {tuple(list_of_couples[i]): (dispos_per_couples[i], sector_per_couples[i]) for i in solution}
 
-    assigments = {}
-    assigned_couples = [(i, couple) for i, couple in enumerate(list_of_couples) if solver.Value(couples[i])]
 
-    for i, couple in assigned_couples:
-        p1, p2 = couple
-        sector = sector_per_person[p1] & sector_per_person[p2]
-        assigments[tuple(couple)] = (dispos_per_couples[i], sector)
-        print('{} assigned to {} with dispo {} and sector {}'.format(p1, p2, dispos_per_couples[i], sector))
-    return assigments
+def solve_couples_with_statistics(employees, solution_limit=RESULTS_COUNT_LIMIT, time_limit=ENUMERATION_TIME_LIMIT,
+                                  search_workers=SEARCH_WORKERS, engine=DEFAULT_COUPLE_ENGINE, require_driver=False,
+                                  progress=None):
+    """
+    Find the best configurations of couples
 
+    Args:
+        employees (list[dict]): {'name': str, 'availabilities': list[int], 'sector': int,
+                                 'has_driving_license': bool, optional}
+        solution_limit (int): number of best configurations returned at most, None for all of them
+        time_limit (float): seconds spent enumerating the best configurations, None for no limit
+        search_workers (int): number of workers searching the best configuration in parallel
+        engine (str): one of COUPLE_ENGINES, `matching` returns a single best configuration
+        require_driver (bool): only form the couples having at least one driving license
+        progress (callable): called with the fraction of the search done, once the best configuration is found
+            and after each configuration enumerated
 
-def solve_couples(employees):
+    Returns:
+        result (dict): {'solutions': list[dict[tuple(str,str): tuple(list[int], int)]],
+                        'objective': value of the best configuration, 'status': status of the search,
+                        'complete': whether all the best configurations were enumerated,
+                        'wall_time': seconds spent in the search}
+    """
+    if engine not in COUPLE_ENGINES:
+        raise ValueError('Unknown couple engine: {}'.format(engine))
     persons = [p['name'] for p in employees]
     disponibility_per_person = {p['name']: p['availabilities'] for p in employees}
     sector_per_person = {p['name']: p['sector'] for p in employees}
+    drivers = {p['name'] for p in employees if p.get('has_driving_license')}
+
+    start = time.perf_counter()
+    availabilities = AvailabilityIndex(persons, disponibility_per_person)
+    list_of_couples = create_couples(persons, disponibility_per_person, sector_per_person)
+    if require_driver:
+        list_of_couples = [(p1, p2) for p1, p2 in list_of_couples if p1 in drivers or p2 in drivers]
+
+    if engine == 'matching':
+        maximisation, solution = match_couples(persons, list_of_couples, availabilities)
+        dispos_per_couples = {i: availabilities.shared_slots(*list_of_couples[i]) for i in solution}
+        sector_per_couples = {
+            i: sector_per_person[list_of_couples[i][0]] & sector_per_person[list_of_couples[i][1]] for i in solution
+        }
+        return {
+            'solutions': [save_solutions(solution, list_of_couples, dispos_per_couples, sector_per_couples)],
+            'objective': maximisation,
+            'status': SolverStatus.OPTIMAL,
+            'complete': False,
+            'wall_time': time.perf_counter() - start,
+        }
 
-    print('---- Exploration ----')
-    exploration_status, exploration_assignments, maximisation = exploration(persons,
-                                                                            disponibility_per_person,
-                                                                            sector_per_person)
-
-    print('---- Satisfaction ----')
-    satisfaction_status, satisfaction_assignments = satisfaction(persons,
-                                                                 disponibility_per_person,
-                                                                 sector_per_person,
-                                                                 maximisation)
-
-    return satisfaction_assignments
+    model, couples, dispos_per_couples, sector_per_couples = create_model(persons,
+                                                                          list_of_couples,
+                                                                          disponibility_per_person,
+                                                                          sector_per_person,
+                                                                          availabilities)
+    objective = create_objective(list_of_couples, couples, availabilities)
+
+    status, maximisation, hint = exploration(model, couples, objective, search_workers)
+    solutions = []
+    complete = False
+    if SolverStatus.success(status):
+        def enumeration_progress(fraction):
+            progress(EXPLORATION_PROGRESS + (1 - EXPLORATION_PROGRESS) * fraction)
+
+        if progress:
+            progress(EXPLORATION_PROGRESS)
+        enumeration_status, solutions = satisfaction(model, couples, objective, maximisation, hint,
+                                                     solution_limit, time_limit,
+                                                     enumeration_progress if progress else None)
+        complete = enumeration_status == SolverStatus.OPTIMAL
+
+    return {
+        'solutions': [save_solutions(solution, list_of_couples, dispos_per_couples, sector_per_couples)
+                      for solution in solutions],
+        'objective': maximisation,
+        'status': status,
+        'complete': complete,
+        'wall_time': time.perf_counter() - start,
+    }
+
+
+def solve_couples(employees, solution_limit=RESULTS_COUNT_LIMIT, time_limit=ENUMERATION_TIME_LIMIT,
+                  engine=DEFAULT_COUPLE_ENGINE, require_driver=False):
+    return solve_couples_with_statistics(employees, solution_limit, time_limit, engine=engine,
+                                         require_driver=require_driver)['solutions']
@@ -0,0 +1,91 @@
+"""
+Nodes of the routing model, and the workers and hotels they stand for.
+
+The start of each located worker comes first, then their end, then the located hotels. The workers and
+hotels without a point cannot be routed: they are not given a node, and are reported as unrouted
+instead of shifting the nodes of the following ones.
+"""
+START = 'start'
+END = 'end'
+HOTEL = 'hotel'
+WORKER = 'worker'
+
+
+def is_located(record):
+    point = record.get('point')
+    return bool(point) and point.get('latitude') is not None and point.get('longitude') is not None
+
+
+def label(record):
+    return '{} {}'.format(record.get('address'), record.get('postcode'))
+
+
+class NodeRegistry(object):
+    """Maps each node of the routing model to the id, label, point and record of its worker or hotel"""
+
+    def __init__(self, hotels, workers):
+        """
+        Args:
+            hotels (list[dict]): each dict has an 'address', a 'postcode' and a 'point'
+                {'latitude': float, 'longitude': float}, and optionally an 'id'
+            workers (list[dict]): same structure as the hotels, the point being the start and end of the worker
+        """
+        self.worker_count = len(workers)
+        # Position in `workers` of the worker driving each vehicle
+        self.vehicle_workers = [position for position, worker in enumerate(workers) if is_located(worker)]
+        located_hotels = [position for position, hotel in enumerate(hotels) if is_located(hotel)]
+
+        self.kinds, self.positions, self.records = [], [], []
+        for kind, records, positions in ((START, workers, self.vehicle_workers),
+                                         (END, workers, self.vehicle_workers),
+                                         (HOTEL, hotels, located_hotels)):
+            self.kinds.extend([kind] * len(positions))
+            self.positions.extend(positions)
+            self.records.extend(records[position] for position in positions)
+        self.ids = [
+            record.get('id', position) for record, position in zip(self.records, self.positions)
+        ]
+        self.labels = [label(record) for record in self.records]
+        self.latitudes = [record['point']['latitude'] for record in self.records]
+        self.longitudes = [record['point']['longitude'] for record in self.records]
+
+        vehicle_count = len(self.vehicle_workers)
+        self.start_locations = list(range(vehicle_count))
+        self.end_locations = list(range(vehicle_count, 2 * vehicle_count))
+        self.hotel_nodes = list(range(2 * vehicle_count, len(self.records)))
+
+        located_workers = set(self.vehicle_workers)
+        self.unrouted = [
+            {'kind': WORKER, 'id': worker.get('id', position), 'label': label(worker)}
+            for position, worker in enumerate(workers) if position not in located_workers
+        ] + [
+            {'kind': HOTEL, 'id': hotel.get('id', position), 'label': label(hotel)}
+            for position, hotel in enumerate(hotels) if not is_located(hotel)
+        ]
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def points(self):
+        return list(zip(self.latitudes, self.longitudes))
+
+    @property
+    def depots(self):
+        return set(self.start_locations) | set(self.end_locations)
+
+    def is_depot(self, node):
+        return node < 2 * len(self.vehicle_workers)
+
+    def worker_routes(self, vehicle_routes):
+        """
+        Args:
+            vehicle_routes (list[list]): the route of each vehicle
+
+        Returns:
+            routes (list[list]): the route of each worker, empty for the workers that are not routed
+        """
+        routes = [[] for _ in range(self.worker_count)]
+        for position, route in zip(self.vehicle_workers, vehicle_routes):
+            routes[position] = route
+        return routes
@@ -0,0 +1,174 @@
+"""
+Plan the visits of the hotels over several days.
+
+Each hotel is visited every `revisit_interval` days, starting on the day that best balances the visits
+with the shifts of the workers. The workers of a day are the ones available in one of its half-days,
+as given by the slots of their availabilities. The distances between all the points are computed once:
+each day takes the rows of its own points, and the days are solved in parallel.
+"""
+import time
+from datetime import timedelta
+
+from src.domain.availability_model import AFTERNOON, MORNING, slot_half_day
+from src.domain.node_registry import is_located, label
+from src.domain.solver import (
+    MAX_VISIT_PER_DAY,
+    create_data_model,
+    get_distances_matrix,
+    map_in_processes,
+    solve_data_model,
+)
+
+DEFAULT_REVISIT_INTERVAL = 7  # Days between two visits of a hotel
+SHIFTS = {  # Minutes since the beginning of the day
+    MORNING: [8 * 60, 13 * 60],
+    AFTERNOON: [13 * 60, 18 * 60],
+}
+
+
+def worker_shifts(worker):
+    """
+    Args:
+        worker (dict): with the slots of its 'availabilities', see `availability_model`
+
+    Returns:
+        shifts (dict[date: set[int]]): the half-days the worker is available, by day
+    """
+    shifts = {}
+    for slot in worker.get('availabilities') or []:
+        day, half_day = slot_half_day(slot)
+        shifts.setdefault(day, set()).add(half_day)
+    return shifts
+
+
+def day_worker(worker, half_days):
+    """The worker on a day: its time window covers its half-days, its capacity is in proportion of them"""
+    return dict(
+        worker,
+        time_window=[min(SHIFTS[half_day][0] for half_day in half_days),
+                     max(SHIFTS[half_day][1] for half_day in half_days)],
+        capacity=max(2, MAX_VISIT_PER_DAY * len(half_days) // len(SHIFTS)),
+    )
+
+
+def schedule_visits(hotels, capacities, revisit_interval=DEFAULT_REVISIT_INTERVAL):
+    """
+    Choose the day of the first visit of each hotel, so that the days are loaded in proportion of
+    their capacity. The hotels visited the most often are scheduled first.
+
+    Args:
+        hotels (list[dict]): may have their own 'revisit_interval', in days
+        capacities (list[int]): number of visits the workers can make on each day of the horizon
+        revisit_interval (int): days between two visits of a hotel
+
+    Returns:
+        visits (list[list[int]]): positions of the hotels visited on each day
+        unscheduled (list[tuple(int, int)]): (hotel, day) of the visits falling on a day without worker, the day
+            being None for the hotels of an empty horizon
+    """
+    intervals = [max(1, int(hotel.get('revisit_interval') or revisit_interval)) for hotel in hotels]
+    visits = [[] for _ in capacities]
+    unscheduled = []
+    for hotel in sorted((i for i, hotel in enumerate(hotels) if is_located(hotel)), key=lambda i: intervals[i]):
+        best = None
+        for offset in range(min(intervals[hotel], len(capacities))):
+            days = range(offset, len(capacities), intervals[hotel])
+            # The fewest visits on days without worker, then the lowest load of the busiest day
+            staffed = [day for day in days if capacities[day]]
+            missed = len(days) - len(staffed)
+            load = max((len(visits[day]) + 1) / capacities[day] for day in staffed) if staffed else float('inf')
+            if best is None or (missed, load) < best[0]:
+                best = ((missed, load), days)
+        if best is None:
+            unscheduled.append((hotel, None))
+            continue
+        for day in best[1]:
+            if capacities[day]:
+                visits[day].append(hotel)
+            else:
+                unscheduled.append((hotel, day))
+    return visits, unscheduled
+
+
+def plan_routes(hotels, workers, revisit_interval=DEFAULT_REVISIT_INTERVAL, days=None, search=None, processes=None,
+                constraints=None, provider=None, progress=None):
+    """
+    Plan the routes of all the days of a horizon in a single call
+
+    Args:
+        hotels (list[dict]):
+        workers (list[dict]): each worker, e.g. a couple, has the slots of its 'availabilities'
+        revisit_interval (int): days between two visits of a hotel, unless it has its own 'revisit_interval'
+        days (list[date]): consecutive days of the horizon, from the first to the last availability by default
+        search (dict): keyword arguments of `create_search_parameters`, used for each day
+        processes (int): number of days solved in parallel, the number of cores by default
+        constraints (dict): maximum distance, drop penalty and speed, see `create_data_model`
+        provider (DistanceProvider): computes the distances, great-circle distances by default
+        progress (callable): called with the fraction of the days solved, after each of them
+
+    Returns:
+        result (dict): {"days": [{"date": ISO date, "workers": positions of the workers of the day,
+                                  "routes", "dropped", "objective", "status": as in `solve_routes_with_statistics`}],
+                        "unscheduled": [{"label", "date"}] of the visits falling on a day without worker,
+                            the date being None for the hotels of an empty horizon,
+                        "unrouted": the workers and hotels without point, see `NodeRegistry`,
+                        "objective": total of the days, "status": the first failure, if any,
+                        "wall_time": seconds spent}
+    """
+    start = time.perf_counter()
+    shifts = [worker_shifts(worker) if is_located(worker) else {} for worker in workers]
+    if days is None:
+        available_days = sorted({day for worker_days in shifts for day in worker_days})
+        days = [
+            available_days[0] + timedelta(days=i) for i in range((available_days[-1] - available_days[0]).days + 1)
+        ] if available_days else []
+
+    day_workers = [
+        [(position, day_worker(workers[position], shifts[position][day]))
+         for position in range(len(workers)) if day in shifts[position]]
+        for day in days
+    ]
+    # The start of each worker also counts as a visit
+    capacities = [sum(worker['capacity'] - 1 for _, worker in workers_of_day) for workers_of_day in day_workers]
+    visits, unscheduled = schedule_visits(hotels, capacities, revisit_interval)
+
+    # One matrix for the points of the whole horizon
+    distances, registry = get_distances_matrix(hotels, workers, provider=provider)
+    shared = {'distances': distances, 'points': registry.points}
+    planned = [
+        (day, [position for position, _ in workers_of_day],
+         create_data_model([hotels[i] for i in hotels_of_day], [worker for _, worker in workers_of_day], False,
+                           previous_data=shared, constraints=constraints, provider=provider))
+        for day, hotels_of_day, workers_of_day in zip(days, visits, day_workers)
+        if workers_of_day
+    ]
+
+    results = map_in_processes(_solve_day, [(data, search) for _, _, data in planned], processes, progress)
+
+    failures = [result['status'] for result in results if result['routes'] is None]
+    return {
+        'days': [
+            {
+                'date': day.isoformat(),
+                'workers': positions,
+                'routes': result['routes'],
+                'dropped': result['dropped'],
+                'objective': result['objective'],
+                'status': result['status'],
+            }
+            for (day, positions, _), result in zip(planned, results)
+        ],
+        'unscheduled': [
+            {'label': label(hotels[hotel]), 'date': days[day].isoformat() if day is not None else None}
+            for hotel, day in unscheduled
+        ],
+        'unrouted': registry.unrouted,
+        'objective': sum(result['objective'] for result in results if result['objective'] is not None),
+        'status': failures[0] if failures else (results[0]['status'] if results else None),
+        'wall_time': time.perf_counter() - start,
+    }
+
+
+def _solve_day(task):
+    data, search = task
+    return solve_data_model(data, search)
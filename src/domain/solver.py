@@ -1,163 +1,228 @@
 """
 Determine an optimal list of hotel to visit.
     ```
-    $ python src/domain/solver.py \
-        -s "/Users/fpaupier/projects/samu_social/data/hotels_subset.csv
+    $ python -m src.domain.solver \
+        -s "/Users/fpaupier/projects/samu_social/data/hotels-enriched.csv" -n 4 --preset balanced
     ```
     Note that the first record should be the adress of the starting point (let's say the HQ of the Samu Social)
 """
 import argparse
-import numpy as np
-
+import math
+import multiprocessing
+import os
+import time
 
 from ortools.constraint_solver import pywrapcp
 from ortools.constraint_solver import routing_enums_pb2
 
-from src.services.map import Map
-from src.services.csv_reader import parse_csv
+from src.domain.clustering import sweep_clusters
+from src.domain.distance_matrix import np, update_haversine_matrix
+from src.domain.node_registry import NodeRegistry
+from src.domain.spatial_index import SparseDistances, sparse_distances
+from src.domain.utils import SEARCH_PRESETS, DEFAULT_SEARCH_PRESET, DEFAULT_REPLAN_PRESET
+from src.services.csv_reader import iter_csv, parse_csv
+from src.services.distance_provider import HaversineProvider
 
 MAX_DISTANCE = 15000  # Maximum distance (meters) that a worker can cover in a day
+DROP_PENALTY = 10000000  # Cost of not visiting a hotel, far above any detour so that hotels are only dropped if needed
+AVERAGE_SPEED = 250  # meters per minute, to estimate the travel time between two locations
+DAY_DURATION = 24 * 60  # minutes, time windows are expressed in minutes since the beginning of the day
 MAX_VISIT_PER_DAY = 8  # Maximum number of various hotel a worker can cover within a day
+MATRIX_CACHE_PATH = os.environ.get("DISTANCE_MATRIX_CACHE_PATH")  # Directory of the cached distance matrices
+WORKERS_PER_CLUSTER = 12  # Number of workers of each subproblem when the instance is decomposed
+
+
+def _routing_statuses():
+    # Recent OR-Tools versions moved the routing statuses to an enum, and added new ones
+    if hasattr(routing_enums_pb2, "RoutingSearchStatus"):
+        return {
+            value: name
+            for name, value in routing_enums_pb2.RoutingSearchStatus.Value.items()
+        }
+    return {
+        getattr(pywrapcp.RoutingModel, name): name
+        for name in dir(pywrapcp.RoutingModel)
+        if name.startswith("ROUTING_")
+    }
+
 
+ROUTING_STATUSES = _routing_statuses()
 
-def get_distances_matrix(hotels, workers):
+
+def get_distances_matrix(hotels, workers, previous_data=None, neighbours=None, provider=None, registry=None):
     """Compute the distance matrix (distance between each hotels).
-    Returns a triangular matrix and the labels of the hotels.
 
     Note:
-        1) That the first address shall be the address of the depot.
-        2) If the API doesn't returna a match for the address, we drop
-            the point. This may not be the expected behavior. TODO
-
+        The workers and hotels without point have no node: they are listed in the `unrouted`
+        attribute of the registry.
 
     Args:
         hotels (list[dict]): list of address, each dict has the struct
-            {'address': 'Avenue Winston Churchill', 'postcode': 27000}
-        workers (dict(int: int))
+            {'address': 'Avenue Winston Churchill', 'postcode': 27000, 'point': {'latitude': .., 'longitude': ..}}
+        workers (list[dict]): same structure as the hotels, the point being the start and end of the worker
+        previous_data (dict): data model of a previous solve, its distances between the points
+            that are still there are reused
+        neighbours (int): when given, only the great-circle distances between each hotel and its nearest
+            neighbours within MAX_DISTANCE are computed, the other ones being penalized
+        provider (DistanceProvider): computes the distances, great-circle distances by default. Only great-circle
+            distances are supported with `neighbours`
+        registry (NodeRegistry): the nodes of the hotels and workers, built from them by default
     Returns:
-        distances(list[list[int]]): matrix of distances
-        labels(dict[int, string]): the index of the address and it's name
-
-    Warnings:
-        Function seems to break if size of input hotels is too big ? Returns empty distances
-        that leads to a segmentation fault down the processing pipeline.
-
+        distances(numpy.ndarray|list[list[int]]|SparseDistances): matrix of distances, an int32 array when
+            NumPy is available, memory-mapped from the DISTANCE_MATRIX_CACHE_PATH directory when it is set
+        registry(NodeRegistry): the id, label and point of each node
     """
-    map = Map()
-    distances = []
-    labels = dict()
-    index = 0
-    hotels_and_workers = workers + workers + hotels
-
-    for hotel1 in hotels_and_workers:
-        src_address = {
-            "address": hotel1.get("address"),
-            "postcode": hotel1.get("postcode"),
-        }
-        # point1 = map.point(src_address)
-        point1 = hotel1["point"]
-        src_dist = []
-        if not point1:
-            continue
+    if neighbours and provider is not None and not isinstance(provider, HaversineProvider):
+        raise ValueError("The nearest neighbours only support great-circle distances, not {}".format(provider.name))
+    if registry is None:
+        registry = NodeRegistry(hotels, workers)
+    latitudes, longitudes = registry.latitudes, registry.longitudes
+    depots = sorted(registry.depots)
+
+    if neighbours:
+        # The workers may start far from the hotels: their start and end are linked to every hotel
+        distances = sparse_distances(
+            latitudes, longitudes, neighbours, radius=MAX_DISTANCE, dense_nodes=depots
+        )
+    elif provider is not None and not isinstance(provider, HaversineProvider):
+        distances = provider.matrix(latitudes, longitudes, as_array=True)
+    elif previous_data and not isinstance(previous_data["distances"], SparseDistances):
+        distances = update_haversine_matrix(
+            latitudes, longitudes, previous_data["points"], previous_data["distances"], as_array=True
+        )
+    elif MATRIX_CACHE_PATH and np is not None:
+        from src.domain.matrix_cache import MatrixCache
+
+        distances = MatrixCache(MATRIX_CACHE_PATH).get(latitudes, longitudes)
+    else:
+        distances = (provider or HaversineProvider()).matrix(latitudes, longitudes, as_array=True)
 
-        labels[index] = "{} {}".format(
-            src_address.get("address"), src_address.get("postcode")
-        )  # Store the address as labels for the node
-        index = index + 1
-        for hotel2 in hotels_and_workers:
-            target_address = {
-                "address": hotel2.get("address"),
-                "postcode": hotel2.get("postcode"),
-            }
-            # point2 = map.point(target_address)
-            point2 = hotel2["point"]
-
-            if not point2:
-                continue
+    return distances, registry
 
-            distance = map.distance(point1, point2)
-            distance = int(np.round(distance * 1000))  # Distance expressed in meters
-            src_dist.append(distance)
 
-        if src_dist:
-            distances.append(src_dist)
+def durations_to_distances(durations, speed):
+    """
+    Args:
+        durations (numpy.ndarray|list[list[int]]): travel durations, in seconds
+        speed (float): in meters per minute
 
-    return distances, labels
+    Returns:
+        distances (numpy.ndarray|list[list[int]]): the distances covered at `speed` during the durations, in meters
+    """
+    if np is not None and isinstance(durations, np.ndarray):
+        return np.rint(durations * (speed / 60.)).astype(durations.dtype)
+    return [[int(round(duration * speed / 60.)) for duration in row] for row in durations]
 
 
 ###########################
 # Problem Data Definition #
 ###########################
-def create_data_model(hotels, workers, from_raw_data):
+def create_data_model(hotels, workers, from_raw_data, previous_data=None, neighbours=None, constraints=None,
+                      provider=None):
     """Creates the data for the example.
+
+    Hotels may have a "visit_time" in minutes and a "time_window" [start, end] in minutes since the
+    beginning of the day. Workers may have a "max_distance" in meters, a "time_window" for their shift and a
+    "capacity", the number of nodes of their route including its start, MAX_VISIT_PER_DAY by default.
+
     Args:
         hotels(list[dict])
         workers(dict(int: int): number of couple of Samu Social workers available
         from_raw_data(bool):
+        previous_data(dict): data model of a previous solve, to reuse its distances
+        neighbours(int): number of nearest neighbours of each hotel, to build a sparse distance graph
+        constraints(dict): {"max_distance": default distance a worker can cover in meters,
+                            "drop_penalty": cost of not visiting a hotel, 0 to make every visit mandatory,
+                            "speed": average speed in meters per minute}
+        provider(DistanceProvider): computes the distances, great-circle distances by default. The durations
+            of a provider in seconds are turned into the distances covered at the average speed
     """
-    data = {}
-    n_workers = len(workers)
-    data["num_vehicles"] = n_workers
-
-    # Precise start and end locations of the workers
-    # The number_workers-th first line correspond to the start locations of the workers
-    start_locations = [idx for idx in range(n_workers)]
-
-    # The number_workers-th to the 2*number_workers-th line correspond to the end locations of the workers
-    end_locations = [idx for idx in range(n_workers, 2 * n_workers)]
-    data["start_locations"] = start_locations
-    data["end_locations"] = end_locations
-
     # Matrix of distances between locations.
     if from_raw_data:
         hotels_data = parse_csv(hotels, "hotel", write=False)
     else:
         hotels_data = hotels
-    _distances, labels = get_distances_matrix(hotels_data, workers)
+    registry = NodeRegistry(hotels_data, workers)
+    _distances, _ = get_distances_matrix(hotels_data, workers, previous_data, neighbours, provider, registry)
+    constraints = constraints or {}
+    speed = constraints.get("speed") or AVERAGE_SPEED
+    if provider is not None and provider.unit == "seconds":
+        # The distance constraints and travel times read meters: a duration is the distance covered at `speed`
+        _distances = durations_to_distances(_distances, speed)
+
+    data = {}
+    data["registry"] = registry
     data["distances"] = _distances
-    data["labels"] = labels
-    num_locations = len(_distances)
+    data["labels"] = registry.labels
+    data["points"] = registry.points
+    num_locations = len(registry)
     data["num_locations"] = num_locations
 
+    # Precise start and end locations of the located workers, one vehicle each
+    data["num_vehicles"] = len(registry.vehicle_workers)
+    data["start_locations"] = registry.start_locations
+    data["end_locations"] = registry.end_locations
+
     # The problem is to find an assignment of routes to vehicles that has the shortest total distance
     # and such that the total amount a vehicle is carrying never exceeds its capacity. Capacities can be understood
     # as the max number of visits that a worker can do in a day
     demands = [1] * num_locations
-    capacities = [MAX_VISIT_PER_DAY] * n_workers
+    capacities = [
+        MAX_VISIT_PER_DAY if workers[position].get("capacity") is None else int(workers[position]["capacity"])
+        for position in registry.vehicle_workers
+    ]
     data["demands"] = demands
     data["vehicle_capacities"] = capacities
 
+    # Distance and time constraints
+    max_distance = MAX_DISTANCE if constraints.get("max_distance") is None else constraints["max_distance"]
+    data["max_distances"] = [
+        int(max_distance if workers[position].get("max_distance") is None else workers[position]["max_distance"])
+        for position in registry.vehicle_workers
+    ]
+    data["visit_times"] = [
+        0 if registry.is_depot(node) else int(record.get("visit_time") or 0)
+        for node, record in enumerate(registry.records)
+    ]
+    data["time_windows"] = [record.get("time_window") for record in registry.records]
+    data["speed"] = speed
+    data["drop_penalty"] = DROP_PENALTY if constraints.get("drop_penalty") is None else constraints["drop_penalty"]
+
     return data
 
 
 #######################
 # Problem Constraints #
 #######################
-def create_distance_callback(data):
-    """Creates callback to return distance between points."""
-    distances = data["distances"]
-
-    def distance_callback(from_node, to_node):
-        """Returns the manhattan distance between the two nodes"""
-        return distances[from_node][to_node]
-
-    return distance_callback
+def register_distances(routing, data):
+    """Registers the matrix of distances between nodes, evaluated natively by the solver.
 
+    Returns:
+        transit_index (int): index of the transit evaluator in the routing model
+    """
+    distances = data["distances"]
+    # The solver keeps its own copy: the lists it expects only live during the registration
+    if isinstance(distances, SparseDistances):
+        distances = distances.to_matrix()
+    elif np is not None and isinstance(distances, np.ndarray):
+        distances = distances.tolist()
+    return routing.RegisterTransitMatrix(distances)
 
-def create_demand_callback(data):
-    """Creates callback to get demands at each location."""
 
-    def demand_callback(from_node, to_node):
-        return data["demands"][from_node]
+def register_demands(routing, data):
+    """Registers the demand of each node, evaluated natively by the solver.
 
-    return demand_callback
+    Returns:
+        transit_index (int): index of the transit evaluator in the routing model
+    """
+    return routing.RegisterUnaryTransitVector(data["demands"])
 
 
-def add_capacity_constraints(routing, data, demand_callback):
+def add_capacity_constraints(routing, data, demand_index):
     """Adds capacity constraint"""
     capacity = "Capacity"
     routing.AddDimensionWithVehicleCapacity(
-        demand_callback,
+        demand_index,
         0,  # null capacity slack
         data["vehicle_capacities"],  # vehicle maximum capacities
         True,  # start cumul to zero
@@ -165,36 +230,300 @@ def add_capacity_constraints(routing, data, demand_callback):
     )
 
 
+def add_distance_constraints(routing, data, distance_index):
+    """Adds distance constraint: each worker covers at most its maximum distance"""
+    routing.AddDimensionWithVehicleCapacity(
+        distance_index,
+        0,  # null distance slack
+        data["max_distances"],  # vehicle maximum distances
+        True,  # start cumul to zero
+        "Distance",
+    )
+
+
+def has_time_constraints(data):
+    return any(data["visit_times"]) or any(window is not None for window in data["time_windows"])
+
+
+def register_times(routing, data):
+    """Registers the time from each node to the others: the visit of the node, then the travel.
+
+    Returns:
+        transit_index (int): index of the transit evaluator in the routing model
+    """
+    distances = data["distances"]
+    speed = data["speed"]
+    if np is not None and isinstance(distances, np.ndarray):
+        visit_times = np.asarray(data["visit_times"], dtype=np.int64)
+        times = (visit_times[:, None] + np.ceil(distances / speed).astype(np.int64)).tolist()
+    else:
+        times = [
+            [data["visit_times"][i] + int(math.ceil(distances[i][j] / speed)) for j in range(data["num_locations"])]
+            for i in range(data["num_locations"])
+        ]
+    return routing.RegisterTransitMatrix(times)
+
+
+def add_time_window_constraints(routing, manager, data, time_index):
+    """Adds time windows constraint: each hotel is visited, and each worker works, within its time window"""
+    time = "Time"
+    routing.AddDimension(
+        time_index,
+        DAY_DURATION,  # workers may wait for the opening of a time window
+        DAY_DURATION,  # maximum time per vehicle
+        False,  # workers do not all start at the beginning of the day
+        time,
+    )
+    time_dimension = routing.GetDimensionOrDie(time)
+    depots = set(data["start_locations"]) | set(data["end_locations"])
+    for node, window in enumerate(data["time_windows"]):
+        if window is not None and node not in depots:
+            time_dimension.CumulVar(manager.NodeToIndex(node)).SetRange(int(window[0]), int(window[1]))
+    for vehicle in range(data["num_vehicles"]):
+        window = data["time_windows"][data["start_locations"][vehicle]]
+        for index in (routing.Start(vehicle), routing.End(vehicle)):
+            if window is not None:
+                time_dimension.CumulVar(index).SetRange(int(window[0]), int(window[1]))
+            routing.AddVariableMinimizedByFinalizer(time_dimension.CumulVar(index))
+
+
+def add_drop_penalties(routing, manager, data):
+    """Makes the visit of each hotel optional: not visiting it costs the drop penalty"""
+    depots = set(data["start_locations"]) | set(data["end_locations"])
+    for node in range(data["num_locations"]):
+        if node not in depots:
+            routing.AddDisjunction([manager.NodeToIndex(node)], data["drop_penalty"])
+
+
+#####################
+# Search Parameters #
+#####################
+def create_search_parameters(
+    preset=DEFAULT_SEARCH_PRESET,
+    time_limit=None,
+    solution_limit=None,
+    first_solution_strategy=None,
+    local_search_metaheuristic=None,
+):
+    """Creates the search parameters of the routing solver.
+
+    Args:
+        preset (str): name of the preset of SEARCH_PRESETS giving the default value of the other arguments
+        time_limit (float): maximum duration of the search, in seconds, greater than 0
+        solution_limit (int): maximum number of solutions explored
+        first_solution_strategy (str): name of a FirstSolutionStrategy, e.g. PATH_CHEAPEST_ARC
+        local_search_metaheuristic (str): name of a LocalSearchMetaheuristic, e.g. GUIDED_LOCAL_SEARCH or TABU_SEARCH
+
+    Returns:
+        search_parameters (RoutingSearchParameters)
+    """
+    if preset not in SEARCH_PRESETS:
+        raise ValueError("Unknown search preset: {}".format(preset))
+    if time_limit is not None and not time_limit > 0:
+        raise ValueError("The time limit must be greater than 0: {}".format(time_limit))
+    settings = dict(SEARCH_PRESETS[preset])
+    overrides = {
+        "time_limit": time_limit,
+        "solution_limit": solution_limit,
+        "first_solution_strategy": first_solution_strategy,
+        "local_search_metaheuristic": local_search_metaheuristic,
+    }
+    settings.update({name: value for name, value in overrides.items() if value is not None})
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = _enum_value(
+        routing_enums_pb2.FirstSolutionStrategy, settings["first_solution_strategy"]
+    )
+    search_parameters.local_search_metaheuristic = _enum_value(
+        routing_enums_pb2.LocalSearchMetaheuristic, settings["local_search_metaheuristic"]
+    )
+    if settings["time_limit"] is not None:
+        search_parameters.time_limit.FromMilliseconds(int(settings["time_limit"] * 1000))
+    if settings["solution_limit"]:
+        search_parameters.solution_limit = settings["solution_limit"]
+    return search_parameters
+
+
+def _enum_value(enum, name):
+    try:
+        return getattr(enum, name.upper())
+    except AttributeError:
+        raise ValueError("Unknown {}: {}".format(enum.__name__, name))
+
+
 ###########
 # FORMATTER #
 ###########
-def format_solution(data, routing, assignment):
-    """Print routes on console."""
+def format_solution(data, manager, routing, assignment):
+    """Labels of the nodes visited by each worker, in the order of the workers: the ones that cannot be routed
+    have an empty route"""
     plan_output = []
     for vehicle_id in range(data["num_vehicles"]):
         route = []
         index = routing.Start(vehicle_id)
         route_dist = 0
         while not routing.IsEnd(index):
-            node_index = routing.IndexToNode(index)
-            next_node_index = routing.IndexToNode(
-                assignment.Value(routing.NextVar(index))
-            )
-            route_dist += routing.GetArcCostForVehicle(
-                node_index, next_node_index, vehicle_id
-            )
-            route.append(("{0}".format(data["labels"].get(node_index))))
-            index = assignment.Value(routing.NextVar(index))
+            node_index = manager.IndexToNode(index)
+            next_index = assignment.Value(routing.NextVar(index))
+            route_dist += routing.GetArcCostForVehicle(index, next_index, vehicle_id)
+            route.append(data["labels"][node_index])
+            index = next_index
         # Add return address to the route
-        route.append((data["labels"].get(routing.IndexToNode(index))))
+        route.append(data["labels"][manager.IndexToNode(index)])
         plan_output.append(route)
-    return plan_output
+    return data["registry"].worker_routes(plan_output)
+
+
+def format_dropped(data, manager, routing, assignment):
+    """Labels of the hotels that no worker visits"""
+    return [
+        data["labels"][manager.IndexToNode(index)]
+        for index in range(routing.Size())
+        if not routing.IsStart(index) and assignment.Value(routing.NextVar(index)) == index
+    ]
+
+
+##############
+# Warm start #
+##############
+def routes_to_nodes(data, routes):
+    """Maps an itinerary onto the nodes of a data model, e.g. the itinerary of a previous solve.
+
+    Each route is given to the vehicle starting from the same address, and each visit to a hotel
+    with the same label. The routes of the workers who left and the hotels that were removed are dropped.
+
+    Args:
+        data (dict): as returned by `create_data_model`
+        routes (list[list[str]]): labels of the nodes visited by each worker, as returned by `format_solution`
+
+    Returns:
+        routes (list[list[int]]): nodes visited by each vehicle, between its start and its end
+    """
+    depots = set(data["start_locations"]) | set(data["end_locations"])
+    vehicles_per_label = {}
+    for vehicle, node in enumerate(data["start_locations"]):
+        vehicles_per_label.setdefault(data["labels"][node], []).append(vehicle)
+    nodes_per_label = {}
+    for node, label in enumerate(data["labels"]):
+        if node not in depots:
+            nodes_per_label.setdefault(label, []).append(node)
+
+    nodes = [[] for _ in range(data["num_vehicles"])]
+    for route in routes or []:
+        vehicles = vehicles_per_label.get(route[0]) if route else None
+        if not vehicles:
+            continue
+        vehicle = vehicles.pop(0)
+        for label in route[1:-1]:
+            if nodes_per_label.get(label):
+                nodes[vehicle].append(nodes_per_label[label].pop(0))
+    return nodes
+
+
+def complete_routes(data, routes):
+    """Makes routes feasible: the visits exceeding the capacity or the maximum distance of a vehicle are removed,
+    then each node not visited yet is inserted where it lengthens the routes the least.
+
+    Args:
+        data (dict): as returned by `create_data_model`
+        routes (list[list[int]]): nodes visited by each vehicle, between its start and its end
+
+    Returns:
+        routes (list[list[int]])
+    """
+    distances = data["distances"]
+    demands = data["demands"]
+    routes = [list(route) for route in routes]
+    rooms, lengths = [], []
+    for vehicle, route in enumerate(routes):
+        room = data["vehicle_capacities"][vehicle] - demands[data["start_locations"][vehicle]]
+        while route and (sum(demands[node] for node in route) > room or
+                         _route_length(data, vehicle, route) > data["max_distances"][vehicle]):
+            route.pop()
+        rooms.append(room - sum(demands[node] for node in route))
+        lengths.append(_route_length(data, vehicle, route))
+
+    depots = set(data["start_locations"]) | set(data["end_locations"])
+    visited = {node for route in routes for node in route}
+    for node in range(data["num_locations"]):
+        if node in depots or node in visited:
+            continue
+        best = None
+        for vehicle, route in enumerate(routes):
+            if rooms[vehicle] < demands[node]:
+                continue
+            path = [data["start_locations"][vehicle]] + route + [data["end_locations"][vehicle]]
+            for position in range(len(path) - 1):
+                before, after = path[position], path[position + 1]
+                cost = distances[before][node] + distances[node][after] - distances[before][after]
+                if lengths[vehicle] + cost > data["max_distances"][vehicle]:
+                    continue
+                if best is None or cost < best[0]:
+                    best = (cost, vehicle, position)
+        if best is not None:
+            cost, vehicle, position = best
+            routes[vehicle].insert(position, node)
+            rooms[vehicle] -= demands[node]
+            lengths[vehicle] += cost
+    return routes
+
+
+def _route_length(data, vehicle, route):
+    path = [data["start_locations"][vehicle]] + route + [data["end_locations"][vehicle]]
+    return sum(data["distances"][before][after] for before, after in zip(path, path[1:]))
+
+
+def read_initial_assignment(manager, routing, routes, search_parameters):
+    """Closes the model and reads the routes as its initial assignment.
+
+    Returns:
+        assignment (Assignment): None if the routes are not feasible
+    """
+    routing.CloseModelWithParameters(search_parameters)
+    return routing.ReadAssignmentFromRoutes(
+        [[manager.NodeToIndex(node) for node in route] for route in routes], True
+    )
 
 
 ########
 # Main #
 ########
-def solve_routes(hotels, number_workers, from_raw_data=False):
+def create_routing_model(data):
+    """Creates the routing model: the distances and demands are handed to the solver as plain
+    vectors, so that the search never calls back into Python.
+
+    Returns:
+        manager (RoutingIndexManager), routing (RoutingModel)
+    """
+    manager = pywrapcp.RoutingIndexManager(
+        data["num_locations"],
+        data["num_vehicles"],
+        data["start_locations"],
+        data["end_locations"],
+    )
+    routing = pywrapcp.RoutingModel(manager)
+
+    # Define weight of each edge
+    distance_index = register_distances(routing, data)
+    routing.SetArcCostEvaluatorOfAllVehicles(distance_index)
+
+    # Add Capacity constraint
+    demand_index = register_demands(routing, data)
+    add_capacity_constraints(routing, data, demand_index)
+
+    # Add Distance, Time windows constraints, and let unreachable hotels be dropped
+    add_distance_constraints(routing, data, distance_index)
+    if has_time_constraints(data):
+        time_index = register_times(routing, data)
+        add_time_window_constraints(routing, manager, data, time_index)
+    if data["drop_penalty"]:
+        add_drop_penalties(routing, manager, data)
+
+    return manager, routing
+
+
+def solve_routes(hotels, number_workers, from_raw_data=False, search=None, neighbours=None, constraints=None,
+                 provider=None):
     """
     Entry point of the program
 
@@ -202,41 +531,210 @@ def solve_routes(hotels, number_workers, from_raw_data=False):
         hotels:
         number_workers:
         from_raw_data (bool): should we consider the raw csv file or not
+        search (dict): keyword arguments of `create_search_parameters`, e.g. {"preset": "fast"}
+        neighbours (int): link each hotel to its nearest neighbours only, see `get_distances_matrix`
+        constraints (dict): maximum distance, drop penalty and speed, see `create_data_model`
+        provider (DistanceProvider): computes the distances, great-circle distances by default
 
     Returns:
+        itinerary (list[list[str]]): the labels of the nodes visited by each worker, None if no solution was found
+    """
+    return solve_routes_with_statistics(
+        hotels, number_workers, from_raw_data, search, neighbours, constraints, provider
+    )["routes"]
 
 
+def solve_routes_with_statistics(hotels, number_workers, from_raw_data=False, search=None, neighbours=None,
+                                 constraints=None, provider=None):
+    """
+    Same as `solve_routes`, also reporting how the search went
+
+    Returns:
+        result (dict): {"routes": itinerary, "dropped": labels of the hotels that are not visited,
+                        "objective": total distance in meters plus the drop penalties,
+                        "status": routing status, "wall_time": seconds spent in the search,
+                        "warm_start": whether the search started from a previous itinerary,
+                        "unrouted": the workers and hotels without point, see `NodeRegistry`}
     """
     # Instantiate the data problem.
-    data = create_data_model(hotels, number_workers, from_raw_data)
-    # Create Routing Model
-    routing = pywrapcp.RoutingModel(
-        data["num_locations"],
-        data["num_vehicles"],
-        data["start_locations"],
-        data["end_locations"],
+    data = create_data_model(
+        hotels, number_workers, from_raw_data, neighbours=neighbours, constraints=constraints, provider=provider
     )
-    # Define weight of each edge
-    distance_callback = create_distance_callback(data)
-    routing.SetArcCostEvaluatorOfAllVehicles(distance_callback)
+    return solve_data_model(data, search)
 
-    # Add Capacity constraint
-    demand_callback = create_demand_callback(data)
-    add_capacity_constraints(routing, data, demand_callback)
 
-    # Setting first solution heuristic (cheapest addition).
-    search_parameters = pywrapcp.RoutingModel.DefaultSearchParameters()
-    search_parameters.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+def replan_routes(hotels, number_workers, previous_routes, previous_data=None, search=None, constraints=None,
+                  provider=None):
+    """
+    Solve again after some hotels or workers changed, starting from the previous itinerary: the search
+    is faster, and the routes stay close to the ones the workers already know.
+
+    Args:
+        hotels:
+        number_workers:
+        previous_routes (list[list[str]]): the previous itinerary, as returned by `solve_routes`
+        previous_data (dict): the data model of the previous solve, its distances are reused
+        search (dict): keyword arguments of `create_search_parameters`, the DEFAULT_REPLAN_PRESET by default
+        constraints (dict): maximum distance, drop penalty and speed, see `create_data_model`
+        provider (DistanceProvider): computes the distances, great-circle distances by default
+
+    Returns:
+        result (dict): same as `solve_routes_with_statistics`
+        data (dict): the data model, to be given to the next replanning
+    """
+    data = create_data_model(
+        hotels, number_workers, False, previous_data, constraints=constraints, provider=provider
     )
+    search = dict(search or {})
+    search.setdefault("preset", DEFAULT_REPLAN_PRESET)
+    return solve_data_model(data, search, previous_routes), data
+
+
+def solve_data_model(data, search=None, previous_routes=None):
+    """
+    Args:
+        data (dict): as returned by `create_data_model`
+        search (dict): keyword arguments of `create_search_parameters`
+        previous_routes (list[list[str]]): itinerary the search starts from, if any
+
+    Returns:
+        result (dict): same as `solve_routes_with_statistics`
+    """
+    if not data["num_vehicles"]:
+        # OR-Tools aborts the process on a model without vehicle
+        return _solve_without_vehicle(data)
+
+    # Create Routing Model
+    manager, routing = create_routing_model(data)
+
+    search_parameters = create_search_parameters(**(search or {}))
 
     # Solve the problem.
-    assignment = routing.SolveWithParameters(search_parameters)
-    if assignment:
-        itinerary = format_solution(data, routing, assignment)
-        return itinerary
+    start = time.perf_counter()
+    initial_assignment = None
+    if previous_routes:
+        routes = complete_routes(data, routes_to_nodes(data, previous_routes))
+        initial_assignment = read_initial_assignment(manager, routing, routes, search_parameters)
+    if initial_assignment:
+        assignment = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
     else:
-        return None
+        assignment = routing.SolveWithParameters(search_parameters)
+    wall_time = time.perf_counter() - start
+
+    return {
+        "routes": format_solution(data, manager, routing, assignment) if assignment else None,
+        "dropped": format_dropped(data, manager, routing, assignment) if assignment else None,
+        "objective": assignment.ObjectiveValue() if assignment else None,
+        "status": ROUTING_STATUSES.get(routing.status(), "UNKNOWN"),
+        "wall_time": wall_time,
+        "warm_start": initial_assignment is not None,
+        "unrouted": data["registry"].unrouted,
+    }
+
+
+def _solve_without_vehicle(data):
+    """No worker can be routed: every hotel is dropped, unless the visits are mandatory"""
+    registry = data["registry"]
+    dropped = [registry.labels[node] for node in registry.hotel_nodes]
+    feasible = data["drop_penalty"] or not dropped
+    return {
+        "routes": registry.worker_routes([]) if feasible else None,
+        "dropped": dropped if feasible else None,
+        "objective": data["drop_penalty"] * len(dropped) if feasible else None,
+        "status": "ROUTING_SUCCESS" if feasible else "ROUTING_INFEASIBLE",
+        "wall_time": 0.,
+        "warm_start": False,
+        "unrouted": registry.unrouted,
+    }
+
+
+def solve_routes_by_clusters(hotels, workers, workers_per_cluster=WORKERS_PER_CLUSTER, search=None, processes=None,
+                             neighbours=None, constraints=None, provider=None, progress=None):
+    """
+    Decompose the instance in geographic clusters of hotels, each of them visited by its own group of workers,
+    and solve the clusters in parallel
+
+    Args:
+        hotels (list[dict]):
+        workers (list[dict]):
+        workers_per_cluster (int): number of workers of each cluster
+        search (dict): keyword arguments of `create_search_parameters`, used for each cluster
+        processes (int): number of clusters solved in parallel, the number of cores by default
+        neighbours (int): link each hotel to its nearest neighbours only, see `get_distances_matrix`
+        constraints (dict): maximum distance, drop penalty and speed, see `create_data_model`
+        provider (DistanceProvider): computes the distances, great-circle distances by default
+        progress (callable): called with the fraction of the clusters solved, after each of them
+
+    Returns:
+        result (dict): same as `solve_routes_with_statistics`, the routes being in the order of the workers,
+            plus the number of "clusters". The workers without point have an empty route. The routes are None if a
+            cluster has no solution.
+    """
+    # The start of each worker also counts as a visit
+    clusters = sweep_clusters(hotels, workers, workers_per_cluster, MAX_VISIT_PER_DAY - 1)
+    tasks = [
+        ([hotels[i] for i in cluster_hotels], [workers[i] for i in cluster_workers], search, neighbours, constraints,
+         provider)
+        for cluster_hotels, cluster_workers in clusters
+    ]
+
+    start = time.perf_counter()
+    results = map_in_processes(_solve_cluster, tasks, processes, progress)
+    wall_time = time.perf_counter() - start
+
+    # The workers without point are in no cluster
+    routes = [[] for _ in workers]
+    failure = None
+    for (_, cluster_workers), result in zip(clusters, results):
+        if result["routes"] is None:
+            failure = result["status"]
+            continue
+        for worker, route in zip(cluster_workers, result["routes"]):
+            routes[worker] = route
+    return {
+        "routes": None if failure else routes,
+        "dropped": None if failure else [label for result in results for label in result["dropped"]],
+        "objective": None if failure else sum(result["objective"] for result in results),
+        "status": failure or results[0]["status"],
+        "wall_time": wall_time,
+        "warm_start": False,
+        "unrouted": NodeRegistry(hotels, workers).unrouted,
+        "clusters": len(clusters),
+    }
+
+
+def map_in_processes(function, tasks, processes=None, progress=None):
+    """
+    Args:
+        function (callable): applied to each task, in a process of a pool when there are several tasks
+        tasks (list): picklable arguments of `function`
+        processes (int): number of tasks run in parallel, the number of cores by default, 1 to run them in turn
+        progress (callable): called with the fraction of the tasks done, after each of them
+
+    Returns:
+        results (list): the result of each task, in the order of the tasks
+    """
+    results = []
+    # Daemonic processes cannot start a pool
+    if len(tasks) > 1 and processes != 1 and not multiprocessing.current_process().daemon:
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            for result in pool.imap(function, tasks):
+                results.append(result)
+                if progress:
+                    progress(len(results) / len(tasks))
+        return results
+    for task in tasks:
+        results.append(function(task))
+        if progress:
+            progress(len(results) / len(tasks))
+    return results
+
+
+def _solve_cluster(task):
+    hotels, workers, search, neighbours, constraints, provider = task
+    return solve_routes_with_statistics(
+        hotels, workers, search=search, neighbours=neighbours, constraints=constraints, provider=provider
+    )
 
 
 if __name__ == "__main__":
@@ -249,7 +747,7 @@ if __name__ == "__main__":
     """
     parser = argparse.ArgumentParser(description="Solve a Vehicle Routing Problem")
     parser.add_argument(
-        "-s", "--source", help="path to the source address csv file", type=str
+        "-s", "--source", help="path to the enriched hotels csv file", type=str, required=True
     )
     parser.add_argument(
         "-n",
@@ -258,6 +756,44 @@ if __name__ == "__main__":
         type=int,
         default=4,
     )
+    parser.add_argument(
+        "-p",
+        "--preset",
+        help="search preset: {}".format(", ".join(sorted(SEARCH_PRESETS))),
+        type=str,
+        default=DEFAULT_SEARCH_PRESET,
+    )
+    parser.add_argument(
+        "-t", "--time_limit", help="maximum duration of the search, in seconds", type=float
+    )
+    parser.add_argument(
+        "--solution_limit", help="maximum number of solutions explored", type=int
+    )
+    parser.add_argument(
+        "--first_solution_strategy", help="e.g. PATH_CHEAPEST_ARC", type=str
+    )
+    parser.add_argument(
+        "--local_search_metaheuristic", help="e.g. GUIDED_LOCAL_SEARCH, TABU_SEARCH", type=str
+    )
 
     args = parser.parse_args()
-    solve_routes(args.source, args.number_workers, from_raw_data=True)
+    search = {
+        "preset": args.preset,
+        "time_limit": args.time_limit,
+        "solution_limit": args.solution_limit,
+        "first_solution_strategy": args.first_solution_strategy,
+        "local_search_metaheuristic": args.local_search_metaheuristic,
+    }
+    records = list(iter_csv(args.source, "hotel", enriched=True))
+    # Every worker starts from and comes back to the first record
+    workers = [dict(records[0], id=worker) for worker in range(args.number_workers)] if records else []
+    result = solve_routes_with_statistics(records[1:], workers, search=search)
+    print(
+        "Status {status}, objective {objective} meters, found in {wall_time:.2f}s".format(
+            **result
+        )
+    )
+    for worker, route in enumerate(result["routes"] or []):
+        print("Worker {}: {}".format(worker, " -> ".join(route)))
+    if result["dropped"]:
+        print("Dropped: {}".format(", ".join(result["dropped"])))
@@ -0,0 +1,186 @@
+"""
+Sparse graph of the distances between geographic points.
+
+Routes only ever use short arcs: instead of the N² distances, each point is linked to its nearest
+neighbours, found with a grid index over the points projected on a plane. The missing arcs are
+given a large penalty, so that the solver only uses them when there is no other way.
+"""
+import math
+
+from src.domain.distance_matrix import EARTH_RADIUS, haversine_matrix, np
+
+DEFAULT_NEIGHBOURS = 16  # Number of nearest neighbours linked to each point
+MISSING_ARC_PENALTY = 1000000  # meters, the distance given to the arcs that are not in the graph
+
+
+class GridIndex(object):
+    """Buckets points in square cells of a plane projection, to look up the neighbours of a point"""
+
+    def __init__(self, latitudes, longitudes, cell_size=None):
+        """
+        Args:
+            latitudes (list[float]): in degrees
+            longitudes (list[float]): in degrees
+            cell_size (float): side of the cells in meters, chosen to hold a few points each by default
+        """
+        size = len(latitudes)
+        reference = math.cos(math.radians(sum(latitudes) / size)) if size else 1.
+        # Equirectangular projection, in meters: accurate at the scale of a city
+        self.xs = [EARTH_RADIUS * 1000 * math.radians(longitude) * reference for longitude in longitudes]
+        self.ys = [EARTH_RADIUS * 1000 * math.radians(latitude) for latitude in latitudes]
+        if cell_size is None:
+            width = (max(self.xs) - min(self.xs)) if size else 0.
+            height = (max(self.ys) - min(self.ys)) if size else 0.
+            # Points spread on a line still get a few of them per cell
+            area = max(width * height, max(width, height) ** 2 / size) if size else 0.
+            cell_size = math.sqrt(area / size) * 2 if size else 1.
+        self.cell_size = max(float(cell_size), 1.)
+
+        self.cells = {}
+        for i in range(size):
+            self.cells.setdefault(self.cell(i), []).append(i)
+        columns = [column for column, _ in self.cells] or [0]
+        rows = [row for _, row in self.cells] or [0]
+        self.bounds = (min(columns), max(columns), min(rows), max(rows))
+
+    def cell(self, i):
+        return int(math.floor(self.xs[i] / self.cell_size)), int(math.floor(self.ys[i] / self.cell_size))
+
+    def distance(self, i, j):
+        return math.hypot(self.xs[i] - self.xs[j], self.ys[i] - self.ys[j])
+
+    def neighbours(self, i, k, radius=None):
+        """
+        The k nearest points of point i, in the plane projection
+
+        Args:
+            i (int): position of the point
+            k (int): number of neighbours
+            radius (float): in meters, farther points are ignored
+
+        Returns:
+            neighbours (list[int]): from the nearest to the farthest
+        """
+        column, row = self.cell(i)
+        min_column, max_column, min_row, max_row = self.bounds
+        # Beyond this ring, there are no more cells
+        max_ring = max(column - min_column, max_column - column, row - min_row, max_row - row)
+        if radius is not None:
+            max_ring = min(max_ring, int(math.ceil(radius / self.cell_size)))
+
+        candidates = []
+        for ring in range(max_ring + 1):
+            for cell in _ring(column, row, ring):
+                for j in self.cells.get(cell, []):
+                    if j != i:
+                        candidates.append((self.distance(i, j), j))
+            candidates.sort()
+            # The points of the following rings are farther than `ring` cells
+            if len(candidates) >= k and candidates[k - 1][0] <= ring * self.cell_size:
+                break
+        return [j for distance, j in candidates[:k] if radius is None or distance <= radius]
+
+
+def _ring(column, row, ring):
+    if ring == 0:
+        yield column, row
+        return
+    for c in range(column - ring, column + ring + 1):
+        yield c, row - ring
+        yield c, row + ring
+    for r in range(row - ring + 1, row + ring):
+        yield column - ring, r
+        yield column + ring, r
+
+
+class SparseDistances(object):
+    """
+    Distances between the points linked in the graph, the other pairs being at `penalty` meters.
+
+    `distances[i][j]` reads like a matrix, while only O(N.k) distances are stored.
+    """
+
+    def __init__(self, size, penalty=MISSING_ARC_PENALTY):
+        self.rows = [_SparseRow({i: 0}, penalty) for i in range(size)]
+        self.penalty = penalty
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+    def add(self, i, j, distance):
+        self.rows[i].distances[j] = distance
+        self.rows[j].distances[i] = distance
+
+    @property
+    def arc_count(self):
+        return sum(len(row.distances) for row in self.rows)
+
+    def to_matrix(self):
+        """The dense matrix, as expected by the routing solver"""
+        size = len(self.rows)
+        if np is None:
+            matrix = [[self.penalty] * size for _ in range(size)]
+            for i, row in enumerate(self.rows):
+                for j, distance in row.distances.items():
+                    matrix[i][j] = distance
+            return matrix
+        matrix = np.full((size, size), self.penalty, dtype=np.int64)
+        for i, row in enumerate(self.rows):
+            matrix[i, list(row.distances)] = list(row.distances.values())
+        return matrix.tolist()
+
+
+class _SparseRow(object):
+    __slots__ = ('distances', 'penalty')
+
+    def __init__(self, distances, penalty):
+        self.distances = distances
+        self.penalty = penalty
+
+    def __getitem__(self, j):
+        return self.distances.get(j, self.penalty)
+
+
+def sparse_distances(latitudes, longitudes, neighbours=DEFAULT_NEIGHBOURS, radius=None, dense_nodes=(),
+                     penalty=MISSING_ARC_PENALTY):
+    """Link each point to its nearest neighbours.
+
+    Args:
+        latitudes (list[float]): latitude of each point, in degrees
+        longitudes (list[float]): longitude of each point, in degrees
+        neighbours (int): number of nearest neighbours linked to each point
+        radius (float): in meters, farther neighbours are not linked
+        dense_nodes (list[int]): points linked to all the other ones, e.g. the start and end of the workers
+        penalty (int): distance of the pairs that are not linked
+
+    Returns:
+        distances (SparseDistances): the arcs are symmetric, with their haversine distance in meters
+    """
+    if len(latitudes) != len(longitudes):
+        raise ValueError('Latitudes and longitudes must have the same length')
+    size = len(latitudes)
+    distances = SparseDistances(size, penalty)
+    if not size:
+        return distances
+
+    # The dense nodes are linked apart: as neighbours, they would take the place of the nearest other points
+    dense = set(dense_nodes)
+    nodes = [i for i in range(size) if i not in dense]
+    index = GridIndex([latitudes[i] for i in nodes], [longitudes[i] for i in nodes])
+    for position, i in enumerate(nodes):
+        _link(distances, latitudes, longitudes, i, [nodes[j] for j in index.neighbours(position, neighbours, radius)])
+    for i in dense:
+        _link(distances, latitudes, longitudes, i, [j for j in range(size) if j != i])
+    return distances
+
+
+def _link(distances, latitudes, longitudes, i, others):
+    if not others:
+        return
+    row = haversine_matrix([latitudes[i]], [longitudes[i]], to_latitudes=[latitudes[j] for j in others],
+                           to_longitudes=[longitudes[j] for j in others])[0]
+    for j, distance in zip(others, row):
+        distances.add(i, j, distance)
@@ -24,3 +24,47 @@ class SolverStatus(object):
         :return: bool
         """
         return status in [cls.OPTIMAL, cls.FEASIBLE]
+
+
+# Routing search settings by preset name: the strategies are names of the OR-Tools enums FirstSolutionStrategy and
+# LocalSearchMetaheuristic, the time limit is in seconds and a limit of None means no limit.
+SEARCH_PRESETS = {
+    'fast': {
+        'first_solution_strategy': 'PATH_CHEAPEST_ARC',
+        'local_search_metaheuristic': 'GREEDY_DESCENT',
+        'time_limit': 10,
+        'solution_limit': None,
+    },
+    'balanced': {
+        'first_solution_strategy': 'PATH_CHEAPEST_ARC',
+        'local_search_metaheuristic': 'GUIDED_LOCAL_SEARCH',
+        'time_limit': 60,
+        'solution_limit': None,
+    },
+    'best': {
+        'first_solution_strategy': 'PARALLEL_CHEAPEST_INSERTION',
+        'local_search_metaheuristic': 'GUIDED_LOCAL_SEARCH',
+        'time_limit': 300,
+        'solution_limit': None,
+    },
+}
+# Names accepted for the strategies of the presets, as in the OR-Tools enums
+FIRST_SOLUTION_STRATEGIES = (
+    'AUTOMATIC', 'PATH_CHEAPEST_ARC', 'PATH_MOST_CONSTRAINED_ARC', 'EVALUATOR_STRATEGY', 'SAVINGS', 'SWEEP',
+    'CHRISTOFIDES', 'ALL_UNPERFORMED', 'BEST_INSERTION', 'PARALLEL_CHEAPEST_INSERTION',
+    'SEQUENTIAL_CHEAPEST_INSERTION', 'LOCAL_CHEAPEST_INSERTION', 'GLOBAL_CHEAPEST_ARC', 'LOCAL_CHEAPEST_ARC',
+    'FIRST_UNBOUND_MIN_VALUE',
+)
+LOCAL_SEARCH_METAHEURISTICS = (
+    'AUTOMATIC', 'GREEDY_DESCENT', 'GUIDED_LOCAL_SEARCH', 'SIMULATED_ANNEALING', 'TABU_SEARCH', 'GENERIC_TABU_SEARCH',
+)
+# Like the solver used to do, stop at the first local optimum: the guided local search of the other presets
+# always runs until its time limit, and is opt-in
+DEFAULT_SEARCH_PRESET = 'fast'
+# Starting from the previous itinerary, a greedy descent reaches a nearby local optimum and stops by itself
+DEFAULT_REPLAN_PRESET = 'fast'
+
+# Engines forming the couples: CP-SAT enumerates several best configurations, the blossom algorithm
+# of the maximum weight matching finds one of them, in polynomial time
+COUPLE_ENGINES = ('cp-sat', 'matching')
+DEFAULT_COUPLE_ENGINE = 'cp-sat'
@@ -0,0 +1,64 @@
+from itertools import islice
+from typing import Iterable, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.database.models import db
+
+BULK_CHUNK_SIZE = 1000  # Number of records validated and written per transaction
+
+
+def bulk_insert(model, schema, records: Iterable[dict], chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[dict, int]:
+    """
+    Validate and insert records by chunks, with one executemany and one transaction per chunk.
+
+    Invalid records are skipped and reported by their position in `records`, the others are inserted.
+    """
+    inserted = 0
+    errors = {}
+    records = iter(records)
+    offset = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        positions = []
+        for index, record in enumerate(chunk):
+            if isinstance(record, dict):
+                positions.append(offset + index)
+            else:
+                errors[offset + index] = {'_schema': ['Invalid input type.']}
+
+        deserialized_records, validation_errors = schema.load([chunk[p - offset] for p in positions], many=True)
+        mappings = []
+        for index, deserialized_record in enumerate(deserialized_records):
+            if index in validation_errors:
+                errors[positions[index]] = validation_errors[index]
+            else:
+                mappings.append(_as_mapping(deserialized_record))
+
+        if mappings:
+            try:
+                db.session.bulk_insert_mappings(model, mappings)
+                db.session.commit()
+                inserted += len(mappings)
+            except SQLAlchemyError as error:
+                db.session.rollback()
+                for position in positions:
+                    errors.setdefault(position, {'_database': [str(getattr(error, 'orig', None) or error)]})
+        offset += len(chunk)
+
+    report = {'inserted': inserted, 'errors': errors}
+    if not errors:
+        return report, 201
+    if not inserted:
+        return report, 400
+    return report, 207
+
+
+def _as_mapping(deserialized_record) -> dict:
+    # The schemas build model instances, unless the chunk has errors in which case they return the loaded dicts
+    if isinstance(deserialized_record, dict):
+        return deserialized_record
+    return {key: value for key, value in vars(deserialized_record).items() if not key.startswith('_')}
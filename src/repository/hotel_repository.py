@@ -1,11 +1,15 @@
-from typing import Optional, Union, List, Tuple
+from typing import Optional, Union, List, Tuple, Iterable, Iterator
 
 from src.database.models import db
 from src.database.models.hotel import Hotel
 from src.logging.mixin import LoggingMixin
+from src.repository.bulk import bulk_insert
+from src.repository.pagination import keyset_page, stream_rows, DEFAULT_PAGE_SIZE
 
 
 class HotelRepository(LoggingMixin):
+    filterable_fields = ('name',)  # Indexed columns
+
     def __init__(self, hotel_schema):
         self.hotel_schema = hotel_schema
 
@@ -21,6 +25,11 @@ class HotelRepository(LoggingMixin):
 
         return {'message': 'Success'}, 201
 
+    def insert_many(self, hotels_to_add: Iterable[dict]) -> Tuple[dict, int]:
+        report, status = bulk_insert(Hotel, self.hotel_schema, hotels_to_add)
+        self.logger.debug('Inserted {} hotels, {} rejected'.format(report['inserted'], len(report['errors'])))
+        return report, status
+
     def get(self, hotel_id: Optional[int] = None) -> Tuple[Union[dict, List[dict]], int]:
         if hotel_id is not None:
             deserialized_hotel = Hotel.query.get(hotel_id)
@@ -37,6 +46,14 @@ class HotelRepository(LoggingMixin):
                 return errors, 400
             return serialized_hotels, 200
 
+    def get_page(self, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                 fields: Optional[List[str]] = None, filters: Optional[dict] = None) -> Tuple[dict, int]:
+        return keyset_page(Hotel, self.hotel_schema, self.filterable_fields, after, limit, fields, filters)
+
+    def stream(self, after: Optional[int] = None, fields: Optional[List[str]] = None,
+               filters: Optional[dict] = None) -> Tuple[Optional[Iterator[dict]], dict]:
+        return stream_rows(Hotel, self.hotel_schema, self.filterable_fields, after, fields, filters)
+
     def update(self, hotel_id: int, updates: dict) -> Tuple[Union[dict, List[dict]], int]:
         validate_updates, validation_errors = self.hotel_schema.load(updates)
         if validation_errors:
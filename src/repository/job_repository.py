@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+from typing import Tuple
+
+from src.database.models import db
+from src.database.models.job import Job
+from src.logging.mixin import LoggingMixin
+from src.services.job_runner import JobStatus
+
+
+class JobRepository(LoggingMixin):
+    def __init__(self, job_schema, job_runner):
+        self.job_schema = job_schema
+        self.job_runner = job_runner
+
+    def insert(self, kind: str, parameters_schema, parameters: dict) -> Tuple[dict, int]:
+        validated_parameters, errors = parameters_schema.load(parameters or {})
+        if errors:
+            return errors, 400
+
+        job = Job(
+            kind=kind,
+            status=JobStatus.PENDING,
+            progress=0.,
+            timeout=validated_parameters.pop('timeout', None),
+            parameters=json.dumps(validated_parameters),
+            created_at=datetime.utcnow(),
+        )
+        db.session.add(job)
+        db.session.commit()
+        self.logger.debug('Submitting {} job {}'.format(kind, job.id))
+        self.job_runner.submit(job.id)
+
+        return self.get(job.id)[0], 202
+
+    def get(self, job_id: int) -> Tuple[dict, int]:
+        job = Job.query.get(job_id)
+        if not job:
+            return {'message': 'Job not found'}, 404
+        serialized_job, errors = self.job_schema.dump(job)
+        if errors:
+            return errors, 400
+        return serialized_job, 200
+
+    def cancel(self, job_id: int) -> Tuple[dict, int]:
+        job = Job.query.get(job_id)
+        if not job:
+            return {'message': 'Job not found'}, 404
+        if JobStatus.finished(job.status):
+            return {'message': 'Job already {}'.format(job.status)}, 409
+
+        # A pending job is cancelled right away, a running one is stopped by the job runner
+        if job.status == JobStatus.PENDING:
+            job.status = JobStatus.CANCELLED
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = JobStatus.CANCELLING
+        db.session.commit()
+        return self.get(job_id)
@@ -0,0 +1,89 @@
+from typing import Iterable, Iterator, Optional, Tuple
+
+from marshmallow import ValidationError
+
+from src.database.models import db
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000  # Number of rows fetched from the server side cursor at once
+
+
+def keyset_page(model, schema, filterable_fields: Iterable[str], after: Optional[int] = None,
+                limit: int = DEFAULT_PAGE_SIZE, fields: Optional[Iterable[str]] = None,
+                filters: Optional[dict] = None) -> Tuple[dict, int]:
+    """
+    Select one page of rows ordered by id, starting after the `after` id (the cursor).
+
+    Only the columns of the requested `fields` are selected, and `filters` is a mapping of
+    field to value restricted to the `filterable_fields`, which are indexed columns.
+    """
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return {'limit': ['Must be between 1 and {}.'.format(MAX_PAGE_SIZE)]}, 400
+    query, projection_schema, errors = _projected_query(model, schema, filterable_fields, after, fields, filters)
+    if errors:
+        return errors, 400
+
+    rows = query.limit(limit).all()
+    serialized_rows, errors = projection_schema.dump([row._asdict() for row in rows], many=True)
+    if errors:
+        return errors, 400
+
+    next_cursor = rows[-1].id if len(rows) == limit else None
+    return {'items': serialized_rows, 'next_cursor': next_cursor}, 200
+
+
+def stream_rows(model, schema, filterable_fields: Iterable[str], after: Optional[int] = None,
+                fields: Optional[Iterable[str]] = None,
+                filters: Optional[dict] = None) -> Tuple[Optional[Iterator[dict]], dict]:
+    """
+    Same selection as `keyset_page` without limit, read through a server side cursor and
+    serialized chunk by chunk, so that the whole table is never held in memory.
+
+    Returns the generator of serialized rows, or None and the errors of the parameters.
+    """
+    query, projection_schema, errors = _projected_query(model, schema, filterable_fields, after, fields, filters)
+    if errors:
+        return None, errors
+    rows = query.execution_options(stream_results=True).yield_per(EXPORT_CHUNK_SIZE)
+    return _serialize_by_chunks(rows, projection_schema), {}
+
+
+def _projected_query(model, schema, filterable_fields, after, fields, filters):
+    fields = list(fields) if fields else list(schema.fields)
+    unknown_fields = [field for field in fields if field not in schema.fields]
+    if unknown_fields:
+        return None, None, {'fields': ['Unknown field(s): {}'.format(', '.join(unknown_fields))]}
+
+    filters = filters or {}
+    unknown_filters = [field for field in filters if field not in filterable_fields]
+    if unknown_filters:
+        return None, None, {'filters': ['Cannot filter on: {}'.format(', '.join(unknown_filters))]}
+
+    columns = [model.id] + [_column(model, schema, field) for field in fields if field != 'id']
+    query = db.session.query(*columns)
+    for field, value in filters.items():
+        try:
+            value = schema.fields[field].deserialize(value)
+        except ValidationError as error:
+            return None, None, {field: error.messages}
+        query = query.filter(_column(model, schema, field) == value)
+    if after is not None:
+        query = query.filter(model.id > after)
+
+    return query.order_by(model.id), type(schema)(only=fields), {}
+
+
+def _serialize_by_chunks(rows, projection_schema) -> Iterator[dict]:
+    chunk = []
+    for row in rows:
+        chunk.append(row._asdict())
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield from projection_schema.dump(chunk, many=True).data
+            chunk = []
+    if chunk:
+        yield from projection_schema.dump(chunk, many=True).data
+
+
+def _column(model, schema, field):
+    return getattr(model, schema.fields[field].attribute or field)
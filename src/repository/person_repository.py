@@ -1,11 +1,15 @@
-from typing import Optional, Union, List, Tuple
+from typing import Optional, Union, List, Tuple, Iterable, Iterator
 
 from src.database.models import db
 from src.database.models.person import Person
 from src.logging.mixin import LoggingMixin
+from src.repository.bulk import bulk_insert
+from src.repository.pagination import keyset_page, stream_rows, DEFAULT_PAGE_SIZE
 
 
 class PersonRepository(LoggingMixin):
+    filterable_fields = ('name', 'has_driving_license')  # Indexed columns
+
     def __init__(self, person_schema):
         self.person_schema = person_schema
 
@@ -21,6 +25,11 @@ class PersonRepository(LoggingMixin):
 
         return {'message': 'Success'}, 201
 
+    def insert_many(self, persons_to_add: Iterable[dict]) -> Tuple[dict, int]:
+        report, status = bulk_insert(Person, self.person_schema, persons_to_add)
+        self.logger.debug('Inserted {} persons, {} rejected'.format(report['inserted'], len(report['errors'])))
+        return report, status
+
     def get(self, person_id: Optional[int] = None) -> Tuple[Union[dict, List[dict]], int]:
         if person_id is not None:
             deserialized_person = Person.query.get(person_id)
@@ -37,6 +46,14 @@ class PersonRepository(LoggingMixin):
                 return errors, 400
             return serialized_persons, 200
 
+    def get_page(self, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                 fields: Optional[List[str]] = None, filters: Optional[dict] = None) -> Tuple[dict, int]:
+        return keyset_page(Person, self.person_schema, self.filterable_fields, after, limit, fields, filters)
+
+    def stream(self, after: Optional[int] = None, fields: Optional[List[str]] = None,
+               filters: Optional[dict] = None) -> Tuple[Optional[Iterator[dict]], dict]:
+        return stream_rows(Person, self.person_schema, self.filterable_fields, after, fields, filters)
+
     def update(self, person_id: int, updates: dict) -> Tuple[Union[dict, List[dict]], int]:
         validate_updates, validation_errors = self.person_schema.load(updates)
         if validation_errors:
@@ -1,11 +1,15 @@
-from typing import Optional, Union, List, Tuple
+from typing import Optional, Union, List, Tuple, Iterable, Iterator
 
 from src.database.models import db
 from src.database.models.visit import Visit
 from src.logging.mixin import LoggingMixin
+from src.repository.bulk import bulk_insert
+from src.repository.pagination import keyset_page, stream_rows, DEFAULT_PAGE_SIZE
 
 
 class VisitRepository(LoggingMixin):
+    filterable_fields = ('type',)  # Indexed columns
+
     def __init__(self, visit_schema):
         self.visit_schema = visit_schema
 
@@ -21,6 +25,11 @@ class VisitRepository(LoggingMixin):
 
         return {'message': 'Success'}, 201
 
+    def insert_many(self, visits_to_add: Iterable[dict]) -> Tuple[dict, int]:
+        report, status = bulk_insert(Visit, self.visit_schema, visits_to_add)
+        self.logger.debug('Inserted {} visits, {} rejected'.format(report['inserted'], len(report['errors'])))
+        return report, status
+
     def get(self, visit_id: Optional[int] = None) -> Tuple[Union[dict, List[dict]], int]:
         if visit_id is not None:
             deserialized_visit = Visit.query.get(visit_id)
@@ -37,6 +46,14 @@ class VisitRepository(LoggingMixin):
                 return errors, 400
             return serialized_visits, 200
 
+    def get_page(self, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                 fields: Optional[List[str]] = None, filters: Optional[dict] = None) -> Tuple[dict, int]:
+        return keyset_page(Visit, self.visit_schema, self.filterable_fields, after, limit, fields, filters)
+
+    def stream(self, after: Optional[int] = None, fields: Optional[List[str]] = None,
+               filters: Optional[dict] = None) -> Tuple[Optional[Iterator[dict]], dict]:
+        return stream_rows(Visit, self.visit_schema, self.filterable_fields, after, fields, filters)
+
     def update(self, visit_id: int, updates: dict) -> Tuple[Union[dict, List[dict]], int]:
         validate_updates, validation_errors = self.visit_schema.load(updates)
         if validation_errors:
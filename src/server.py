@@ -8,6 +8,7 @@ from flask_migrate import Migrate
 from src.api.index import index_blueprint
 from src.api.ping import ping_blueprint
 from src.api.v1.hotel import hotel_blueprint
+from src.api.v1.job import job_blueprint
 from src.api.v1.person import person_blueprint
 from src.api.v1.score import score_blueprint
 from src.api.v1.visit import visit_blueprint
@@ -15,6 +16,7 @@ from src.configuration import Configuration
 from src.database.models import db
 from src.database.models.person import Person
 from src.logging.mixin import LoggingMixin
+from src.services.job_runner import job_runner
 
 logger = LoggingMixin().logger
 
@@ -28,6 +30,8 @@ def create_api(configuration: Configuration) -> Flask:
     api.config['SQLALCHEMY_DATABASE_URI'] = configuration.database_uri
     api.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     api.config['SQLALCHEMY_ECHO'] = os.environ.get('SQLALCHEMY_ECHO', False)
+    api.config['JOB_WORKERS'] = configuration.job_workers
+    api.config['JOB_TIMEOUT'] = configuration.job_timeout
 
     _register_blueprints(api)
 
@@ -44,6 +48,7 @@ def _register_blueprints(api_application: Flask) -> None:
     api_application.register_blueprint(hotel_blueprint)
     api_application.register_blueprint(visit_blueprint)
     api_application.register_blueprint(score_blueprint)
+    api_application.register_blueprint(job_blueprint)
 
 
 def _initialize_admin_console(api_application: Flask) -> None:
@@ -56,4 +61,5 @@ def _initialize_admin_console(api_application: Flask) -> None:
 configuration = Configuration()
 api = create_api(configuration)
 db.init_app(api)
+job_runner.init_app(api)
 migration = Migrate(api, db)
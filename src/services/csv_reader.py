@@ -17,93 +17,225 @@ import csv
 import argparse
 import json
 
+# Position of each column when the header of the file does not name it
+PEOPLE_COLUMNS = {
+    'name': 0,
+    'surname': 1,
+    'address': [2, 3, 4, 5],
+    'postcode': 6,
+    'license': 7,
+    'availability': 8,
+    'time_of_day': 9,
+    'area1': 10,
+    'area2': 11,
+    'area3': 12,
+    'area4': 13,
+}
+HOTEL_COLUMNS = {
+    'hotel_status': 2,
+    'nom': 6,
+    'address': [7, 9],
+    'postcode': 8,
+    'capacity': 41,
+    'bedroom_number': 43,
+    'features': list(range(62, 150)),
+}
+ENRICHED_PEOPLE_COLUMNS = {
+    'address': 0,
+    'area1': 1,
+    'area2': 2,
+    'area3': 3,
+    'area4': 4,
+    'availability': 5,
+    'latitude': 6,
+    'license': 7,
+    'longitude': 8,
+    'name': 9,
+    'postcode': 11,
+    'surname': 12,
+    'time_of_day': 13,
+}
+ENRICHED_HOTEL_COLUMNS = {
+    'address': 0,
+    'bedroom_number': 1,
+    'capacity': 2,
+    'features': 3,
+    'hotel_status': 4,
+    'latitude': 5,
+    'longitude': 6,
+    'nom': 7,
+    'postcode': 9,
+}
+COLUMNS = {
+    ('people', False): PEOPLE_COLUMNS,
+    ('hotel', False): HOTEL_COLUMNS,
+    ('people', True): ENRICHED_PEOPLE_COLUMNS,
+    ('hotel', True): ENRICHED_HOTEL_COLUMNS,
+}
+
+
+def iter_csv(source, csv_type, enriched=False):
+    """
+    Read a csv file row by row, without loading it in memory.
+
+    The columns are looked up by their name in the header of the file, and fall back to their
+    historical position when the header does not name them.
+
+    Args:
+        source(string): absolute path to the file to process
+        csv_type(string): type of csv file, `hotel` or `people`
+        enriched(bool): whether the file was already enriched with the geographic point of each address
+
+    Yields:
+        record(dict): a hotel or a person, with numbers and geographic points already converted
+    """
+    if (csv_type, enriched) not in COLUMNS:
+        raise ValueError('Unknown csv type: {}'.format(csv_type))
+
+    with open(source, "r", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";")
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = map_columns(header, COLUMNS[(csv_type, enriched)])
+        make_record = _RECORD_MAKERS[(csv_type, enriched)]
+
+        for line in reader:
+            record = make_record(_Row(line), columns)
+            if record is not None:
+                yield record
+
+
+def map_columns(header, default_columns):
+    """
+    Args:
+        header(list[str]): first line of the csv file
+        default_columns(dict[str: int|list[int]]): position of each column when the header does not name it
+
+    Returns:
+        columns(dict[str: int|list[int]]): position of each column in the file
+    """
+    positions = {name.strip().lower(): position for position, name in enumerate(header)}
+    columns = {}
+    for field, default_position in default_columns.items():
+        if field not in positions:
+            columns[field] = default_position
+        elif isinstance(default_position, list):
+            columns[field] = [positions[field]]
+        else:
+            columns[field] = positions[field]
+    return columns
+
+
+class _Row(object):
+    """Give access to the cells of a csv line, missing cells being empty"""
+    __slots__ = ('line',)
+
+    def __init__(self, line):
+        self.line = line
+
+    def __getitem__(self, position):
+        if isinstance(position, list):
+            return ' '.join(' '.join(self[p] for p in position).split())
+        return self.line[position] if position < len(self.line) else ''
+
+
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _to_point(latitude, longitude):
+    if not (latitude and longitude):
+        return None
+    return {'latitude': float(latitude), 'longitude': float(longitude)}
+
+
+def _make_people(row, columns):
+    return {
+        'name': row[columns['name']],
+        'surname': row[columns['surname']],
+        'address': row[columns['address']],
+        'postcode': row[columns['postcode']],
+        'license': row[columns['license']],
+        'availability': row[columns['availability']],
+        'time_of_day': row[columns['time_of_day']],
+        'area1': row[columns['area1']],
+        'area2': row[columns['area2']],
+        'area3': row[columns['area3']],
+        'area4': row[columns['area4']],
+    }
+
+
+def _make_hotel(row, columns):
+    if row[columns['hotel_status']] != "0":  # Only consider non removed hotel
+        return None
+    return {
+        'hotel_status': row[columns['hotel_status']],
+        'nom': row[columns['nom']],
+        'address': row[columns['address']],
+        'postcode': row[columns['postcode']],
+        'capacity': _to_int(row[columns['capacity']], default=None),
+        'bedroom_number': _to_int(row[columns['bedroom_number']], default=None),
+        'features': sum(_to_int(row[position]) for position in columns['features']),
+    }
+
+
+def _make_enriched_people(row, columns):
+    return {
+        'address': row[columns['address']],
+        'area1': row[columns['area1']],
+        'area2': row[columns['area2']],
+        'area3': row[columns['area3']],
+        'area4': row[columns['area4']],
+        'availability': row[columns['availability']],
+        'license': row[columns['license']],
+        'name': row[columns['name']],
+        'point': _to_point(row[columns['latitude']], row[columns['longitude']]),
+        'postcode': row[columns['postcode']],
+        'surname': row[columns['surname']],
+        'time_of_day': row[columns['time_of_day']],
+    }
+
+
+def _make_enriched_hotel(row, columns):
+    return {
+        'address': row[columns['address']],
+        'bedroom_number': _to_int(row[columns['bedroom_number']], default=None),
+        'capacity': _to_int(row[columns['capacity']], default=None),
+        'features': _to_int(row[columns['features']]),
+        'hotel_status': row[columns['hotel_status']],
+        'nom': row[columns['nom']],
+        'point': _to_point(row[columns['latitude']], row[columns['longitude']]),
+        'postcode': row[columns['postcode']],
+    }
+
+
+_RECORD_MAKERS = {
+    ('people', False): _make_people,
+    ('hotel', False): _make_hotel,
+    ('people', True): _make_enriched_people,
+    ('hotel', True): _make_enriched_hotel,
+}
+
 
 class CsvReader(object):
     def parse(self, source, csv_type):
-        results = []
-
-        with open(source, "r", encoding="utf-8") as f:
-            reader = csv.reader(f, delimiter=";")
-            data = {i: j for i, j in enumerate(reader)}
-            for i, line in data.items():
-                if csv_type == "people" and i > 0:
-                    formatted_address = '{} {} {} {}'.format(line[2], line[3], line[4], line[5])
-                    people = {
-                        'name': line[0],
-                        'surname': line[1],
-                        'address': ' '.join(formatted_address.split()),
-                        'postcode': line[6],
-                        'license': line[7],
-                        'availability': line[8],
-                        'time_of_day': line[9],
-                        'area1': line[10],
-                        'area2': line[11],
-                        'area3': line[12],
-                        'area4': line[13],
-                    }
-                    results.append(people)
-                if csv_type == "hotel" and i > 0:
-                    if line[2] == "0":  # Only consider non removed hotel
-                        formatted_address = "{} {}".format(line[7], line[9])
-                        hotel = {
-                            'hotel_status': line[2],
-                            'nom': line[6],
-                            'address': ' '.join(formatted_address.split()),
-                            'postcode': line[8],
-                            'capacity': line[41],
-                            'bedroom_number': line[43],
-                            'features': sum([int(line[i]) for i, line in enumerate(reader) if i in range(62, 150)]),
-                            ### Should not
-                        }
-                        results.append(hotel)
-
-        return results
+        return list(iter_csv(source, csv_type))
 
     def parse_enriched(self, source, csv_type):
-        results = []
-
-        with open(source, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter=';')
-            data = {i: j for i, j in enumerate(reader)}
-            for i, line in data.items():
-                if csv_type == 'people' and i > 0:
-                    point = {'latitude': float(line[6]), 'longitude': float(line[8])} if (line[6] and line[8]) else None
-                    people = {
-                        'address': line[0],
-                        'area1': line[1],
-                        'area2': line[2],
-                        'area3': line[3],
-                        'area4': line[4],
-                        'availability': line[5],
-                        'license': line[7],
-                        'name': line[9],
-                        'point': point,
-                        'postcode': line[11],
-                        'surname': line[12],
-                        'time_of_day': line[13],
-                    }
-                    results.append(people)
-                if csv_type == 'hotel' and i > 0:
-                    point = {'latitude': float(line[5]), 'longitude': float(line[6])} if (line[5] and line[6]) else None
-                    hotel = {
-                        'address': line[0],
-                        'bedroom_number': line[1],
-                        'capacity': line[2],
-                        'features': line[3],
-                        'hotel_status': line[4],
-                        'nom': line[7],
-                        'point': point,
-                        'postcode': line[9],
-                    }
-                    results.append(hotel)
-        return results
-
-
-def parse_csv(source, csv_type, write=False):
+        return list(iter_csv(source, csv_type, enriched=True))
+
+
+def parse_csv(source, csv_type, write=False, stream=False):
     """
     Args:
     source(string): absolute path to the file to process
     csv_type(string): type of csv file, hotel data or volunteer data
+    write(bool): write the records to a json file next to the source
+    stream(bool): return a generator of the records instead of a list
 
     Return:
         json_path: path to the file containing the adress as json format.
@@ -111,47 +243,21 @@ def parse_csv(source, csv_type, write=False):
     f_name = source.split(".")[0]
     json_path = "{0}-{1}.json".format(f_name, csv_type)
 
-    results = []
-    with open(source, "r", encoding="utf-8") as f:
-        reader = csv.reader(f, delimiter=";")
-        data = {i: j for i, j in enumerate(reader)}
-        for i, line in data.items():
-            if csv_type == "people" and i > 0:
-                formatted_address = '{} {} {} {}'.format(line[2], line[3], line[4], line[5])
-                people = {
-                    'name': line[0],
-                    'surname': line[1],
-                    'address': ' '.join(formatted_address.split()),
-                    'postcode': line[6],
-                    'license': line[7],
-                    'availability': line[8],
-                    'time_of_day': line[9],
-                    'area1': line[10],
-                    'area2': line[11],
-                    'area3': line[12],
-                    'area4': line[13],
-                }
-                results.append(people)
-            if csv_type == "hotel" and i > 0:
-                if line[2] == "0":  # Only consider non removed hotel
-                    formatted_address = "{} {}".format(line[7], line[9])
-                    hotel = {
-                        'hotel_status': line[2],
-                        'nom': line[6],
-                        'address': ' '.join(formatted_address.split()),
-                        'postcode': line[8],
-                        'capacity': line[41],
-                        'bedroom_number': line[43],
-                        'features': sum([int(line[i]) for i, line in enumerate(reader) if i in range(62, 150)]),
-                    }
-                    results.append(hotel)
+    records = iter_csv(source, csv_type)
 
     if write:
         with open(json_path, "w", encoding="utf8") as outfile:
-            json.dump(results, outfile, ensure_ascii=False)
+            outfile.write("[")
+            for i, record in enumerate(records):
+                if i > 0:
+                    outfile.write(", ")
+                json.dump(record, outfile, ensure_ascii=False)
+            outfile.write("]")
         return json_path
 
-    return results
+    if stream:
+        return records
+    return list(records)
 
 
 if __name__ == "__main__":
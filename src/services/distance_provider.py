@@ -0,0 +1,212 @@
+"""
+Providers of the matrix of distances between geographic points.
+
+    - `HaversineProvider`: great-circle distance, in meters
+    - `ManhattanProvider`: distance along the axes of a street grid, in meters, a better proxy in a dense city
+    - `TableProvider`: distance or duration on the road network, asked to an OSRM compatible `table` service
+"""
+import math
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.domain.distance_matrix import DISTANCE_DTYPE, EARTH_RADIUS, haversine_matrix, np
+
+OSRM_URL = os.environ.get('OSRM_URL', 'http://router.project-osrm.org')
+ORIGINS_PER_REQUEST = 50  # Number of origins of each table request, all the destinations being asked at once
+UNREACHABLE = 1000000  # Distance given to the pairs that the road network does not connect
+REQUEST_TIMEOUT = 60  # seconds
+
+
+class DistanceProvider(object):
+    name: Optional[str] = None
+    unit = 'meters'  # or 'seconds' for the providers of travel durations
+
+    def matrix(self, latitudes, longitudes, to_latitudes=None, to_longitudes=None, as_array=False):
+        """
+        Args:
+            latitudes (list[float]): latitude of each origin, in degrees
+            longitudes (list[float]): longitude of each origin, in degrees
+            to_latitudes (list[float]): latitude of each destination, the origins by default
+            to_longitudes (list[float]): longitude of each destination, the origins by default
+            as_array (bool): return an int32 array instead of lists, when NumPy is available
+
+        Returns:
+            distances (list[list[int]]): distances[i][j] from origin i to destination j
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _output(distances, as_array):
+        if np is None:
+            return distances
+        distances = np.asarray(distances, dtype=DISTANCE_DTYPE)
+        return distances if as_array else distances.tolist()
+
+
+class HaversineProvider(DistanceProvider):
+    name = 'haversine'
+
+    def matrix(self, latitudes, longitudes, to_latitudes=None, to_longitudes=None, as_array=False):
+        return haversine_matrix(latitudes, longitudes, to_latitudes=to_latitudes, to_longitudes=to_longitudes,
+                                as_array=as_array)
+
+
+class ManhattanProvider(DistanceProvider):
+    """
+    Sum of the distances along the two axes of a street grid, the points being projected on a plane.
+
+    `orientation` is the angle in degrees between the streets and the meridians.
+    """
+    name = 'manhattan'
+
+    def __init__(self, orientation=0.):
+        self.orientation = orientation
+
+    def matrix(self, latitudes, longitudes, to_latitudes=None, to_longitudes=None, as_array=False):
+        if to_latitudes is None:
+            to_latitudes, to_longitudes = latitudes, longitudes
+        reference = math.radians((sum(latitudes) + sum(to_latitudes)) / max(1, len(latitudes) + len(to_latitudes)))
+        origins = [self._project(latitude, longitude, reference) for latitude, longitude in zip(latitudes, longitudes)]
+        destinations = [
+            self._project(latitude, longitude, reference) for latitude, longitude in zip(to_latitudes, to_longitudes)
+        ]
+        if np is None:
+            return [[int(round(abs(x - to_x) + abs(y - to_y))) for to_x, to_y in destinations] for x, y in origins]
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        distances = np.rint(
+            np.abs(origins[:, None, 0] - destinations[None, :, 0]) +
+            np.abs(origins[:, None, 1] - destinations[None, :, 1])
+        )
+        return self._output(distances, as_array)
+
+    def _project(self, latitude, longitude, reference):
+        # Equirectangular projection in meters, rotated along the street grid
+        x = EARTH_RADIUS * 1000 * math.radians(longitude) * math.cos(reference)
+        y = EARTH_RADIUS * 1000 * math.radians(latitude)
+        angle = math.radians(self.orientation)
+        return x * math.cos(angle) - y * math.sin(angle), x * math.sin(angle) + y * math.cos(angle)
+
+
+class TableProvider(DistanceProvider):
+    """
+    Distances on the road network, asked to the `table` service of an OSRM server.
+
+    One request is sent per block of `origins_per_request` origins, with all the destinations. The rows
+    already received are cached, by origin and destination, so that only the new points are asked again.
+    """
+    name = 'osrm'
+
+    def __init__(self, url=OSRM_URL, profile='driving', annotation='distance', origins_per_request=ORIGINS_PER_REQUEST,
+                 unreachable=UNREACHABLE):
+        """
+        Args:
+            url (str): root of the OSRM server
+            profile (str): e.g. driving, foot, bike, as configured on the server
+            annotation (str): `distance` in meters or `duration` in seconds, see `unit`
+            origins_per_request (int): the server max-table-size must allow this many origins plus all destinations
+            unreachable (int): value of the pairs that are not connected
+        """
+        if annotation not in ('distance', 'duration'):
+            raise ValueError('Unknown annotation: {}'.format(annotation))
+        self.url = url.rstrip('/')
+        self.profile = profile
+        self.annotation = annotation
+        self.unit = 'seconds' if annotation == 'duration' else 'meters'
+        self.origins_per_request = origins_per_request
+        self.unreachable = unreachable
+        self._rows = {}  # origin: {destination: value}
+        self._lock = threading.Lock()
+        self._session = None
+
+    def __getstate__(self):
+        # The session and lock cannot be sent to another process
+        state = dict(self.__dict__)
+        state['_lock'], state['_session'] = None, None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.mount('http://', HTTPAdapter(max_retries=3))
+            self._session.mount('https://', HTTPAdapter(max_retries=3))
+        return self._session
+
+    def matrix(self, latitudes, longitudes, to_latitudes=None, to_longitudes=None, as_array=False):
+        if to_latitudes is None:
+            to_latitudes, to_longitudes = latitudes, longitudes
+        origins = list(zip(latitudes, longitudes))
+        destinations = list(zip(to_latitudes, to_longitudes))
+
+        with self._lock:
+            unique_destinations = sorted(set(destinations))
+            # The new origins are asked all the destinations, the known ones only the new destinations
+            new_origins = sorted({origin for origin in origins if origin not in self._rows})
+            known_origins = sorted({origin for origin in origins if origin in self._rows})
+            new_destinations = [
+                destination for destination in unique_destinations
+                if any(destination not in self._rows[origin] for origin in known_origins)
+            ]
+            self._fetch(new_origins, unique_destinations)
+            self._fetch(known_origins if new_destinations else [], new_destinations)
+
+            distances = [[self._rows[origin][destination] for destination in destinations] for origin in origins]
+        return self._output(distances, as_array)
+
+    def _fetch(self, origins, destinations):
+        for start in range(0, len(origins), self.origins_per_request):
+            block = origins[start:start + self.origins_per_request]
+            for origin, row in zip(block, self._table(block, destinations)):
+                self._rows.setdefault(origin, {}).update(zip(destinations, row))
+
+    def _table(self, origins, destinations):
+        # Each point is sent once, the sources and destinations being positions in the list of coordinates
+        points = list(origins) + sorted(set(destinations).difference(origins))
+        position = {point: i for i, point in enumerate(points)}
+        coordinates = ';'.join('{},{}'.format(longitude, latitude) for latitude, longitude in points)
+        response = self.session.get(
+            '{}/table/v1/{}/{}'.format(self.url, self.profile, coordinates),
+            params={
+                'sources': ';'.join(str(position[origin]) for origin in origins),
+                'destinations': ';'.join(str(position[destination]) for destination in destinations),
+                'annotations': self.annotation,
+            },
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        body = response.json()
+        if body.get('code') != 'Ok':
+            raise ValueError('The table service failed: {}'.format(body.get('message', body.get('code'))))
+        return [
+            [self.unreachable if value is None else int(round(value)) for value in row]
+            for row in body['{}s'.format(self.annotation)]
+        ]
+
+
+PROVIDERS = {
+    HaversineProvider.name: HaversineProvider,
+    ManhattanProvider.name: ManhattanProvider,
+    TableProvider.name: TableProvider,
+}
+
+
+def get_provider(name):
+    """
+    Args:
+        name (str): one of PROVIDERS
+
+    Returns:
+        provider (DistanceProvider): with its default settings
+    """
+    if name not in PROVIDERS:
+        raise ValueError('Unknown distance provider: {}'.format(name))
+    return PROVIDERS[name]()
@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 4096  # Number of locations kept in memory
+DEFAULT_TTL = 90 * 24 * 3600  # seconds, addresses barely move
+DEFAULT_NEGATIVE_TTL = 24 * 3600  # seconds, the API may learn about an unknown address
+
+
+class GeocodingCache(object):
+    """
+    Two tier cache of geocoded locations: an in-process LRU in front of an optional SQLite file.
+
+    Locations are keyed on their normalized (address, postcode) pair. A point of `None` means that the
+    API has no match for the location: it is cached as well, with a shorter time to live.
+    """
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 clock=time.time):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if path:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS geocoding ('
+                'key TEXT PRIMARY KEY, '
+                'point TEXT, '
+                'expires_at REAL NOT NULL)'
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def key(location):
+        address = ' '.join(str(location.get('address') or '').lower().split())
+        postcode = str(location.get('postcode') or '').strip()
+        return '{}|{}'.format(address, postcode)
+
+    @property
+    def hits(self):
+        return self.stats['memory_hits'] + self.stats['disk_hits']
+
+    @property
+    def misses(self):
+        return self.stats['misses']
+
+    def lookup(self, location):
+        """
+        Args:
+            location (dict): {'address': 'Avenue Winston Churchill', 'postcode': 27000}
+
+        Returns:
+            hit (bool): whether the location is known by the cache
+            point (dict|None): the cached point, None for a cached "no match"
+        """
+        key = self.key(location)
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                point, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return True, point
+                del self._memory[key]
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    'SELECT point, expires_at FROM geocoding WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    point = json.loads(row[0]) if row[0] is not None else None
+                    self._remember(key, point, row[1])
+                    self.stats['disk_hits'] += 1
+                    return True, point
+
+            self.stats['misses'] += 1
+            return False, None
+
+    def store(self, location, point):
+        key = self.key(location)
+        expires_at = self.clock() + (self.ttl if point is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(key, point, expires_at)
+            if self._connection is not None:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO geocoding (key, point, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(point) if point is not None else None, expires_at),
+                )
+                self._connection.commit()
+
+    def purge(self):
+        """Drop the expired entries of both tiers"""
+        now = self.clock()
+        with self._lock:
+            for key in [key for key, (_, expires_at) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+            if self._connection is not None:
+                self._connection.execute('DELETE FROM geocoding WHERE expires_at <= ?', (now,))
+                self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _remember(self, key, point, expires_at):
+        self._memory[key] = (point, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
@@ -0,0 +1,287 @@
+"""
+Run the long solver computations (routes, couples) outside of the API workers.
+
+Each job is persisted in the `job` table. A bounded pool of supervisor threads picks the submitted
+jobs, runs each of them in its own child process, records its progress and result, and terminates
+the child process when the job is cancelled or exceeds its timeout. The child process is not daemonic,
+so that it can solve the clusters or the days of a job in parallel: it leads its own process group,
+which is terminated as a whole, when the job ends, when the API worker exits, or by the child process
+itself once its supervisor is gone.
+
+The supervisor of a running job records a heartbeat: when the API starts, the running jobs without a
+recent heartbeat are failed, and the pending jobs are submitted again.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.database.models import db
+from src.database.models.job import Job
+from src.logging.mixin import LoggingMixin
+
+DEFAULT_WORKERS = 2  # Number of jobs computed in parallel
+DEFAULT_TIMEOUT = 600  # seconds
+POLL_INTERVAL = 0.5  # seconds between two checks of the running job
+HEARTBEAT_INTERVAL = 10  # seconds between two heartbeats of the supervisor of a running job
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL  # seconds without heartbeat after which a running job is lost
+
+
+class JobStatus(object):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    CANCELLING = 'cancelling'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    TIMED_OUT = 'timed_out'
+
+    @classmethod
+    def finished(cls, status):
+        return status in [cls.SUCCEEDED, cls.FAILED, cls.CANCELLED, cls.TIMED_OUT]
+
+
+def routes_task(parameters, report_progress):
+    from src.domain.solver import solve_routes_with_statistics, replan_routes, solve_routes_by_clusters
+    from src.services.distance_provider import get_provider
+
+    report_progress(0.)
+    hotels, workers = parameters['hotels'], parameters['workers']
+    search, constraints = parameters.get('search'), parameters.get('constraints')
+    provider = get_provider(parameters['distance_provider']) if parameters.get('distance_provider') else None
+    if parameters.get('workers_per_cluster'):
+        return solve_routes_by_clusters(hotels, workers, parameters['workers_per_cluster'], search=search,
+                                        neighbours=parameters.get('neighbours'), constraints=constraints,
+                                        provider=provider, progress=report_progress)
+    if parameters.get('previous_routes'):
+        result, _ = replan_routes(hotels, workers, parameters['previous_routes'], search=search,
+                                  constraints=constraints, provider=provider)
+        return result
+    return solve_routes_with_statistics(hotels, workers, search=search, neighbours=parameters.get('neighbours'),
+                                        constraints=constraints, provider=provider)
+
+
+def planning_task(parameters, report_progress):
+    from src.domain.planner import plan_routes, DEFAULT_REVISIT_INTERVAL
+    from src.services.distance_provider import get_provider
+
+    report_progress(0.)
+    provider = get_provider(parameters['distance_provider']) if parameters.get('distance_provider') else None
+    return plan_routes(parameters['hotels'], parameters['workers'],
+                       revisit_interval=parameters.get('revisit_interval') or DEFAULT_REVISIT_INTERVAL,
+                       search=parameters.get('search'), constraints=parameters.get('constraints'), provider=provider,
+                       progress=report_progress)
+
+
+def couples_task(parameters, report_progress):
+    from src.domain.model_couple import solve_couples_with_statistics, RESULTS_COUNT_LIMIT, ENUMERATION_TIME_LIMIT
+    from src.domain.utils import DEFAULT_COUPLE_ENGINE
+
+    report_progress(0.)
+    result = solve_couples_with_statistics(
+        parameters['employees'],
+        solution_limit=parameters.get('solution_limit', RESULTS_COUNT_LIMIT),
+        time_limit=parameters.get('time_limit', ENUMERATION_TIME_LIMIT),
+        engine=parameters.get('engine', DEFAULT_COUPLE_ENGINE),
+        require_driver=parameters.get('require_driver', False),
+        progress=report_progress,
+    )
+    result['solutions'] = [
+        [
+            {'persons': list(couple), 'availabilities': availabilities, 'sector': sector}
+            for couple, (availabilities, sector) in solution.items()
+        ]
+        for solution in result['solutions']
+    ]
+    return result
+
+
+TASKS = {
+    'routes': routes_task,
+    'planning': planning_task,
+    'couples': couples_task,
+}
+
+
+def _execute(task, parameters, connection):
+    """Entry point of the child process: messages are sent back to the supervisor through `connection`"""
+    if hasattr(os, 'setpgrp'):
+        # The processes started by the task join this group, and are terminated with it
+        os.setpgrp()
+        threading.Thread(target=_watch_supervisor, args=(os.getppid(),), daemon=True).start()
+    try:
+        result = task(json.loads(parameters), lambda progress: connection.send(('progress', progress)))
+        connection.send(('result', json.dumps(result)))
+    except Exception as error:
+        connection.send(('error', '{}: {}'.format(type(error).__name__, error)))
+    finally:
+        connection.close()
+
+
+def _watch_supervisor(supervisor_pid):
+    """Terminates the process group of the child process once its supervisor is gone, e.g. killed on a restart"""
+    while os.getppid() == supervisor_pid:
+        time.sleep(POLL_INTERVAL)
+    os.killpg(os.getpgrp(), signal.SIGTERM)
+
+
+def _terminate(process):
+    """Terminates the child process and the processes it started, e.g. the pool solving the clusters of a job"""
+    try:
+        # The group only exists once the child process has created it
+        os.killpg(process.pid, signal.SIGTERM)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        process.terminate()
+
+
+class JobRunner(LoggingMixin):
+    def __init__(self, app=None):
+        self.app = None
+        self.default_timeout = DEFAULT_TIMEOUT
+        self.poll_interval = POLL_INTERVAL
+        self._executor = None
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = {}  # child process of each running job
+        self._stopping = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.default_timeout = app.config.get('JOB_TIMEOUT', DEFAULT_TIMEOUT)
+        self._executor = ThreadPoolExecutor(max_workers=app.config.get('JOB_WORKERS', DEFAULT_WORKERS))
+        # Before the exit handler of the executor, that waits for the running jobs
+        atexit.register(self.shutdown)
+        with app.app_context():
+            try:
+                self.recover()
+            except SQLAlchemyError as error:
+                # e.g. the job table is not created yet, before the migrations
+                self.logger.warning('The jobs could not be recovered: {}'.format(error))
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    def recover(self):
+        """Fails the running jobs whose supervisor is gone, e.g. after a restart, and submits the pending jobs again"""
+        now = datetime.utcnow()
+        lost = Job.query.filter(
+            or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < now - timedelta(seconds=STALE_AFTER))
+        )
+        failed = lost.filter(Job.status == JobStatus.RUNNING).update(
+            {'status': JobStatus.FAILED, 'error': 'Interrupted by a restart', 'finished_at': now},
+            synchronize_session=False,
+        )
+        cancelled = lost.filter(Job.status == JobStatus.CANCELLING).update(
+            {'status': JobStatus.CANCELLED, 'finished_at': now}, synchronize_session=False,
+        )
+        pending = [job_id for job_id, in db.session.query(Job.id).filter_by(status=JobStatus.PENDING).order_by(Job.id)]
+        db.session.commit()
+        if failed or cancelled or pending:
+            self.logger.info('Recovered the jobs: {} failed, {} cancelled, {} submitted again'.format(
+                failed, cancelled, len(pending)))
+        # The other API workers may submit them too, a job is only run by the worker claiming it
+        for job_id in pending:
+            self.submit(job_id)
+
+    def shutdown(self):
+        """Terminates the running jobs, e.g. when the API worker exits, and stops claiming the submitted ones"""
+        self._stopping = True
+        for process in list(self._processes.values()):
+            _terminate(process)
+
+    def submit(self, job_id):
+        self._executor.submit(self._supervise, job_id)
+
+    def _supervise(self, job_id):
+        with self.app.app_context():
+            try:
+                self._run(job_id)
+            except Exception as error:
+                self.logger.exception('Job {} failed'.format(job_id))
+                db.session.rollback()
+                self._finish(job_id, JobStatus.FAILED, error='{}: {}'.format(type(error).__name__, error))
+            finally:
+                db.session.remove()
+
+    def _run(self, job_id):
+        if self._stopping:
+            # Left pending, for the next start
+            return
+        # Claim the job, it may have been cancelled meanwhile
+        now = datetime.utcnow()
+        claimed = Job.query.filter_by(id=job_id, status=JobStatus.PENDING).update(
+            {'status': JobStatus.RUNNING, 'started_at': now, 'heartbeat_at': now}
+        )
+        db.session.commit()
+        if not claimed:
+            return
+        job = Job.query.get(job_id)
+        timeout = job.timeout or self.default_timeout
+        self.logger.info('Running {} job {} with a timeout of {}s'.format(job.kind, job_id, timeout))
+
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_execute, args=(TASKS[job.kind], job.parameters, sender))
+        process.start()
+        sender.close()
+        self._processes[job_id] = process
+        try:
+            status, result, error = self._supervise_process(job_id, receiver, timeout)
+        finally:
+            if process.is_alive():
+                _terminate(process)
+            process.join()
+            receiver.close()
+            del self._processes[job_id]
+        self._finish(job_id, status, result, error)
+
+    def _supervise_process(self, job_id, receiver, timeout):
+        deadline = time.monotonic() + timeout
+        heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+        status, result, error = None, None, None
+        while status is None:
+            if receiver.poll(self.poll_interval):
+                try:
+                    message, value = receiver.recv()
+                except EOFError:
+                    status = JobStatus.FAILED
+                    error = 'Interrupted by a shutdown' if self._stopping else 'The job process exited unexpectedly'
+                    break
+                if message == 'progress':
+                    Job.query.filter_by(id=job_id).update({'progress': value})
+                    db.session.commit()
+                elif message == 'result':
+                    status, result = JobStatus.SUCCEEDED, value
+                else:
+                    status, error = JobStatus.FAILED, value
+            elif time.monotonic() > deadline:
+                status, error = JobStatus.TIMED_OUT, 'Timed out after {} seconds'.format(timeout)
+            elif self._cancelling(job_id):
+                status = JobStatus.CANCELLED
+            if time.monotonic() > heartbeat:
+                Job.query.filter_by(id=job_id).update({'heartbeat_at': datetime.utcnow()})
+                heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+            db.session.commit()
+        return status, result, error
+
+    def _cancelling(self, job_id):
+        return db.session.query(Job.status).filter_by(id=job_id).scalar() == JobStatus.CANCELLING
+
+    def _finish(self, job_id, status, result=None, error=None):
+        updates = {'status': status, 'result': result, 'error': error, 'finished_at': datetime.utcnow()}
+        if status == JobStatus.SUCCEEDED:
+            updates['progress'] = 1.
+        Job.query.filter_by(id=job_id).update(updates)
+        db.session.commit()
+        self.logger.info('Job {} {}'.format(job_id, status))
+
+
+job_runner = JobRunner()
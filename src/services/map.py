@@ -1,12 +1,47 @@
+import csv
+import io
 import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.geocoding_cache import GeocodingCache
+
+API_URL = 'https://api-adresse.data.gouv.fr/search/'
+BULK_CHUNK_SIZE = 5000  # Number of locations sent per CSV to the bulk endpoint
+MAX_WORKERS = 8  # Number of concurrent requests when the bulk endpoint is not available
+REQUESTS_PER_SECOND = 40  # The API allows 50 requests per second and per IP
+RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter(object):
+    """Space the calls to `wait` so that at most `rate` of them return per second, across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1. / rate if rate else 0.
+        self._next_call = 0.
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
 
 
 class Map(object):
-    def __init__(self):
-        self.url = 'https://api-adresse.data.gouv.fr/search/'
+    def __init__(self, url=API_URL, cache=None):
+        self.url = url
+        self.bulk_url = '{}/csv/'.format(url.rstrip('/'))
         self.radius = 6371  # km
+        self.cache = cache if cache is not None else GeocodingCache(os.environ.get('GEOCODING_CACHE_PATH'))
 
     def distance(self, departure, arrival):
         try:
@@ -17,7 +52,7 @@ class Map(object):
         latitude_distance = math.radians(arrival_latitude - departure_latitude)
         longitude_distance = math.radians(arrival_longitude - departure_longitude)
         a = (math.sin(latitude_distance / 2) * math.sin(latitude_distance / 2) +
-             math.cos(math.radians(arrival_longitude)) * math.cos(math.radians(arrival_latitude)) *
+             math.cos(math.radians(departure_latitude)) * math.cos(math.radians(arrival_latitude)) *
              math.sin(longitude_distance / 2) * math.sin(longitude_distance / 2))
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
         d = self.radius * c
@@ -29,26 +64,140 @@ class Map(object):
         #       address
         if not location.get('address'):
             return None
+        hit, point = self.cache.lookup(location)
+        if hit:
+            return point
+
         geographic_information = self.get(location)
-        geographic_information_features = geographic_information['features']
-        if not geographic_information_features:
-            return None
-        best_score_geophic_information = sorted(
-            geographic_information_features,
-            key=lambda k: k['properties']['score']
-        )[0]
-        latitude, longitude = best_score_geophic_information['geometry']['coordinates']
-        return {'latitude': latitude, 'longitude': longitude}
+        point = self._best_point(geographic_information['features'])
+        self.cache.store(location, point)
+        return point
+
+    def points(self, locations, max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND, retries=RETRIES):
+        """Geocode several locations at once.
+
+        The locations missing from the cache are sent as a CSV to the bulk endpoint of the API. If this endpoint
+        is not available, they are geocoded one by one by a pool of threads sharing a rate limited session.
+
+        Args:
+            locations (list[dict]): each dict has the struct {'address': 'Avenue Winston Churchill', 'postcode': 27000}
+            max_workers (int): number of concurrent requests of the fallback
+            requests_per_second (int): maximum rate of requests of the fallback
+            retries (int): number of retries of a failed request of the fallback
+
+        Returns:
+            results (list[dict]): one result per location, in the same order, with the struct
+                {'point': {'latitude': 48.85, 'longitude': 2.35} or None, 'error': None or 'error message'}
+        """
+        results = [None] * len(locations)
+        missing_indexes = []
+        for index, location in enumerate(locations):
+            if not location.get('address'):
+                results[index] = {'point': None, 'error': None}
+                continue
+            hit, point = self.cache.lookup(location)
+            if hit:
+                results[index] = {'point': point, 'error': None}
+            else:
+                missing_indexes.append(index)
+
+        missing_locations = [locations[index] for index in missing_indexes]
+        try:
+            missing_results = self._bulk_points(missing_locations)
+        except (requests.RequestException, ValueError, KeyError):
+            missing_results = self._concurrent_points(missing_locations, max_workers, requests_per_second, retries)
+
+        for index, result in zip(missing_indexes, missing_results):
+            if result['error'] is None:
+                self.cache.store(locations[index], result['point'])
+            results[index] = result
+        return results
 
-    def get(self, parameters):
+    def get(self, parameters, session=None):
         payload = {'q': parameters.get('address'), 'postcode': parameters.get('postcode')}
-        request = requests.get(self.url, params=payload)
+        request = (session or requests).get(self.url, params=payload)
         request.raise_for_status()
 
         response = request.json()
 
         return response
 
+    def _bulk_points(self, locations):
+        results = []
+        for start in range(0, len(locations), BULK_CHUNK_SIZE):
+            chunk = locations[start:start + BULK_CHUNK_SIZE]
+
+            payload = io.StringIO()
+            writer = csv.writer(payload)
+            writer.writerow(['row', 'address', 'postcode'])
+            for row, location in enumerate(chunk):
+                writer.writerow([row, location.get('address'), location.get('postcode') or ''])
+
+            request = requests.post(
+                self.bulk_url,
+                files={'data': ('locations.csv', payload.getvalue().encode('utf-8'), 'text/csv')},
+                data={'columns': 'address', 'postcode': 'postcode'},
+            )
+            request.raise_for_status()
+
+            chunk_results = [{'point': None, 'error': 'Missing from the bulk response'} for _ in chunk]
+            for line in csv.DictReader(io.StringIO(request.content.decode('utf-8-sig'))):
+                chunk_results[int(line['row'])] = self._bulk_result(line)
+            results += chunk_results
+        return results
+
+    @staticmethod
+    def _bulk_result(line):
+        status = line.get('result_status', 'ok')
+        if status not in ('ok', 'not-found', 'skipped'):
+            return {'point': None, 'error': 'Bulk geocoding status: {}'.format(status)}
+        if not line.get('latitude') or not line.get('longitude'):
+            return {'point': None, 'error': None}
+        return {'point': {'latitude': float(line['latitude']), 'longitude': float(line['longitude'])}, 'error': None}
+
+    def _concurrent_points(self, locations, max_workers, requests_per_second, retries):
+        if not locations:
+            return []
+        rate_limiter = RateLimiter(requests_per_second)
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            def geocode(location):
+                try:
+                    return {'point': self._point_with_retries(location, session, rate_limiter, retries), 'error': None}
+                except (requests.RequestException, ValueError, KeyError) as error:
+                    return {'point': None, 'error': str(error)}
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(geocode, locations))
+
+    def _point_with_retries(self, location, session, rate_limiter, retries):
+        for attempt in range(retries + 1):
+            rate_limiter.wait()
+            try:
+                geographic_information = self.get(location, session=session)
+                return self._best_point(geographic_information['features'])
+            except requests.RequestException as error:
+                response = getattr(error, 'response', None)
+                retryable = response is None or response.status_code in RETRY_STATUSES
+                if not retryable or attempt == retries:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+
+    @staticmethod
+    def _best_point(geographic_information_features):
+        if not geographic_information_features:
+            return None
+        best_score_geophic_information = max(
+            geographic_information_features,
+            key=lambda k: k['properties']['score']
+        )
+        # GeoJSON coordinates are ordered as [longitude, latitude]
+        longitude, latitude = best_score_geophic_information['geometry']['coordinates']
+        return {'latitude': latitude, 'longitude': longitude}
+
 
 if __name__ == '__main__':
     map = Map()
@@ -0,0 +1,229 @@
+"""
+From the enriched people and hotels files to the routes of the couples, in one run.
+
+    ```
+    $ python -m src.services.pipeline \
+        -p "/Users/fpaupier/projects/samu_social/data/people-enriched.csv" \
+        -H "/Users/fpaupier/projects/samu_social/data/hotels-enriched.csv" \
+        --cache /tmp/pipeline-cache
+    ```
+
+The stages are: reading the files, forming the couples, building a vehicle for each couple, then
+planning their routes. The couples and the routes are cached by the hash of their inputs: after a
+change of the hotels only the routes are computed again, and after a change of the people that
+leaves the employees unchanged, nothing is.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+from src.domain.availability_model import group_employees
+from src.domain.model_couple import solve_couples_with_statistics
+from src.domain.planner import DEFAULT_REVISIT_INTERVAL, plan_routes
+from src.services.csv_reader import iter_csv
+
+AREA_COLUMNS = ('area1', 'area2', 'area3', 'area4')
+YES = ('oui', 'o', 'yes', 'y', 'true', '1', 'x')
+CACHE_VERSION = 1  # Bump to invalidate the cached stages when their computation changes
+
+
+class StageCache(object):
+    """Results of the stages, as json files named after the hash of the inputs of the stage"""
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory (str): where the results are kept, in memory only when None
+        """
+        self.directory = directory
+        self._results = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(stage, inputs):
+        content = json.dumps([CACHE_VERSION, stage, inputs], sort_keys=True, separators=(',', ':'))
+        return '{}-{}'.format(stage, hashlib.sha1(content.encode('utf-8')).hexdigest())
+
+    def get(self, stage, inputs, compute):
+        """
+        Args:
+            stage (str): name of the stage
+            inputs (object): json serializable inputs of the stage, its result only depends on them
+            compute (callable): computes the result from the inputs, on a cache miss
+
+        Returns:
+            result (object): the json serializable result of the stage
+            hit (bool): whether the result was cached
+        """
+        key = self.key(stage, inputs)
+        if key in self._results:
+            return self._results[key], True
+        path = self._path(key)
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._results[key] = json.load(f)
+            return self._results[key], True
+
+        # Through json, so that a computed result is the same as a cached one
+        result = json.loads(json.dumps(compute(inputs)))
+        self._results[key] = result
+        if path:
+            descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(temporary_path, path)
+        return result, False
+
+    def _path(self, key):
+        return os.path.join(self.directory, '{}.json'.format(key)) if self.directory else None
+
+
+def read_employees(people_path):
+    """
+    Args:
+        people_path (str): enriched people csv file, one line per availability of a person
+
+    Returns:
+        employees (list[dict]): {'name', 'address', 'postcode', 'point', 'availabilities': slots,
+                                 'areas': list[str], 'has_driving_license': bool}
+    """
+    return [
+        {
+            'name': '{} {}'.format(employee['name'].strip(), employee['surname'].strip()),
+            'address': employee['address'],
+            'postcode': employee['postcode'],
+            'point': employee['point'],
+            'availabilities': employee['availabilities'],
+            'areas': sorted({employee[column].strip() for column in AREA_COLUMNS if employee[column].strip()}),
+            'has_driving_license': employee['license'].strip().lower() in YES,
+        }
+        for employee in group_employees(iter_csv(people_path, 'people', enriched=True))
+    ]
+
+
+def read_hotels(hotels_path):
+    return list(iter_csv(hotels_path, 'hotel', enriched=True))
+
+
+def form_couples(inputs):
+    """
+    Args:
+        inputs (dict): {'employees': as returned by `read_employees`, 'engine', 'require_driver'}
+
+    Returns:
+        couples (list[dict]): {'persons': [str, str], 'availabilities': shared slots, 'sector': int}
+    """
+    employees = inputs['employees']
+    # Each area is a bit of the sector of the employees
+    areas = sorted({area for employee in employees for area in employee['areas']})
+    bits = {area: bit for bit, area in enumerate(areas)}
+    result = solve_couples_with_statistics(
+        [
+            dict(employee, sector=sum(1 << bits[area] for area in employee['areas']))
+            for employee in employees
+        ],
+        solution_limit=1,
+        engine=inputs['engine'],
+        require_driver=inputs['require_driver'],
+    )
+    solution = result['solutions'][0] if result['solutions'] else {}
+    return [
+        {'persons': list(persons), 'availabilities': availabilities, 'sector': sector}
+        for persons, (availabilities, sector) in sorted(solution.items())
+    ]
+
+
+def build_vehicles(couples, employees):
+    """
+    A vehicle for each couple, starting from and coming back to the address of one of its persons, a driver
+    if possible
+
+    Returns:
+        vehicles (list[dict]): workers as expected by the solver, with the 'persons' of the couple and the
+            'availabilities' they share
+    """
+    employee_per_name = {employee['name']: employee for employee in employees}
+    vehicles = []
+    for couple in couples:
+        persons = [employee_per_name[name] for name in couple['persons']]
+        located = [person for person in persons if person['point']] or persons
+        home = next((person for person in located if person['has_driving_license']), located[0])
+        vehicles.append({
+            'address': home['address'],
+            'postcode': home['postcode'],
+            'point': home['point'],
+            'persons': couple['persons'],
+            'availabilities': couple['availabilities'],
+        })
+    return vehicles
+
+
+def plan(inputs):
+    return plan_routes(inputs['hotels'], inputs['vehicles'], revisit_interval=inputs['revisit_interval'],
+                       search=inputs['search'], constraints=inputs['constraints'])
+
+
+def run_pipeline(people_path, hotels_path, cache=None, engine='matching', require_driver=False,
+                 revisit_interval=None, search=None, constraints=None):
+    """
+    Args:
+        people_path (str): enriched people csv file
+        hotels_path (str): enriched hotels csv file
+        cache (StageCache): results of the previous runs, kept in memory for this run only by default
+        engine (str): one of COUPLE_ENGINES
+        require_driver (bool): only form the couples having at least one driving license
+        revisit_interval (int): days between two visits of a hotel, DEFAULT_REVISIT_INTERVAL by default
+        search (dict): keyword arguments of `create_search_parameters`, used for each day
+        constraints (dict): maximum distance, drop penalty and speed, see `create_data_model`
+
+    Returns:
+        result (dict): {'couples': see `form_couples`, 'vehicles': see `build_vehicles`,
+                        'routes': see `plan_routes`, 'cached': whether each stage was cached}
+    """
+    cache = cache or StageCache()
+    employees = read_employees(people_path)
+    couples, couples_hit = cache.get(
+        'couples', {'employees': employees, 'engine': engine, 'require_driver': require_driver}, form_couples
+    )
+    vehicles = build_vehicles(couples, employees)
+    routes, routes_hit = cache.get(
+        'routes',
+        {
+            'hotels': read_hotels(hotels_path),
+            'vehicles': vehicles,
+            'revisit_interval': revisit_interval or DEFAULT_REVISIT_INTERVAL,
+            'search': search,
+            'constraints': constraints,
+        },
+        plan,
+    )
+    return {
+        'couples': couples,
+        'vehicles': vehicles,
+        'routes': routes,
+        'cached': {'couples': couples_hit, 'routes': routes_hit},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Form the couples and plan their routes')
+    parser.add_argument('-p', '--people', help='path to the enriched people csv file', type=str, required=True)
+    parser.add_argument('-H', '--hotels', help='path to the enriched hotels csv file', type=str, required=True)
+    parser.add_argument('--cache', help='directory of the cached stages', type=str)
+    parser.add_argument('--engine', help='engine forming the couples', type=str, default='matching')
+    parser.add_argument('--revisit_interval', help='days between two visits of a hotel', type=int)
+    parser.add_argument('--output', help='path of a json file to write the result to', type=str)
+    args = parser.parse_args()
+
+    result = run_pipeline(args.people, args.hotels, StageCache(args.cache), engine=args.engine,
+                          revisit_interval=args.revisit_interval)
+    print('{} couples, objective {} meters, cached stages: {}'.format(
+        len(result['couples']), result['routes']['objective'],
+        ', '.join(stage for stage, hit in sorted(result['cached'].items()) if hit) or 'none'
+    ))
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(result, outfile, indent=2)
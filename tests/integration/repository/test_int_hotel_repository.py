@@ -174,3 +174,80 @@ def test_delete_non_existing_hotel(db_session):
     response, status_code = hotel_repository.delete(1)
     # Then
     assert (response, status_code) == ({'message': 'Hotel not found'}, 404)
+
+
+def test_insert_many_hotels(db_session):
+    # Given
+    hotel_schema = HotelSchema()
+    hotel_repository = HotelRepository(hotel_schema)
+    hotels = [
+        {
+            'name': 'hotel 1',
+            'address': '1 boulevard du test',
+        }, {
+            'address': '2 boulevard du test',
+        }, {
+            'name': 'hotel 3',
+            'address': '3 boulevard du test',
+        },
+    ]
+    # When
+    response, status_code = hotel_repository.insert_many(iter(hotels))
+    # Then
+    inserted_hotels = db_session.query(Hotel).order_by(Hotel.id).all()
+    serialized_inserted_hotels, errors = hotel_schema.dump(inserted_hotels, many=True)
+    for hotel in serialized_inserted_hotels:
+        hotel.pop('id')
+
+    assert serialized_inserted_hotels == [hotels[0], hotels[2]]
+    assert (response, status_code) == (
+        {'inserted': 2, 'errors': {1: {'name': ['Missing data for required field.']}}}, 207
+    )
+
+
+def test_get_page_of_hotels(db_session):
+    # Given
+    hotel_schema = HotelSchema()
+    hotel_repository = HotelRepository(hotel_schema)
+    hotels = [{'name': 'hotel {}'.format(i), 'address': '{} boulevard du test'.format(i)} for i in range(5)]
+    hotel_repository.insert_many(hotels)
+    # When
+    first_page, first_status_code = hotel_repository.get_page(limit=2, fields=['name'])
+    last_page, last_status_code = hotel_repository.get_page(after=first_page['next_cursor'], limit=5, fields=['name'])
+    # Then
+    assert (first_page['items'], first_status_code) == ([{'name': 'hotel 0'}, {'name': 'hotel 1'}], 200)
+    assert (last_page, last_status_code) == (
+        {'items': [{'name': 'hotel 2'}, {'name': 'hotel 3'}, {'name': 'hotel 4'}], 'next_cursor': None}, 200
+    )
+
+
+def test_get_page_of_hotels_with_filter(db_session):
+    # Given
+    hotel_schema = HotelSchema()
+    hotel_repository = HotelRepository(hotel_schema)
+    hotel_repository.insert_many([{'name': 'hotel 1'}, {'name': 'hotel 2'}])
+    # When
+    page, status_code = hotel_repository.get_page(fields=['name'], filters={'name': 'hotel 2'})
+    # Then
+    assert (page, status_code) == ({'items': [{'name': 'hotel 2'}], 'next_cursor': None}, 200)
+
+
+def test_stream_hotels(db_session):
+    # Given
+    hotel_schema = HotelSchema()
+    hotel_repository = HotelRepository(hotel_schema)
+    hotel_repository.insert_many([{'name': 'hotel 1'}, {'name': 'hotel 2'}, {'name': 'hotel 3'}])
+    # When
+    rows, errors = hotel_repository.stream(after=1, fields=['name'])
+    # Then
+    assert (list(rows), errors) == ([{'name': 'hotel 2'}, {'name': 'hotel 3'}], {})
+
+
+def test_stream_hotels_with_unknown_field(db_session):
+    # Given
+    hotel_schema = HotelSchema()
+    hotel_repository = HotelRepository(hotel_schema)
+    # When
+    rows, errors = hotel_repository.stream(fields=['stars'])
+    # Then
+    assert (rows, errors) == (None, {'fields': ['Unknown field(s): stars']})
@@ -0,0 +1,97 @@
+from src.database.models.job import Job
+from src.database.schemas.job_schema import JobSchema, CouplesJobSchema, RoutesJobSchema
+from src.repository.job_repository import JobRepository
+
+
+class RecordingJobRunner(object):
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+
+
+def test_insert_job(db_session):
+    # Given
+    job_runner = RecordingJobRunner()
+    job_repository = JobRepository(JobSchema(), job_runner)
+    parameters = {'employees': [{'name': 'person 1', 'availabilities': [1], 'sector': 1}], 'timeout': 30}
+    # When
+    response, status_code = job_repository.insert('couples', CouplesJobSchema(), parameters)
+    # Then
+    job = db_session.query(Job).first()
+    assert (response['status'], response['kind'], status_code) == ('pending', 'couples', 202)
+    assert (job.timeout, job_runner.submitted) == (30, [job.id])
+
+
+def test_insert_job_with_wrong_parameters(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    # When
+    response, status_code = job_repository.insert('couples', CouplesJobSchema(), {})
+    # Then
+    assert (response, status_code) == ({'employees': ['Missing data for required field.']}, 400)
+
+
+def test_cancel_pending_job(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    job, _ = job_repository.insert('couples', CouplesJobSchema(), {'employees': []})
+    # When
+    response, status_code = job_repository.cancel(job['id'])
+    # Then
+    assert (response['status'], status_code) == ('cancelled', 200)
+
+
+def test_cancel_finished_job(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    db_session.add(Job(kind='routes', status='succeeded'))
+    db_session.commit()
+    # When
+    response, status_code = job_repository.cancel(1)
+    # Then
+    assert (response, status_code) == ({'message': 'Job already succeeded'}, 409)
+
+
+def test_get_non_existing_job(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    # When
+    response, status_code = job_repository.get(1)
+    # Then
+    assert (response, status_code) == ({'message': 'Job not found'}, 404)
+
+
+def test_insert_routes_job_with_wrong_search_parameters(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    search = {'time_limit': 0, 'first_solution_strategy': 'PATH_CHEAPEST', 'local_search_metaheuristic': 'TABU'}
+    # When
+    response, status_code = job_repository.insert(
+        'routes', RoutesJobSchema(), {'hotels': [], 'workers': [], 'search': search}
+    )
+    # Then
+    assert status_code == 400
+    assert sorted(response['search']) == ['first_solution_strategy', 'local_search_metaheuristic', 'time_limit']
+
+
+def test_insert_routes_job_with_nearest_neighbours_and_road_distances(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    parameters = {'hotels': [], 'workers': [], 'neighbours': 16, 'distance_provider': 'osrm'}
+    # When
+    response, status_code = job_repository.insert('routes', RoutesJobSchema(), parameters)
+    # Then
+    assert (response, status_code) == (
+        {'neighbours': ['The nearest neighbours only support great-circle distances.']}, 400
+    )
+
+
+def test_insert_couples_job_without_time_limit(db_session):
+    # Given
+    job_repository = JobRepository(JobSchema(), RecordingJobRunner())
+    # When
+    response, status_code = job_repository.insert('couples', CouplesJobSchema(), {'employees': [], 'time_limit': 0})
+    # Then
+    assert (response, status_code) == ({'time_limit': ['Must be greater than 0.']}, 400)
@@ -0,0 +1,114 @@
+import json
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+
+from src.database.models.job import Job
+from src.database.schemas.job_schema import JobSchema
+from src.repository.job_repository import JobRepository
+from src.services.job_runner import JobRunner, STALE_AFTER, TASKS
+
+
+def echo_task(parameters, report_progress):
+    report_progress(.5)
+    return dict(parameters, daemon=multiprocessing.current_process().daemon)
+
+
+def sleep_task(parameters, report_progress):
+    time.sleep(parameters['seconds'])
+    return {}
+
+
+class CancellingJobRunner(JobRunner):
+    """Cancels the job through the repository, as the API does, on the first check of the running job"""
+
+    def _cancelling(self, job_id):
+        JobRepository(JobSchema(), self).cancel(job_id)
+        return super()._cancelling(job_id)
+
+
+class RecordingJobRunner(JobRunner):
+    def __init__(self):
+        super().__init__()
+        self.submitted = []
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+
+
+class ShuttingDownJobRunner(JobRunner):
+    """Shuts down, as the API worker exits, on the first check of the running job"""
+
+    def _cancelling(self, job_id):
+        self.shutdown()
+        return super()._cancelling(job_id)
+
+
+def _run_job(db_session, monkeypatch, runner, kind, parameters, timeout=None):
+    monkeypatch.setitem(TASKS, 'echo', echo_task)
+    monkeypatch.setitem(TASKS, 'sleep', sleep_task)
+    runner.poll_interval = 0.05
+    job = Job(kind=kind, status='pending', parameters=json.dumps(parameters), timeout=timeout)
+    db_session.add(job)
+    db_session.commit()
+    start = time.monotonic()
+    runner._run(job.id)
+    return db_session.query(Job).get(job.id), time.monotonic() - start
+
+
+def test_run_job(app, db_session, monkeypatch):
+    # When
+    job, _ = _run_job(db_session, monkeypatch, JobRunner(), 'echo', {'value': 1})
+    # Then
+    assert (job.status, job.progress, job.error) == ('succeeded', 1., None)
+    # Then the job process can start its own pool of processes
+    assert json.loads(job.result) == {'value': 1, 'daemon': False}
+
+
+def test_run_job_exceeding_its_timeout(app, db_session, monkeypatch):
+    # When
+    job, duration = _run_job(db_session, monkeypatch, JobRunner(), 'sleep', {'seconds': 60}, timeout=1)
+    # Then
+    assert (job.status, job.result, job.error) == ('timed_out', None, 'Timed out after 1 seconds')
+    assert duration < 30
+
+
+def test_run_cancelled_job(app, db_session, monkeypatch):
+    # When
+    job, duration = _run_job(db_session, monkeypatch, CancellingJobRunner(), 'sleep', {'seconds': 60})
+    # Then
+    assert (job.status, job.result) == ('cancelled', None)
+    assert duration < 30
+
+
+def test_run_job_of_a_job_runner_shutting_down(app, db_session, monkeypatch):
+    # Given
+    runner = ShuttingDownJobRunner()
+    # When
+    job, duration = _run_job(db_session, monkeypatch, runner, 'sleep', {'seconds': 60})
+    # Then
+    assert (job.status, job.result, job.error) == ('failed', None, 'Interrupted by a shutdown')
+    assert duration < 30
+    assert runner._processes == {}
+
+
+def test_recover_jobs(app, db_session):
+    # Given
+    now = datetime.utcnow()
+    jobs = [
+        Job(kind='routes', status='running', heartbeat_at=now - timedelta(seconds=2 * STALE_AFTER)),
+        Job(kind='routes', status='running', heartbeat_at=now),
+        Job(kind='routes', status='cancelling', heartbeat_at=now - timedelta(seconds=2 * STALE_AFTER)),
+        Job(kind='routes', status='pending'),
+        Job(kind='routes', status='succeeded', heartbeat_at=now - timedelta(seconds=2 * STALE_AFTER)),
+    ]
+    db_session.add_all(jobs)
+    db_session.commit()
+    runner = RecordingJobRunner()
+    # When
+    runner.recover()
+    # Then
+    recovered = [db_session.query(Job).get(job.id) for job in jobs]
+    assert [job.status for job in recovered] == ['failed', 'running', 'cancelled', 'pending', 'succeeded']
+    assert recovered[0].error == 'Interrupted by a restart'
+    assert runner.submitted == [jobs[3].id]
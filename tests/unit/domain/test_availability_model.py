@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+
+from src.domain import availability_model
+from src.domain.availability_model import AvailabilityIndex, encode_slots, read_employees_files, slot_half_day
+
+
+def test_availability_index_counts_shared_slots_of_each_pair():
+    # Given
+    persons = ['person 1', 'person 2', 'person 3']
+    dispos_per_person = {'person 1': [3, 1, 2], 'person 2': [2, 3], 'person 3': [4]}
+    # When
+    availabilities = AvailabilityIndex(persons, dispos_per_person)
+    # Then
+    assert availabilities.overlap('person 1', 'person 2') == 2
+    assert availabilities.overlap('person 2', 'person 1') == 2
+    assert availabilities.overlap('person 1', 'person 3') == 0
+    assert availabilities.overlap('person 3', 'person 3') == 1
+
+
+def test_availability_index_lists_shared_slots_in_order():
+    # Given
+    persons = ['person 1', 'person 2']
+    dispos_per_person = {'person 1': [30, 10, 20], 'person 2': [20, 30, 40]}
+    # When
+    availabilities = AvailabilityIndex(persons, dispos_per_person)
+    # Then
+    assert availabilities.shared_slots('person 1', 'person 2') == [20, 30]
+    assert availabilities.bitset('person 1') == 0b0111
+    assert availabilities.bitset('person 2') == 0b1110
+
+
+def test_availability_index_without_numpy_counts_with_bitsets(monkeypatch):
+    # Given
+    monkeypatch.setattr(availability_model, 'np', None)
+    persons = ['person 1', 'person 2']
+    dispos_per_person = {'person 1': [1, 2, 3], 'person 2': [2, 3]}
+    # When
+    availabilities = AvailabilityIndex(persons, dispos_per_person)
+    # Then
+    assert availabilities.overlaps is None
+    assert availabilities.overlap('person 1', 'person 2') == 2
+
+
+def _write_people(tmpdir, name, rows):
+    lines = [['header'] * 14] + [
+        [person, 'surname', '1 rue de Paris', '', '', '', '75001', 'oui', day, time_of_day, '1', '', '', '']
+        for person, day, time_of_day in rows
+    ]
+    source = tmpdir.join(name)
+    source.write('\n'.join(';'.join(line) for line in lines))
+    return str(source)
+
+
+def test_slots_of_distinct_half_days_are_distinct():
+    # When
+    slots = encode_slots(['11/01/2019', '01/11/2019', '01/11/2019', '01/11/2019'],
+                         ['matin', 'matin', 'apres-midi', 'jour'])
+    # Then
+    assert slot_half_day(slots[0][0]) == (date(2019, 1, 11), 0)
+    assert slot_half_day(slots[1][0]) == (date(2019, 11, 1), 0)
+    assert slot_half_day(slots[2][0]) == (date(2019, 11, 1), 1)
+    assert slots[3] == (slots[1][0], slots[2][0])
+
+
+def test_slots_of_consecutive_half_days_are_consecutive():
+    # When
+    slots = encode_slots(['31/12/2019', '01/01/2020'], ['jour', 'Apr\u00e8s midi'])
+    # Then
+    assert slots == [(slots[0][0], slots[0][0] + 1), (slots[0][0] + 3,)]
+
+
+def test_encode_slots_rejects_unknown_times_of_day():
+    # Then
+    with pytest.raises(ValueError):
+        encode_slots(['01/01/2020'], ['nuit'])
+
+
+def test_read_employees_files_groups_the_rows_of_each_person(tmpdir):
+    # Given
+    january = _write_people(tmpdir, 'january.csv', [
+        ('person 1', '11/01/2019', 'matin'),
+        ('person 2', '11/01/2019', 'jour'),
+        ('person 1', '11/01/2019', 'jour'),
+    ])
+    february = _write_people(tmpdir, 'february.csv', [('person 1', '01/02/2019', 'apres-midi')])
+    # When
+    employees = read_employees_files([january, february])
+    # Then
+    morning = encode_slots(['11/01/2019'], ['matin'])[0][0]
+    assert [employee['name'] for employee in employees] == ['person 1', 'person 2']
+    assert employees[0]['availabilities'] == [morning, morning + 1, morning + 2 * 21 + 1]
+    assert employees[1]['availabilities'] == [morning, morning + 1]
@@ -0,0 +1,47 @@
+from src.domain.clustering import sweep_clusters
+
+
+def _location(latitude, longitude):
+    return {'point': {'latitude': latitude, 'longitude': longitude}}
+
+
+def test_sweep_clusters_groups_neighbouring_workers_and_hotels():
+    # Given
+    hotels = [_location(48.86, 2.40), _location(48.86, 2.30), _location(48.87, 2.40), _location(48.87, 2.30)]
+    workers = [_location(48.865, 2.29), _location(48.865, 2.41)]
+    # When
+    clusters = sweep_clusters(hotels, workers, workers_per_cluster=1, visits_per_worker=2)
+    # Then
+    assert sorted(clusters) == [([0, 2], [1]), ([1, 3], [0])]
+
+
+def test_sweep_clusters_shares_hotels_by_capacity():
+    # Given
+    hotels = [_location(48.85 + i * 0.001, 2.30 + (i % 7) * 0.01) for i in range(30)]
+    workers = [_location(48.86, 2.30 + i * 0.01) for i in range(5)]
+    # When
+    clusters = sweep_clusters(hotels, workers, workers_per_cluster=2, visits_per_worker=7)
+    # Then
+    assert [len(cluster_workers) for _, cluster_workers in clusters] == [2, 2, 1]
+    assert [len(cluster_hotels) for cluster_hotels, _ in clusters] == [12, 12, 6]
+    assert sorted(i for cluster_hotels, _ in clusters for i in cluster_hotels) == list(range(30))
+
+
+def test_sweep_clusters_leaves_out_hotels_without_point():
+    # Given
+    hotels = [_location(48.86, 2.30), {'point': None}]
+    workers = [_location(48.86, 2.31)]
+    # When
+    clusters = sweep_clusters(hotels, workers, workers_per_cluster=4, visits_per_worker=7)
+    # Then
+    assert clusters == [([0], [0])]
+
+
+def test_sweep_clusters_leaves_out_workers_without_point():
+    # Given
+    hotels = [_location(48.86, 2.30 + i * 0.01) for i in range(4)]
+    workers = [{'point': None}, _location(48.86, 2.31), {'point': {'latitude': None, 'longitude': None}}]
+    # When
+    clusters = sweep_clusters(hotels, workers, workers_per_cluster=1, visits_per_worker=2)
+    # Then
+    assert clusters == [([0, 1, 2, 3], [1])]
@@ -0,0 +1,90 @@
+from src.domain import distance_matrix
+from src.domain.distance_matrix import haversine_matrix, update_haversine_matrix
+
+
+def test_haversine_matrix_is_symmetric_with_null_diagonal():
+    # Given
+    latitudes = [48.8566, 48.8738, 48.8421]
+    longitudes = [2.3522, 2.2950, 2.3219]
+    # When
+    distances = haversine_matrix(latitudes, longitudes)
+    # Then
+    assert [distances[i][i] for i in range(3)] == [0, 0, 0]
+    assert all(distances[i][j] == distances[j][i] for i in range(3) for j in range(3))
+
+
+def test_haversine_matrix_expresses_distances_in_meters():
+    # Given
+    latitudes = [48.8584, 48.8606]  # Eiffel Tower, Louvre
+    longitudes = [2.2945, 2.3376]
+    # When
+    distances = haversine_matrix(latitudes, longitudes)
+    # Then
+    assert 3100 < distances[0][1] < 3200
+
+
+def test_haversine_matrix_chunks_give_the_same_result():
+    # Given
+    latitudes = [48.80 + i * 0.01 for i in range(10)]
+    longitudes = [2.25 + i * 0.007 for i in range(10)]
+    # When
+    distances = haversine_matrix(latitudes, longitudes)
+    chunked_distances = haversine_matrix(latitudes, longitudes, chunk_size=3)
+    # Then
+    assert distances == chunked_distances
+
+
+def test_haversine_matrix_python_fallback(monkeypatch):
+    # Given
+    latitudes = [48.80 + i * 0.01 for i in range(10)]
+    longitudes = [2.25 + i * 0.007 for i in range(10)]
+    distances = haversine_matrix(latitudes, longitudes)
+    monkeypatch.setattr(distance_matrix, 'np', None)
+    # When
+    fallback_distances = haversine_matrix(latitudes, longitudes)
+    # Then
+    assert fallback_distances == distances
+
+
+def test_haversine_matrix_without_points():
+    # When
+    distances = haversine_matrix([], [])
+    # Then
+    assert distances == []
+
+
+def test_update_haversine_matrix_gives_the_same_result_as_a_full_computation():
+    # Given
+    latitudes = [48.80 + i * 0.01 for i in range(10)]
+    longitudes = [2.25 + i * 0.007 for i in range(10)]
+    previous_points = list(zip(latitudes[2:8], longitudes[2:8]))[::-1]
+    previous_distances = haversine_matrix([p[0] for p in previous_points], [p[1] for p in previous_points])
+    # When
+    distances = update_haversine_matrix(latitudes, longitudes, previous_points, previous_distances)
+    # Then
+    assert distances == haversine_matrix(latitudes, longitudes)
+
+
+def test_update_haversine_matrix_reuses_the_previous_distances():
+    # Given
+    latitudes, longitudes = [48.80, 48.81, 48.82], [2.25, 2.26, 2.27]
+    previous_points = [(48.80, 2.25), (48.81, 2.26)]
+    previous_distances = [[0, 42], [42, 0]]
+    # When
+    distances = update_haversine_matrix(latitudes, longitudes, previous_points, previous_distances)
+    # Then
+    assert (distances[0][1], distances[1][0]) == (42, 42)
+    assert distances[2] == haversine_matrix(latitudes, longitudes)[2]
+
+
+def test_update_haversine_matrix_python_fallback(monkeypatch):
+    # Given
+    latitudes = [48.80 + i * 0.01 for i in range(6)]
+    longitudes = [2.25 + i * 0.007 for i in range(6)]
+    previous_points = list(zip(latitudes[:3], longitudes[:3]))
+    previous_distances = haversine_matrix(latitudes[:3], longitudes[:3])
+    monkeypatch.setattr(distance_matrix, 'np', None)
+    # When
+    distances = update_haversine_matrix(latitudes, longitudes, previous_points, previous_distances)
+    # Then
+    assert distances == haversine_matrix(latitudes, longitudes)
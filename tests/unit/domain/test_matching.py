@@ -0,0 +1,64 @@
+import itertools
+import random
+
+from src.domain.matching import max_weight_matching
+
+
+def _weight(edges, mates):
+    weights = {(i, j): weight for i, j, weight in edges}
+    return sum(weights.get((i, j), weights.get((j, i))) for i, j in enumerate(mates) if j > i)
+
+
+def _best_weight(edges):
+    best = 0
+    for count in range(1, len(edges) + 1):
+        for subset in itertools.combinations(edges, count):
+            vertices = [vertex for i, j, _ in subset for vertex in (i, j)]
+            if len(vertices) == len(set(vertices)):
+                best = max(best, sum(weight for _, _, weight in subset))
+    return best
+
+
+def test_matching_prefers_the_heavier_edges():
+    # Given a path where the middle edge is the heaviest, but lighter than both ends together
+    edges = [(0, 1, 5), (1, 2, 8), (2, 3, 5)]
+    # When
+    mates = max_weight_matching(edges)
+    # Then
+    assert mates == [1, 0, 3, 2]
+
+
+def test_matching_goes_through_an_odd_cycle():
+    # Given a triangle, whose vertices can only be matched by shrinking it into a blossom
+    edges = [(0, 1, 6), (1, 2, 6), (0, 2, 6), (2, 3, 7), (0, 4, 4)]
+    # When
+    mates = max_weight_matching(edges)
+    # Then
+    assert mates == [1, 0, 3, 2, -1]
+
+
+def test_matching_can_maximize_the_cardinality_first():
+    # Given
+    edges = [(0, 1, 2), (1, 2, 10), (2, 3, 2)]
+    # When
+    mates = max_weight_matching(edges, max_cardinality=True)
+    # Then
+    assert mates == [1, 0, 3, 2]
+
+
+def test_matching_is_optimal_on_random_graphs():
+    # Given
+    rng = random.Random(0)
+    for _ in range(200):
+        vertices = rng.randint(2, 8)
+        pairs = [(i, j) for i in range(vertices) for j in range(i + 1, vertices) if rng.random() < 0.5][:10]
+        edges = [(i, j, rng.randint(1, 10)) for i, j in pairs]
+        # When
+        mates = max_weight_matching(edges)
+        # Then
+        assert _weight(edges, mates) == _best_weight(edges)
+
+
+def test_matching_without_edges():
+    # Then
+    assert max_weight_matching([]) == []
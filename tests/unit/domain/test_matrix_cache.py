@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from src.domain import matrix_cache  # noqa: E402
+from src.domain.distance_matrix import haversine_matrix  # noqa: E402
+from src.domain.matrix_cache import MatrixCache  # noqa: E402
+
+LATITUDES = [48.80 + i * 0.01 for i in range(8)]
+LONGITUDES = [2.25 + i * 0.007 for i in range(8)]
+
+
+def test_matrix_cache_memory_maps_the_stored_matrix(tmpdir):
+    # Given
+    cache = MatrixCache(str(tmpdir))
+    cache.get(LATITUDES, LONGITUDES)
+    # When
+    distances = cache.get(LATITUDES, LONGITUDES)
+    # Then
+    assert isinstance(distances, np.memmap)
+    assert distances.dtype == np.int32
+    assert distances.tolist() == haversine_matrix(LATITUDES, LONGITUDES)
+
+
+def test_matrix_cache_updates_the_nearest_matrix(tmpdir, monkeypatch):
+    # Given
+    cache = MatrixCache(str(tmpdir))
+    cache.get(LATITUDES[:6], LONGITUDES[:6])
+    computed_rows = []
+    update = matrix_cache.update_haversine_matrix
+
+    def recording_update(latitudes, longitudes, previous_points, previous_distances, **kwargs):
+        computed_rows.append(len(latitudes) - len(set(zip(latitudes, longitudes)) & set(previous_points)))
+        return update(latitudes, longitudes, previous_points, previous_distances, **kwargs)
+
+    monkeypatch.setattr(matrix_cache, 'update_haversine_matrix', recording_update)
+    # When
+    distances = cache.get(LATITUDES, LONGITUDES)
+    # Then
+    assert computed_rows == [2]
+    assert distances.tolist() == haversine_matrix(LATITUDES, LONGITUDES)
+
+
+def test_matrix_cache_evicts_the_least_recently_used_matrices(tmpdir):
+    # Given
+    cache = MatrixCache(str(tmpdir), max_entries=2)
+    # When
+    for size in (3, 4, 5):
+        cache.get(LATITUDES[:size], LONGITUDES[:size])
+    # Then
+    assert cache.load(list(zip(LATITUDES[:3], LONGITUDES[:3]))) is None
+    assert cache.load(list(zip(LATITUDES[:5], LONGITUDES[:5]))) is not None
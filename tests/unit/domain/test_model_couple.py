@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+pytest.importorskip('ortools')
+
+from src.domain.model_couple import create_couples, create_model, solve_couples_with_statistics  # noqa: E402
+
+
+def test_create_couples_only_pairs_compatible_persons():
+    # Given
+    persons = ['person 1', 'person 2', 'person 3', 'person 4']
+    dispos_per_person = {'person 1': [1, 2], 'person 2': [2], 'person 3': [1], 'person 4': [3]}
+    sector_per_person = {'person 1': 0b01, 'person 2': 0b11, 'person 3': 0b10, 'person 4': 0b01}
+    # When
+    couples = create_couples(persons, dispos_per_person, sector_per_person)
+    # Then
+    assert couples == [('person 1', 'person 2')]
+
+
+def test_create_couples_without_duplicate():
+    # Given
+    persons = ['person 1', 'person 2', 'person 3']
+    dispos_per_person = {person: [1, 2] for person in persons}
+    sector_per_person = {person: 0b11 for person in persons}
+    # When
+    couples = create_couples(persons, dispos_per_person, sector_per_person)
+    # Then
+    assert couples == [('person 1', 'person 2'), ('person 1', 'person 3'), ('person 2', 'person 3')]
+
+
+def test_create_model_has_one_variable_per_compatible_couple():
+    # Given
+    persons = ['person 1', 'person 2', 'person 3']
+    dispos_per_person = {'person 1': [1, 2], 'person 2': [2, 1], 'person 3': [1]}
+    sector_per_person = {person: 0b1 for person in persons}
+    couples = create_couples(persons, dispos_per_person, sector_per_person)
+    # When
+    model, variables, dispos_per_couple, sector_per_couple = create_model(persons, couples, dispos_per_person,
+                                                                          sector_per_person)
+    # Then
+    assert len(variables) == 3
+    assert dispos_per_couple == {0: [1, 2], 1: [1], 2: [1]}
+    assert sector_per_couple == {0: 0b1, 1: 0b1, 2: 0b1}
+
+
+def test_solve_couples_enumerates_the_best_configurations():
+    # Given
+    employees = [
+        {'name': 'person 1', 'availabilities': [1, 2], 'sector': 0b1},
+        {'name': 'person 2', 'availabilities': [1, 2], 'sector': 0b1},
+        {'name': 'person 3', 'availabilities': [1], 'sector': 0b1},
+    ]
+    # When
+    result = solve_couples_with_statistics(employees, search_workers=1)
+    # Then
+    assert (result['status'], result['objective'], result['complete']) == ('OPTIMAL', 4, True)
+    assert result['solutions'] == [{('person 1', 'person 2'): ([1, 2], 0b1)}]
+
+
+def test_solve_couples_stops_at_the_solution_limit():
+    # Given
+    employees = [{'name': 'person {}'.format(i), 'availabilities': [1], 'sector': 0b1} for i in range(6)]
+    # When
+    result = solve_couples_with_statistics(employees, solution_limit=2, search_workers=1)
+    # Then
+    assert (result['objective'], result['complete']) == (6, False)
+    assert len(result['solutions']) == 2
+    assert all(len(solution) == 3 for solution in result['solutions'])
+
+
+def test_solve_couples_reports_the_progress_of_the_exploration_and_of_the_enumeration():
+    # Given
+    employees = [{'name': 'person {}'.format(i), 'availabilities': [1], 'sector': 0b1} for i in range(6)]
+    progress = []
+    # When
+    solve_couples_with_statistics(employees, solution_limit=2, search_workers=1, progress=progress.append)
+    # Then
+    assert progress == [0.5, 0.75, 1.]
+
+
+def test_solve_couples_without_compatible_persons():
+    # Given
+    employees = [
+        {'name': 'person 1', 'availabilities': [1], 'sector': 0b1},
+        {'name': 'person 2', 'availabilities': [2], 'sector': 0b1},
+    ]
+    # When
+    result = solve_couples_with_statistics(employees)
+    # Then
+    assert (result['status'], result['objective'], result['solutions']) == ('OPTIMAL', 0, [{}])
+
+
+def test_matching_engine_finds_a_best_configuration():
+    # Given
+    rng = random.Random(1)
+    employees = [
+        {'name': 'person {}'.format(i), 'availabilities': rng.sample(range(14), rng.randint(1, 6)),
+         'sector': rng.randint(1, 0b1111)}
+        for i in range(60)
+    ]
+    # When
+    cp_sat = solve_couples_with_statistics(employees, solution_limit=1, search_workers=1)
+    matching = solve_couples_with_statistics(employees, engine='matching')
+    # Then
+    assert (matching['status'], matching['objective']) == ('OPTIMAL', cp_sat['objective'])
+    solution = matching['solutions'][0]
+    persons = [person for couple in solution for person in couple]
+    assert len(persons) == len(set(persons))
+    for (p1, p2), (availabilities, sector) in solution.items():
+        assert availabilities and sector
+
+
+def test_solve_couples_can_require_a_driver_in_each_couple():
+    # Given
+    employees = [
+        {'name': 'person 1', 'availabilities': [1], 'sector': 0b1, 'has_driving_license': True},
+        {'name': 'person 2', 'availabilities': [1], 'sector': 0b1},
+        {'name': 'person 3', 'availabilities': [1], 'sector': 0b1},
+        {'name': 'person 4', 'availabilities': [1], 'sector': 0b1, 'has_driving_license': True},
+    ]
+    # When
+    solutions = [
+        solve_couples_with_statistics(employees, engine=engine, require_driver=True, search_workers=1)['solutions']
+        for engine in ('cp-sat', 'matching')
+    ]
+    # Then
+    for solution in [solution for engine_solutions in solutions for solution in engine_solutions]:
+        assert len(solution) == 2
+        assert all('person 1' in couple or 'person 4' in couple for couple in solution)
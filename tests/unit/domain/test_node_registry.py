@@ -0,0 +1,42 @@
+from src.domain.node_registry import NodeRegistry
+
+
+def _location(name, point, **kwargs):
+    location = {'address': name, 'postcode': 75000, 'point': point}
+    location.update(kwargs)
+    return location
+
+
+def test_registry_gives_nodes_to_the_located_workers_and_hotels_only():
+    # Given
+    workers = [_location('worker 1', None), _location('worker 2', {'latitude': 48.85, 'longitude': 2.35})]
+    hotels = [
+        _location('hotel 1', {'latitude': 48.86, 'longitude': 2.36}, id=11),
+        _location('hotel 2', {}, id=12),
+        _location('hotel 3', {'latitude': 48.87, 'longitude': 2.37}, id=13),
+    ]
+    # When
+    registry = NodeRegistry(hotels, workers)
+    # Then
+    assert registry.labels == ['worker 2 75000', 'worker 2 75000', 'hotel 1 75000', 'hotel 3 75000']
+    assert registry.ids == [1, 1, 11, 13]
+    assert registry.points == [(48.85, 2.35), (48.85, 2.35), (48.86, 2.36), (48.87, 2.37)]
+    assert (registry.start_locations, registry.end_locations, registry.hotel_nodes) == ([0], [1], [2, 3])
+    assert registry.unrouted == [
+        {'kind': 'worker', 'id': 0, 'label': 'worker 1 75000'},
+        {'kind': 'hotel', 'id': 12, 'label': 'hotel 2 75000'},
+    ]
+
+
+def test_worker_routes_are_in_the_order_of_the_workers():
+    # Given
+    workers = [
+        _location('worker 1', {'latitude': 48.85, 'longitude': 2.35}),
+        _location('worker 2', None),
+        _location('worker 3', {'latitude': 48.86, 'longitude': 2.36}),
+    ]
+    registry = NodeRegistry([], workers)
+    # When
+    routes = registry.worker_routes([['a'], ['b']])
+    # Then
+    assert routes == [['a'], [], ['b']]
@@ -0,0 +1,113 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('ortools')
+
+from src.domain.availability_model import AFTERNOON, MORNING, slot_id  # noqa: E402
+from src.domain.planner import day_worker, plan_routes, schedule_visits, worker_shifts  # noqa: E402
+
+MONDAY = date(2019, 11, 4)
+
+
+def _location(name, latitude, longitude, **kwargs):
+    location = {'address': name, 'postcode': 75000, 'point': {'latitude': latitude, 'longitude': longitude}}
+    location.update(kwargs)
+    return location
+
+
+def test_worker_shifts_span_the_half_days_of_each_day():
+    # Given
+    tuesday = date(2019, 11, 5)
+    worker = {'availabilities': [slot_id(MONDAY, MORNING), slot_id(MONDAY, AFTERNOON), slot_id(tuesday, AFTERNOON)]}
+    # When
+    shifts = worker_shifts(worker)
+    # Then
+    assert shifts == {MONDAY: {MORNING, AFTERNOON}, tuesday: {AFTERNOON}}
+    assert day_worker(worker, shifts[MONDAY])['time_window'] == [8 * 60, 18 * 60]
+    assert day_worker(worker, shifts[tuesday])['time_window'] == [13 * 60, 18 * 60]
+    assert day_worker(worker, shifts[MONDAY])['capacity'] == 2 * day_worker(worker, shifts[tuesday])['capacity']
+
+
+def test_schedule_visits_balances_the_days():
+    # Given
+    hotels = [_location('hotel {}'.format(i), 48.85, 2.35) for i in range(6)]
+    hotels[0]['revisit_interval'] = 2
+    # When
+    visits, unscheduled = schedule_visits(hotels, [3, 3, 3, 0], revisit_interval=4)
+    # Then
+    assert unscheduled == []
+    assert sorted(hotel for day in visits for hotel in day) == [0, 0, 1, 2, 3, 4, 5]
+    assert [len(day) for day in visits[:3]] == [3, 2, 2]
+    assert visits[3] == []
+
+
+def test_schedule_visits_reports_the_visits_on_days_without_worker():
+    # Given
+    hotels = [_location('hotel 0', 48.85, 2.35, revisit_interval=1)]
+    # When
+    visits, unscheduled = schedule_visits(hotels, [2, 0, 2])
+    # Then
+    assert visits == [[0], [], [0]]
+    assert unscheduled == [(0, 1)]
+
+
+def test_schedule_visits_reports_the_hotels_of_an_empty_horizon():
+    # When
+    visits, unscheduled = schedule_visits([_location('hotel', 48.85, 2.30)], [])
+    # Then
+    assert (visits, unscheduled) == ([], [(0, None)])
+
+
+def test_plan_routes_visits_each_hotel_on_the_days_of_its_interval():
+    # Given
+    wednesday = date(2019, 11, 6)
+    workers = [
+        _location('worker 1', 48.85, 2.30, availabilities=[slot_id(MONDAY, MORNING), slot_id(wednesday, MORNING)]),
+        _location('worker 2', 48.86, 2.40, availabilities=[slot_id(MONDAY, AFTERNOON)]),
+        dict(_location('worker 3', 48.86, 2.40, availabilities=[slot_id(MONDAY, MORNING)]), point=None),
+    ]
+    hotels = [_location('hotel {}'.format(i), 48.84 + i * 0.003, 2.30 + i * 0.02) for i in range(5)]
+    # When
+    result = plan_routes(hotels, workers, revisit_interval=2, search={'preset': 'fast', 'time_limit': 1}, processes=1)
+    # Then
+    assert [day['date'] for day in result['days']] == ['2019-11-04', '2019-11-06']
+    assert [day['workers'] for day in result['days']] == [[0, 1], [0]]
+    monday, wednesday = [
+        (sorted(hotel for route in day['routes'] for hotel in route[1:-1]), sorted(day['dropped']))
+        for day in result['days']
+    ]
+    labels = ['hotel {} 75000'.format(i) for i in range(5)]
+    # Then no worker is available on tuesday: every hotel is visited on monday, and again on wednesday
+    assert monday == (labels, [])
+    assert len(wednesday[0]) == 3
+    assert sorted(wednesday[0] + wednesday[1]) == labels
+    assert result['unscheduled'] == []
+    assert result['unrouted'] == [{'kind': 'worker', 'id': 2, 'label': 'worker 3 75000'}]
+
+
+def test_plan_routes_reports_the_progress_after_each_day():
+    # Given
+    tuesday = date(2019, 11, 5)
+    workers = [_location('worker', 48.85, 2.30, availabilities=[slot_id(MONDAY, MORNING), slot_id(tuesday, MORNING)])]
+    hotels = [_location('hotel {}'.format(i), 48.84, 2.30 + i * 0.02) for i in range(2)]
+    progress = []
+    # When
+    result = plan_routes(hotels, workers, revisit_interval=1, search={'preset': 'fast', 'time_limit': 1}, processes=1,
+                         progress=progress.append)
+    # Then
+    assert len(result['days']) == 2
+    assert progress == [0.5, 1.]
+
+
+def test_plan_routes_reports_every_hotel_when_no_worker_is_available():
+    # Given
+    workers = [_location('worker', 48.85, 2.30, availabilities=[])]
+    hotels = [_location('hotel {}'.format(i), 48.84, 2.30 + i * 0.02) for i in range(2)]
+    # When
+    result = plan_routes(hotels, workers, processes=1)
+    # Then
+    assert result['days'] == []
+    assert result['unscheduled'] == [
+        {'label': 'hotel 0 75000', 'date': None}, {'label': 'hotel 1 75000', 'date': None}
+    ]
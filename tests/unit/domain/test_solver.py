@@ -0,0 +1,223 @@
+import pytest
+
+pytest.importorskip('ortools')
+
+from ortools.constraint_solver import routing_enums_pb2  # noqa: E402
+
+from src.domain.solver import (  # noqa: E402
+    complete_routes,
+    create_data_model,
+    create_search_parameters,
+    replan_routes,
+    routes_to_nodes,
+    solve_routes_by_clusters,
+    solve_routes_with_statistics,
+)
+from src.domain.utils import FIRST_SOLUTION_STRATEGIES, LOCAL_SEARCH_METAHEURISTICS  # noqa: E402
+from src.services.distance_provider import ManhattanProvider  # noqa: E402
+
+
+def _location(name, latitude, longitude):
+    return {'address': name, 'postcode': 75000, 'point': {'latitude': latitude, 'longitude': longitude}}
+
+
+WORKERS = [_location('worker 1', 48.85, 2.30), _location('worker 2', 48.85, 2.40)]
+HOTELS = [_location('hotel {}'.format(i), 48.84 + i * 0.005, 2.30 + i * 0.02) for i in range(6)]
+
+
+def test_routes_to_nodes_drops_the_workers_and_hotels_that_left():
+    # Given
+    data = create_data_model(HOTELS[1:], WORKERS[1:], False)
+    previous_routes = [
+        ['worker 1 75000', 'hotel 0 75000', 'hotel 1 75000', 'worker 1 75000'],
+        ['worker 2 75000', 'hotel 0 75000', 'hotel 4 75000', 'hotel 5 75000', 'worker 2 75000'],
+    ]
+    # When
+    routes = routes_to_nodes(data, previous_routes)
+    # Then
+    assert [[data['labels'][node] for node in route] for route in routes] == [['hotel 4 75000', 'hotel 5 75000']]
+
+
+def test_complete_routes_inserts_the_hotels_not_visited_within_capacities():
+    # Given
+    data = create_data_model(HOTELS, WORKERS, False)
+    data['vehicle_capacities'] = [4, 4]
+    # When
+    routes = complete_routes(data, [[4, 5, 6, 7, 8], []])
+    # Then
+    assert [len(route) for route in routes] == [3, 3]
+    assert sorted(node for route in routes for node in route) == [4, 5, 6, 7, 8, 9]
+
+
+def test_replan_routes_starts_from_the_previous_itinerary():
+    # Given
+    previous_routes = [
+        ['worker 1 75000', 'hotel 0 75000', 'hotel 1 75000', 'hotel 2 75000', 'worker 1 75000'],
+        ['worker 2 75000', 'hotel 3 75000', 'hotel 4 75000', 'worker 2 75000'],
+    ]
+    # When
+    result, data = replan_routes(HOTELS, WORKERS, previous_routes)
+    # Then
+    assert result['warm_start']
+    assert sorted(label for route in result['routes'] for label in route[1:-1]) == \
+        ['hotel {} 75000'.format(i) for i in range(6)]
+    assert len(data['points']) == 10
+
+
+def test_solve_routes_drops_the_hotels_out_of_reach():
+    # Given
+    hotels = HOTELS + [_location('far away hotel', 49.50, 2.30)]
+    # When
+    result = solve_routes_with_statistics(hotels, WORKERS, search={'preset': 'fast', 'time_limit': 5})
+    # Then
+    assert result['dropped'] == ['far away hotel 75000']
+    assert all('far away hotel 75000' not in route for route in result['routes'])
+
+
+def test_solve_routes_respects_the_maximum_distance_of_each_worker():
+    # Given
+    workers = [dict(WORKERS[0], max_distance=0), WORKERS[1]]
+    # When
+    result = solve_routes_with_statistics(HOTELS, workers, search={'preset': 'fast', 'time_limit': 5})
+    # Then
+    assert result['routes'][0] == ['worker 1 75000', 'worker 1 75000']
+
+
+def test_solve_routes_visits_the_hotels_within_their_time_window():
+    # Given
+    hotels = [dict(hotel, visit_time=30, time_window=[600, 720]) for hotel in HOTELS[:3]]
+    workers = [dict(WORKERS[0], time_window=[540, 1080])]
+    constraints = {'max_distance': 100000}
+    # When
+    result = solve_routes_with_statistics(hotels, workers, search={'preset': 'fast', 'time_limit': 5},
+                                          constraints=constraints)
+    # Then
+    assert (result['dropped'], len(result['routes'][0])) == ([], 5)
+
+
+def test_create_data_model_uses_the_given_distance_provider(table_server):
+    # Given
+    from src.services.distance_provider import TableProvider
+
+    provider = TableProvider(url=table_server.url)
+    # When
+    data = create_data_model(HOTELS[:2], WORKERS[:1], False, provider=provider)
+    # Then
+    assert len(table_server.requests) == 1
+    assert [list(row) for row in data['distances']] == provider.matrix(
+        [latitude for latitude, _ in data['points']], [longitude for _, longitude in data['points']]
+    )
+
+
+def test_create_data_model_turns_the_durations_into_distances(table_server):
+    # Given
+    from src.services.distance_provider import TableProvider
+
+    provider = TableProvider(url=table_server.url, annotation='duration')
+    # When
+    data = create_data_model(HOTELS[:2], WORKERS[:1], False, constraints={'speed': 120}, provider=provider)
+    # Then the distances are covered at 120 meters per minute, that is 2 meters per second
+    durations = provider.matrix([latitude for latitude, _ in data['points']],
+                                [longitude for _, longitude in data['points']])
+    assert table_server.requests[0][1]['annotations'] == 'duration'
+    assert [list(row) for row in data['distances']] == [[2 * duration for duration in row] for row in durations]
+
+
+def test_solve_routes_reports_the_points_that_cannot_be_routed():
+    # Given
+    workers = [_location('worker 0', 48.85, 2.35), dict(WORKERS[0], point=None), WORKERS[1]]
+    hotels = HOTELS[:2] + [dict(HOTELS[2], point=None)] + HOTELS[3:4]
+    # When
+    result = solve_routes_with_statistics(hotels, workers, search={'preset': 'fast'})
+    # Then
+    assert result['routes'][1] == []
+    assert [route[0] for route in result['routes'] if route] == ['worker 0 75000', 'worker 2 75000']
+    assert sorted(label for route in result['routes'] for label in route[1:-1]) == [
+        'hotel 0 75000', 'hotel 1 75000', 'hotel 3 75000'
+    ]
+    assert result['unrouted'] == [
+        {'kind': 'worker', 'id': 1, 'label': 'worker 1 75000'},
+        {'kind': 'hotel', 'id': 2, 'label': 'hotel 2 75000'},
+    ]
+
+
+@pytest.mark.parametrize('workers', [[dict(WORKERS[0], point=None)], []])
+def test_solve_routes_drops_every_hotel_when_no_worker_can_be_routed(workers):
+    # When
+    result = solve_routes_with_statistics(HOTELS[:2], workers, search={'preset': 'fast'})
+    # Then
+    assert result['routes'] == [[] for _ in workers]
+    assert result['dropped'] == ['hotel 0 75000', 'hotel 1 75000']
+    assert result['status'] == 'ROUTING_SUCCESS'
+    assert [unrouted['kind'] for unrouted in result['unrouted']] == ['worker'] * len(workers)
+
+
+def test_solve_routes_without_worker_is_infeasible_when_the_visits_are_mandatory():
+    # When
+    result = solve_routes_with_statistics(HOTELS[:2], [], constraints={'drop_penalty': 0})
+    # Then
+    assert result['routes'] is None
+    assert result['status'] == 'ROUTING_INFEASIBLE'
+
+
+def test_solve_routes_by_clusters_gives_an_empty_route_to_the_workers_without_point():
+    # Given
+    workers = [WORKERS[0], dict(WORKERS[1], point=None)]
+    # When
+    result = solve_routes_by_clusters(HOTELS[:3], workers, workers_per_cluster=1, search={'preset': 'fast'},
+                                      processes=1)
+    # Then
+    assert result['clusters'] == 1
+    assert result['routes'][1] == []
+    assert sorted(result['routes'][0][1:-1]) == ['hotel 0 75000', 'hotel 1 75000', 'hotel 2 75000']
+
+
+def test_solve_routes_by_clusters_reports_the_progress_after_each_cluster():
+    # Given
+    progress = []
+    # When
+    result = solve_routes_by_clusters(HOTELS[:4], WORKERS[:2], workers_per_cluster=1, search={'preset': 'fast'},
+                                      processes=1, progress=progress.append)
+    # Then
+    assert result['clusters'] == 2
+    assert progress == [0.5, 1.]
+
+
+def test_search_strategies_are_names_of_the_ortools_enums():
+    # Then
+    assert set(FIRST_SOLUTION_STRATEGIES) <= set(routing_enums_pb2.FirstSolutionStrategy.Value.keys())
+    assert set(LOCAL_SEARCH_METAHEURISTICS) <= set(routing_enums_pb2.LocalSearchMetaheuristic.Value.keys())
+
+
+@pytest.mark.parametrize('time_limit', [0, -1])
+def test_create_search_parameters_with_a_time_limit_not_greater_than_0(time_limit):
+    # When
+    with pytest.raises(ValueError):
+        create_search_parameters('balanced', time_limit=time_limit)
+
+
+def test_create_search_parameters_overrides_the_preset():
+    # When
+    search_parameters = create_search_parameters('best', time_limit=2.5, local_search_metaheuristic='tabu_search')
+    # Then
+    assert search_parameters.time_limit.ToMilliseconds() == 2500
+    strategies, metaheuristics = routing_enums_pb2.FirstSolutionStrategy, routing_enums_pb2.LocalSearchMetaheuristic
+    assert search_parameters.first_solution_strategy == strategies.PARALLEL_CHEAPEST_INSERTION
+    assert search_parameters.local_search_metaheuristic == metaheuristics.TABU_SEARCH
+
+
+@pytest.mark.parametrize('search', [
+    {'preset': 'fastest'},
+    {'first_solution_strategy': 'PATH_CHEAPEST'},
+    {'local_search_metaheuristic': 'TABU'},
+])
+def test_create_search_parameters_with_unknown_names(search):
+    # When
+    with pytest.raises(ValueError):
+        create_search_parameters(**search)
+
+
+def test_create_data_model_with_nearest_neighbours_and_another_distance_provider():
+    # When
+    with pytest.raises(ValueError):
+        create_data_model(HOTELS, WORKERS, False, neighbours=4, provider=ManhattanProvider())
@@ -0,0 +1,62 @@
+import random
+
+from src.domain.distance_matrix import haversine_matrix
+from src.domain.spatial_index import GridIndex, sparse_distances
+
+
+def _random_points(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.uniform(48.815, 48.902) for _ in range(count)], [rng.uniform(2.255, 2.415) for _ in range(count)]
+
+
+def test_grid_index_finds_the_nearest_neighbours():
+    # Given
+    latitudes, longitudes = _random_points(300)
+    index = GridIndex(latitudes, longitudes)
+    distances = haversine_matrix(latitudes, longitudes)
+    # When
+    neighbours = index.neighbours(0, 5)
+    # Then
+    assert neighbours == sorted(range(1, 300), key=lambda j: distances[0][j])[:5]
+
+
+def test_grid_index_ignores_the_points_beyond_the_radius():
+    # Given
+    index = GridIndex([48.85, 48.851, 48.90], [2.30, 2.30, 2.30])
+    # When
+    neighbours = index.neighbours(0, 2, radius=1000)
+    # Then
+    assert neighbours == [1]
+
+
+def test_sparse_distances_penalize_the_missing_arcs():
+    # Given
+    latitudes, longitudes = _random_points(50)
+    # When
+    distances = sparse_distances(latitudes, longitudes, neighbours=3, penalty=10 ** 6)
+    # Then
+    dense = haversine_matrix(latitudes, longitudes)
+    assert distances.arc_count < 50 * 50
+    assert all(distances[i][j] in (dense[i][j], 10 ** 6) for i in range(50) for j in range(50))
+    assert distances.to_matrix()[0] == [distances[0][j] for j in range(50)]
+
+
+def test_sparse_distances_link_the_dense_nodes_to_every_point():
+    # Given
+    latitudes, longitudes = _random_points(20)
+    # When
+    distances = sparse_distances(latitudes, longitudes, neighbours=2, dense_nodes=[0])
+    # Then
+    assert [distances[0][j] for j in range(20)] == haversine_matrix(latitudes, longitudes)[0]
+    assert [distances[j][0] for j in range(20)] == haversine_matrix(latitudes, longitudes)[0]
+
+
+def test_sparse_distances_keep_the_neighbours_of_the_points_near_co_located_dense_nodes():
+    # Given: the start and end of 4 workers at the same place, a hotel 33 meters away, and 3 hotels further
+    latitudes = [48.85] * 8 + [48.8503, 48.852, 48.8521, 48.8522]
+    longitudes = [2.35] * 12
+    # When
+    distances = sparse_distances(latitudes, longitudes, neighbours=2, dense_nodes=range(8))
+    # Then
+    assert [distances[8][j] < 500 for j in range(9, 12)] == [True, True, False]
+    assert all(distances[i][j] < 500 for i in range(8) for j in range(8, 12))
@@ -0,0 +1,142 @@
+import csv
+import email
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, urlsplit, parse_qs
+
+import pytest
+
+
+class GeocodingStubHandler(BaseHTTPRequestHandler):
+    """Answer like api-adresse.data.gouv.fr for the addresses registered on the server"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append(('GET', url.path, query))
+
+        if self.server.failures.get(query.get('q')):
+            self.server.failures[query.get('q')] -= 1
+            self._send(503, 'text/plain', 'Service Unavailable')
+            return
+
+        point = self.server.points.get(query.get('q'))
+        features = []
+        if point:
+            features.append({
+                'geometry': {'type': 'Point', 'coordinates': [point['longitude'], point['latitude']]},
+                'properties': {'score': 0.9, 'label': query.get('q')},
+            })
+        self._send(200, 'application/json', json.dumps({'type': 'FeatureCollection', 'features': features}))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append(('POST', url.path, None))
+        if not self.server.bulk_available or url.path != '/search/csv/':
+            self._send(404, 'text/plain', 'Not Found')
+            return
+
+        message = email.message_from_bytes(
+            'Content-Type: {}\r\n\r\n'.format(self.headers['Content-Type']).encode('utf-8') + body
+        )
+        parts = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                 for part in message.get_payload()}
+
+        lines = list(csv.DictReader(io.StringIO(parts['data'].decode('utf-8'))))
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(lines[0].keys()) + ['latitude', 'longitude', 'result_status'])
+        writer.writeheader()
+        for line in reversed(lines):
+            point = self.server.points.get(line[parts['columns'].decode('utf-8')])
+            line['latitude'] = point['latitude'] if point else ''
+            line['longitude'] = point['longitude'] if point else ''
+            line['result_status'] = 'ok' if point else 'not-found'
+            writer.writerow(line)
+        self._send(200, 'text/csv', output.getvalue())
+
+    def _send(self, status, content_type, body):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='function')
+def geocoding_server(request):
+    server = HTTPServer(('127.0.0.1', 0), GeocodingStubHandler)
+    server.points = {}
+    server.requests = []
+    server.failures = {}
+    server.bulk_available = False
+    server.url = 'http://127.0.0.1:{}/search/'.format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def teardown():
+        server.shutdown()
+        server.server_close()
+
+    request.addfinalizer(teardown)
+    return server
+
+
+class TableStubHandler(BaseHTTPRequestHandler):
+    """Answer like the `table` service of OSRM, the distance being the sum of the coordinates differences"""
+
+    def do_GET(self):
+        url = urlsplit(self.path)  # The coordinates are separated by semicolons, not path parameters
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+
+        coordinates = [
+            tuple(float(value) for value in pair.split(','))
+            for pair in url.path.split('/')[-1].split(';')
+        ]
+        sources = [coordinates[int(i)] for i in query['sources'].split(';')]
+        destinations = [coordinates[int(i)] for i in query['destinations'].split(';')]
+        values = [
+            [
+                None if (source in self.server.unreachable or destination in self.server.unreachable)
+                and source != destination
+                else 100000 * (abs(source[0] - destination[0]) + abs(source[1] - destination[1]))
+                for destination in destinations
+            ]
+            for source in sources
+        ]
+        body = json.dumps({'code': 'Ok', '{}s'.format(query['annotations']): values})
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='function')
+def table_server(request):
+    server = HTTPServer(('127.0.0.1', 0), TableStubHandler)
+    server.requests = []
+    server.unreachable = set()  # (longitude, latitude) of the points that no road reaches
+    server.url = 'http://127.0.0.1:{}'.format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def teardown():
+        server.shutdown()
+        server.server_close()
+
+    request.addfinalizer(teardown)
+    return server
@@ -0,0 +1,56 @@
+from src.services.csv_reader import CsvReader, iter_csv, parse_csv
+
+
+def _write_hotels(tmpdir):
+    removed_hotel = ['', '', '1', '', '', '', 'hotel 2', '2', '75002', 'rue de Paris']
+    hotel = ['', '', '0', '', '', '', 'hotel 1', '1', '75001', 'rue  de Paris'] + [''] * 52 + ['1', '1', '', '1']
+    hotel[41], hotel[43] = '20', '10'
+    lines = [['header'] * 10, hotel, removed_hotel]
+    source = tmpdir.join('hotels.csv')
+    source.write('\n'.join(';'.join(line) for line in lines))
+    return str(source)
+
+
+def test_iter_csv_yields_the_hotels_that_are_not_removed(tmpdir):
+    # Given
+    source = _write_hotels(tmpdir)
+    # When
+    hotels = list(iter_csv(source, 'hotel'))
+    # Then
+    assert hotels == [{
+        'hotel_status': '0',
+        'nom': 'hotel 1',
+        'address': '1 rue de Paris',
+        'postcode': '75001',
+        'capacity': 20,
+        'bedroom_number': 10,
+        'features': 3,
+    }]
+
+
+def test_parse_csv_writes_the_records_as_json(tmpdir):
+    # Given
+    source = _write_hotels(tmpdir)
+    # When
+    json_path = parse_csv(source, 'hotel', write=True)
+    # Then
+    assert tmpdir.join('hotels-hotel.json').strpath == json_path
+    assert '"nom": "hotel 1"' in tmpdir.join('hotels-hotel.json').read()
+
+
+def test_parse_enriched_maps_the_columns_from_the_header(tmpdir):
+    # Given
+    source = tmpdir.join('people.csv')
+    source.write('\n'.join([
+        'name;surname;latitude;longitude;address;postcode;license;availability;time_of_day;area1;area2;area3;area4',
+        'Jean;Dupont;48.85;2.35;1 rue de Paris;75001;oui;11/01/2019;matin;1;0;0;0',
+        'Anne;Durand;;;nowhere;75002;non;01/11/2019;jour;0;1;0;0',
+    ]))
+    # When
+    people = CsvReader().parse_enriched(str(source), 'people')
+    # Then
+    assert [(person['name'], person['point']) for person in people] == [
+        ('Jean', {'latitude': 48.85, 'longitude': 2.35}),
+        ('Anne', None),
+    ]
+    assert people[0]['time_of_day'] == 'matin'
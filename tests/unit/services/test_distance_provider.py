@@ -0,0 +1,96 @@
+import pickle
+
+import pytest
+
+from src.domain.distance_matrix import haversine_matrix
+from src.services.distance_provider import HaversineProvider, ManhattanProvider, TableProvider, get_provider
+
+LATITUDES = [48.85, 48.86, 48.87, 48.88, 48.89]
+LONGITUDES = [2.30, 2.32, 2.34, 2.36, 2.38]
+
+
+def test_haversine_provider_matches_the_haversine_matrix():
+    # When
+    distances = HaversineProvider().matrix(LATITUDES, LONGITUDES)
+    # Then
+    assert distances == haversine_matrix(LATITUDES, LONGITUDES)
+
+
+def test_manhattan_provider_is_never_shorter_than_the_great_circle():
+    # When
+    manhattan = ManhattanProvider().matrix(LATITUDES, LONGITUDES)
+    haversine = haversine_matrix(LATITUDES, LONGITUDES)
+    # Then
+    for i in range(len(LATITUDES)):
+        assert manhattan[i][i] == 0
+        for j in range(len(LATITUDES)):
+            assert manhattan[i][j] == manhattan[j][i]
+            assert haversine[i][j] - 1 <= manhattan[i][j] <= 1.42 * haversine[i][j] + 1
+
+
+def test_manhattan_provider_follows_the_orientation_of_the_streets():
+    # Given a street along the meridian, seen by a grid rotated by 45 degrees
+    latitudes, longitudes = [48.85, 48.86], [2.35, 2.35]
+    # When
+    straight = ManhattanProvider().matrix(latitudes, longitudes)[0][1]
+    rotated = ManhattanProvider(orientation=45).matrix(latitudes, longitudes)[0][1]
+    # Then
+    assert rotated == pytest.approx(straight * 2 ** 0.5, abs=1)
+
+
+def test_table_provider_sends_one_request_per_block_of_origins(table_server):
+    # Given
+    provider = TableProvider(url=table_server.url, origins_per_request=2)
+    # When
+    distances = provider.matrix(LATITUDES, LONGITUDES)
+    # Then
+    assert len(table_server.requests) == 3
+    assert [query['sources'] for _, query in table_server.requests] == ['0;1', '0;1', '0']
+    assert distances[0][1] == round(100000 * (0.01 + 0.02))
+    assert distances[1][0] == distances[0][1]
+
+
+def test_table_provider_only_asks_the_new_points(table_server):
+    # Given
+    provider = TableProvider(url=table_server.url)
+    provider.matrix(LATITUDES[:3], LONGITUDES[:3])
+    # When
+    same = provider.matrix(LATITUDES[:3], LONGITUDES[:3])
+    extended = provider.matrix(LATITUDES, LONGITUDES)
+    # Then
+    assert same == [row[:3] for row in extended[:3]]
+    path, query = table_server.requests[-1]
+    assert len(table_server.requests) == 3
+    # Then the known origins were only asked the two new destinations
+    assert len(query['sources'].split(';')) == 3
+    assert len(query['destinations'].split(';')) == 2
+
+
+def test_table_provider_penalizes_the_unreachable_points(table_server):
+    # Given
+    table_server.unreachable.add((LONGITUDES[4], LATITUDES[4]))
+    provider = TableProvider(url=table_server.url, unreachable=123456)
+    # When
+    distances = provider.matrix(LATITUDES, LONGITUDES)
+    # Then
+    assert distances[0][4] == distances[4][0] == 123456
+    assert distances[4][4] == 0
+
+
+def test_table_provider_can_be_sent_to_another_process(table_server):
+    # Given
+    provider = TableProvider(url=table_server.url)
+    provider.matrix(LATITUDES, LONGITUDES)
+    # When
+    copy = pickle.loads(pickle.dumps(provider))
+    distances = copy.matrix(LATITUDES, LONGITUDES)
+    # Then
+    assert distances == provider.matrix(LATITUDES, LONGITUDES)
+    assert len(table_server.requests) == 1
+
+
+def test_get_provider_rejects_unknown_names():
+    # Then
+    assert isinstance(get_provider('manhattan'), ManhattanProvider)
+    with pytest.raises(ValueError):
+        get_provider('teleportation')
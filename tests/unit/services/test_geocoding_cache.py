@@ -0,0 +1,50 @@
+from src.services.geocoding_cache import GeocodingCache
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_their_ttl():
+    # Given
+    clock = Clock()
+    cache = GeocodingCache(ttl=10, negative_ttl=5, clock=clock)
+    cache.store({'address': 'a', 'postcode': 1}, {'latitude': 1, 'longitude': 2})
+    cache.store({'address': 'b', 'postcode': 1}, None)
+    # When
+    clock.now = 7
+    found_a, found_b = cache.lookup({'address': 'a', 'postcode': 1}), cache.lookup({'address': 'b', 'postcode': 1})
+    # Then
+    assert found_a == (True, {'latitude': 1, 'longitude': 2})
+    assert found_b == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    # Given
+    cache = GeocodingCache(capacity=2)
+    cache.store({'address': 'a'}, None)
+    cache.store({'address': 'b'}, None)
+    cache.lookup({'address': 'a'})
+    # When
+    cache.store({'address': 'c'}, None)
+    # Then
+    assert cache.lookup({'address': 'a'})[0] is True
+    assert cache.lookup({'address': 'b'})[0] is False
+    assert cache.lookup({'address': 'c'})[0] is True
+
+
+def test_expired_entries_are_purged_from_disk(tmpdir):
+    # Given
+    clock = Clock()
+    path = str(tmpdir.join('geocoding.sqlite'))
+    GeocodingCache(path, ttl=10, clock=clock).store({'address': 'a'}, {'latitude': 1, 'longitude': 2})
+    cache = GeocodingCache(path, clock=clock)
+    # When
+    clock.now = 11
+    cache.purge()
+    # Then
+    assert cache.lookup({'address': 'a'}) == (False, None)
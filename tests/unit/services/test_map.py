@@ -0,0 +1,112 @@
+from src.services.geocoding_cache import GeocodingCache
+from src.services.map import Map
+
+
+def test_point_uses_the_best_scored_feature(geocoding_server):
+    # Given
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    map = Map(url=geocoding_server.url, cache=GeocodingCache())
+    # When
+    point = map.point({'address': '1 rue de Paris', 'postcode': 75001})
+    # Then
+    assert point == {'latitude': 48.85, 'longitude': 2.35}
+
+
+def test_point_is_geocoded_once(geocoding_server):
+    # Given
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    cache = GeocodingCache()
+    map = Map(url=geocoding_server.url, cache=cache)
+    # When
+    map.point({'address': '1 rue de Paris', 'postcode': 75001})
+    point = map.point({'address': ' 1  RUE de paris', 'postcode': '75001'})
+    # Then
+    assert point == {'latitude': 48.85, 'longitude': 2.35}
+    assert len(geocoding_server.requests) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_unknown_point_is_cached(geocoding_server):
+    # Given
+    map = Map(url=geocoding_server.url, cache=GeocodingCache())
+    # When
+    first_point = map.point({'address': 'nowhere', 'postcode': 75001})
+    second_point = map.point({'address': 'nowhere', 'postcode': 75001})
+    # Then
+    assert (first_point, second_point) == (None, None)
+    assert len(geocoding_server.requests) == 1
+
+
+def test_point_is_persisted_between_runs(geocoding_server, tmpdir):
+    # Given
+    path = str(tmpdir.join('geocoding.sqlite'))
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    Map(url=geocoding_server.url, cache=GeocodingCache(path)).point({'address': '1 rue de Paris', 'postcode': 75001})
+    cache = GeocodingCache(path)
+    # When
+    point = Map(url=geocoding_server.url, cache=cache).point({'address': '1 rue de Paris', 'postcode': 75001})
+    # Then
+    assert point == {'latitude': 48.85, 'longitude': 2.35}
+    assert len(geocoding_server.requests) == 1
+    assert cache.stats == {'memory_hits': 0, 'disk_hits': 1, 'misses': 0}
+
+
+def test_points_are_geocoded_by_the_bulk_endpoint(geocoding_server):
+    # Given
+    geocoding_server.bulk_available = True
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    geocoding_server.points['2 rue de Paris'] = {'latitude': 48.86, 'longitude': 2.36}
+    map = Map(url=geocoding_server.url, cache=GeocodingCache())
+    locations = [
+        {'address': '2 rue de Paris', 'postcode': 75001},
+        {'address': 'nowhere', 'postcode': 75001},
+        {'address': '1 rue de Paris', 'postcode': 75001},
+    ]
+    # When
+    results = map.points(locations)
+    # Then
+    assert results == [
+        {'point': {'latitude': 48.86, 'longitude': 2.36}, 'error': None},
+        {'point': None, 'error': None},
+        {'point': {'latitude': 48.85, 'longitude': 2.35}, 'error': None},
+    ]
+    assert [method for method, _, _ in geocoding_server.requests] == ['POST']
+
+
+def test_points_fall_back_to_concurrent_requests(geocoding_server):
+    # Given
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    geocoding_server.points['2 rue de Paris'] = {'latitude': 48.86, 'longitude': 2.36}
+    geocoding_server.failures['2 rue de Paris'] = 1
+    geocoding_server.failures['3 rue de Paris'] = 10
+    map = Map(url=geocoding_server.url, cache=GeocodingCache())
+    locations = [
+        {'address': '1 rue de Paris', 'postcode': 75001},
+        {'address': '2 rue de Paris', 'postcode': 75001},
+        {'address': '3 rue de Paris', 'postcode': 75001},
+    ]
+    # When
+    results = map.points(locations, retries=2)
+    # Then
+    assert [result['point'] for result in results] == [
+        {'latitude': 48.85, 'longitude': 2.35}, {'latitude': 48.86, 'longitude': 2.36}, None,
+    ]
+    assert [result['error'] is None for result in results] == [True, True, False]
+
+
+def test_points_only_geocode_unknown_locations(geocoding_server):
+    # Given
+    geocoding_server.bulk_available = True
+    geocoding_server.points['1 rue de Paris'] = {'latitude': 48.85, 'longitude': 2.35}
+    cache = GeocodingCache()
+    cache.store({'address': '2 rue de Paris', 'postcode': 75001}, {'latitude': 48.86, 'longitude': 2.36})
+    map = Map(url=geocoding_server.url, cache=cache)
+    locations = [{'address': '1 rue de Paris', 'postcode': 75001}, {'address': '2 rue de Paris', 'postcode': 75001}]
+    # When
+    map.points(locations)
+    results = map.points(locations)
+    # Then
+    assert [result['point'] for result in results] == [
+        {'latitude': 48.85, 'longitude': 2.35}, {'latitude': 48.86, 'longitude': 2.36},
+    ]
+    assert len(geocoding_server.requests) == 1
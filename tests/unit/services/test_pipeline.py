@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip('ortools')
+
+from src.services.pipeline import StageCache, run_pipeline  # noqa: E402
+
+PEOPLE_HEADER = ['address', 'area1', 'area2', 'area3', 'area4', 'availability', 'latitude', 'license', 'longitude',
+                 'name', 'email', 'postcode', 'surname', 'time_of_day']
+HOTELS_HEADER = ['address', 'bedroom_number', 'capacity', 'features', 'hotel_status', 'latitude', 'longitude', 'nom',
+                 'city', 'postcode']
+SEARCH = {'preset': 'fast', 'time_limit': 1}
+
+
+def _write(tmpdir, name, header, lines):
+    source = tmpdir.join(name)
+    source.write('\n'.join(';'.join(line) for line in [header] + lines))
+    return str(source)
+
+
+def _person(name, latitude, license, day, time_of_day, area='11'):
+    return ['{} rue de Paris'.format(name), area, '', '', '', day, str(latitude), license, '2.35', name, '',
+            '75011', 'surname', time_of_day]
+
+
+def _hotel(name, latitude, longitude):
+    return ['{} rue de Lyon'.format(name), '10', '20', '0', '0', str(latitude), str(longitude), name, 'Paris', '75012']
+
+
+def _write_files(tmpdir, hotels_count=4):
+    people = _write(tmpdir, 'people.csv', PEOPLE_HEADER, [
+        _person('alice', 48.85, 'oui', '04/11/2019', 'jour'),
+        _person('bob', 48.86, 'non', '04/11/2019', 'matin'),
+        _person('carol', 48.87, 'non', '04/11/2019', 'apres-midi'),
+        _person('dave', 48.88, 'oui', '04/11/2019', 'apres-midi'),
+    ])
+    hotels = _write(tmpdir, 'hotels.csv', HOTELS_HEADER, [
+        _hotel('hotel {}'.format(i), 48.84 + i * 0.005, 2.33 + i * 0.01) for i in range(hotels_count)
+    ])
+    return people, hotels
+
+
+def test_pipeline_plans_the_routes_of_the_couples(tmpdir):
+    # Given
+    people, hotels = _write_files(tmpdir)
+    # When
+    result = run_pipeline(people, hotels, search=SEARCH)
+    # Then
+    assert sorted(sorted(couple['persons']) for couple in result['couples']) == [
+        ['alice surname', 'bob surname'], ['carol surname', 'dave surname']
+    ]
+    # Then each couple starts from the address of its driver
+    assert sorted(vehicle['address'] for vehicle in result['vehicles']) == ['alice rue de Paris', 'dave rue de Paris']
+    day, = result['routes']['days']
+    visited = sorted(hotel for route in day['routes'] for hotel in route[1:-1])
+    assert visited == ['hotel {} rue de Lyon 75012'.format(i) for i in range(4)]
+    assert result['cached'] == {'couples': False, 'routes': False}
+
+
+def test_pipeline_only_computes_the_stages_whose_inputs_changed(tmpdir):
+    # Given
+    people, hotels = _write_files(tmpdir)
+    directory = str(tmpdir.join('cache'))
+    first = run_pipeline(people, hotels, StageCache(directory), search=SEARCH)
+    # When
+    again = run_pipeline(people, hotels, StageCache(directory), search=SEARCH)
+    _, hotels = _write_files(tmpdir, hotels_count=3)
+    changed = run_pipeline(people, hotels, StageCache(directory), search=SEARCH)
+    # Then
+    assert again['cached'] == {'couples': True, 'routes': True}
+    assert again == dict(first, cached=again['cached'])
+    assert changed['cached'] == {'couples': True, 'routes': False}